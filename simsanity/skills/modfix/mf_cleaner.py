@@ -8,6 +8,8 @@ from pathlib import Path
 from colorama import Fore
 import os
 
+from .mf_walker import ModsTree, walk_mods
+
 SAFE_ROOT_KEYWORDS = ["Electronic Arts", "The Sims 4"]
 
 def is_within_ea_mods(path: Path) -> bool:
@@ -22,7 +24,7 @@ def is_within_ea_mods(path: Path) -> bool:
 # 🧹 FILE CLEANUP & MAINTENANCE
 # ──────────────────────────────
 
-def clean_garbage_files(mods: Path) -> None:
+def clean_garbage_files(mods: Path, tree: ModsTree | None = None) -> None:
     """
     Remove common unwanted system files from the Mods folder.
     Example: .DS_Store, Thumbs.db, desktop.ini
@@ -30,7 +32,8 @@ def clean_garbage_files(mods: Path) -> None:
     garbage = {".DS_Store", "Thumbs.db", "desktop.ini"}
     removed = []
 
-    for file in mods.rglob("*"):
+    tree = tree or walk_mods(mods)
+    for file in (Path(r.path) for r in tree.files):
         if file.name in garbage:
             if not is_within_ea_mods(file):
                 print(f"🚫 [SAFEGUARD] Skipping unsafe delete outside EA Mods: {file}")
@@ -41,82 +44,109 @@ def clean_garbage_files(mods: Path) -> None:
             except Exception as e:
                 print(f"{Fore.YELLOW} ! Failed to delete {file} → {e}{Fore.RESET}")
 
+    tree.discard(removed)
     if removed:
         print(f"{Fore.GREEN}🧹 Removed {len(removed)} garbage files{Fore.RESET}")
 
 
-def clear_keyword_files(keywords, path, base=None):
+def clear_keyword_files(keywords, path, base=None, before_delete=None, tree: ModsTree | None = None):
     """
     Clean Sims 4 directory of known problematic files
     (e.g., lastexception, lastuiexception, lastcrash).
     Skips folders that match keywords.
+    `before_delete(files)` is called with the matched files before any is
+    removed, e.g. to analyze crash logs (see mf_crashlog) first.
+    `tree` is an earlier walk of `path` (see mf_walker); deleted files are dropped from it.
     """
     print(f"{Fore.MAGENTA}🔍 Scanning Sims 4 folder for keyword-matching files...{Fore.RESET}")
     deleted = []
+    targets = []
     path = Path(path)
+    tree = tree or walk_mods(path)
 
-    for file in path.rglob("*"):
-        if not file.is_file():
-            print(f"{Fore.CYAN}🛑 Skipped folder (not a file): {file.name}{Fore.RESET}")
-        print(f"  Checking: {file.name}")
+    for folder in (Path(d) for d in tree.dirs):
+        if any(kw.lower() in folder.name.lower() for kw in keywords):
+            print(f"{Fore.CYAN}🛑 Skipped folder (matches keyword, not deleted): {folder.name}{Fore.RESET}")
 
-        if file.is_file() and any(kw.lower() in file.name.lower() for kw in keywords):
+    for file in (Path(r.path) for r in tree.files):
+        print(f"  Checking: {file.name}")
+        if any(kw.lower() in file.name.lower() for kw in keywords):
             if not is_within_ea_mods(file):
                 print(f"🚫 [SAFEGUARD] Skipping unsafe keyword delete outside EA Mods: {file}")
                 continue
-            try:
-                file.unlink()
-                deleted.append(file)
-                print(f"{Fore.RED}  🗑 Deleted: {file.name}{Fore.RESET}")
-            except Exception as e:
-                print(f"{Fore.YELLOW} ! Failed to delete {file} → {e}{Fore.RESET}")
+            targets.append(file)
 
-        elif not file.is_file() and any(kw.lower() in file.name.lower() for kw in keywords):
-            print(f"{Fore.CYAN}🛑 Skipped folder (matches keyword, not deleted): {file.name}{Fore.RESET}")
+    if targets and before_delete:
+        before_delete(targets)
 
+    for file in targets:
+        try:
+            file.unlink()
+            deleted.append(file)
+            print(f"{Fore.RED}  🗑 Deleted: {file.name}{Fore.RESET}")
+        except Exception as e:
+            print(f"{Fore.YELLOW} ! Failed to delete {file} → {e}{Fore.RESET}")
+
+    tree.discard(deleted)
     if deleted:
         print(f"{Fore.GREEN}🧹 Removed {len(deleted)} keyword files from {base or path}{Fore.RESET}")
 
     return deleted
 
 
-def remove_empty_folders(path: Path, log_callback=print, aggressive: bool = False) -> None:
+def remove_empty_folders(path: Path, log_callback=print, aggressive: bool = False,
+                         tree: ModsTree | None = None) -> None:
     """
     Remove empty directories inside a given path and optionally perform
     deeper cleanup (temporary/log/backup files). Reports live to ModFix stream.
+    Emptiness is worked out from one walk (see mf_walker), deepest folders
+    first, so folders that only held empty folders go too.
     """
     removed_folders = 0
     removed_extra = 0
+    tree = tree or walk_mods(path)
 
-    # Normal folder cleanup
-    for root, dirs, files in os.walk(path, topdown=False):
-        for d in dirs:
-            dir_path = Path(root) / d
-            if not is_within_ea_mods(dir_path):
-                log_callback(f"🚫 [SAFEGUARD] Skipping unsafe folder removal outside EA Mods: {dir_path}")
-                continue
-            if not any(dir_path.iterdir()):
-                try:
-                    dir_path.rmdir()
-                    removed_folders += 1
-                    log_callback(f"🗑 Removed empty folder: {dir_path}")
-                except Exception as e:
-                    log_callback(f"⚠️ Error removing {dir_path}: {e}")
-
-    # Aggressive mode — remove junk files
+    # Aggressive mode — remove junk files (first, so their folders can go as well)
     if aggressive:
         junk_exts = {".tmp", ".log", ".bak"}
-        for file in path.rglob("*"):
-            if file.suffix.lower() in junk_exts:
-                if not is_within_ea_mods(file):
-                    log_callback(f"🚫 [SAFEGUARD] Skipping unsafe file delete outside EA Mods: {file}")
-                    continue
-                try:
-                    file.unlink()
-                    removed_extra += 1
-                    log_callback(f"🧼 Deleted leftover file: {file.name}")
-                except Exception as e:
-                    log_callback(f"⚠️ Could not delete {file}: {e}")
+        removed = []
+        for file in (Path(r.path) for r in tree.records(*junk_exts)):
+            if not is_within_ea_mods(file):
+                log_callback(f"🚫 [SAFEGUARD] Skipping unsafe file delete outside EA Mods: {file}")
+                continue
+            try:
+                file.unlink()
+                removed.append(file)
+                log_callback(f"🧼 Deleted leftover file: {file.name}")
+            except Exception as e:
+                log_callback(f"⚠️ Could not delete {file}: {e}")
+        tree.discard(removed)
+        removed_extra = len(removed)
+
+    # Normal folder cleanup
+    children = {folder: 0 for folder in tree.dirs}
+    for entry in [r.path for r in tree.files] + tree.dirs:
+        parent = os.path.dirname(entry)
+        if parent in children:
+            children[parent] += 1
+    for folder in sorted(tree.dirs, key=lambda d: d.count(os.sep), reverse=True):
+        if children[folder]:
+            continue
+        dir_path = Path(folder)
+        if not is_within_ea_mods(dir_path):
+            log_callback(f"🚫 [SAFEGUARD] Skipping unsafe folder removal outside EA Mods: {dir_path}")
+            continue
+        try:
+            # rmdir refuses non-empty folders, e.g. ones holding files the walk skipped
+            dir_path.rmdir()
+            removed_folders += 1
+            log_callback(f"🗑 Removed empty folder: {dir_path}")
+        except Exception as e:
+            log_callback(f"⚠️ Error removing {dir_path}: {e}")
+            continue
+        parent = os.path.dirname(folder)
+        if parent in children:
+            children[parent] -= 1
 
     if removed_folders or removed_extra:
         log_callback(f"✅ Cleanup complete — {removed_folders} empty folders, {removed_extra} junk files removed.")
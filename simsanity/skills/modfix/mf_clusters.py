@@ -0,0 +1,147 @@
+"""
+🕸️ mf_clusters.py
+Groups TGI conflicts into clusters of mutually conflicting packages.
+Shared keys are folded into per-pair counters as they stream in, so the
+report grows with the number of conflicting packages, not the number of
+shared resources.
+"""
+
+import csv
+import json
+from collections import Counter
+from pathlib import Path
+
+from .mf_restypes import category_of, max_severity, severity_rank
+
+
+# ──────────────────────────────
+# 🔗 UNION-FIND
+# ──────────────────────────────
+class UnionFind:
+    """Disjoint-set forest with path halving and union by size."""
+
+    def __init__(self):
+        self.parent: dict[int, int] = {}
+        self.size: dict[int, int] = {}
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        if item not in parent:
+            parent[item] = item
+            self.size[item] = 1
+            return item
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: int, b: int) -> int:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return root_a
+
+
+# ──────────────────────────────
+# 🕸️ CLUSTER BUILDER
+# ──────────────────────────────
+class ConflictClusters:
+    """
+    Accumulates (file, other file, resource type) rows into clusters.
+    Rows flagged `identical` (same payload bytes in both packages) are counted
+    separately and do not raise a pair's severity.
+    """
+
+    def __init__(self):
+        self.sets = UnionFind()
+        self.pair_types: dict[tuple[int, int], Counter] = {}
+        self.pair_identical: dict[tuple[int, int], Counter] = {}
+
+    def add(self, file_id: int, other_id: int, res_type: int, identical: bool = False) -> None:
+        pair = (min(file_id, other_id), max(file_id, other_id))
+        self.pair_types.setdefault(pair, Counter())[res_type] += 1
+        if identical:
+            self.pair_identical.setdefault(pair, Counter())[res_type] += 1
+        self.sets.union(file_id, other_id)
+
+    def __len__(self) -> int:
+        return len(self.pair_types)
+
+    def clusters(self, names: list[str]) -> list[dict]:
+        """
+        Return clusters, most severe and then largest first.
+        `names[file_id]` labels each package. Each pair lists its shared key
+        count, how many of those are byte-identical, a per-resource-type and
+        per-category breakdown, and a severity based on the differing keys.
+        A pair whose shared keys are all identical is a "duplicate, safe".
+        """
+        grouped: dict[int, dict] = {}
+        for (a, b), types in self.pair_types.items():
+            root = self.sets.find(a)
+            cluster = grouped.setdefault(root, {"packages": set(), "pairs": []})
+            cluster["packages"].update((a, b))
+            categories = Counter()
+            for res_type, n in types.items():
+                categories[category_of(res_type)] += n
+            identical = self.pair_identical.get((a, b), Counter())
+            differing = types - identical
+            cluster["pairs"].append({
+                "mod1": names[a],
+                "mod2": names[b],
+                "verdict": "conflict" if differing else "duplicate, safe",
+                "severity": max_severity(differing),
+                "shared_keys": sum(types.values()),
+                "identical_keys": sum(identical.values()),
+                "by_category": dict(categories.most_common()),
+                "by_type": {f"{t:08X}": n for t, n in types.most_common()},
+            })
+
+        def cluster_severity(cluster):
+            return max((p["severity"] for p in cluster["pairs"]), key=severity_rank)
+
+        result = []
+        ordered = sorted(
+            grouped.values(),
+            key=lambda c: (-severity_rank(cluster_severity(c)), -len(c["packages"]), min(c["packages"])),
+        )
+        for number, cluster in enumerate(ordered, 1):
+            cluster["pairs"].sort(key=lambda p: (-severity_rank(p["severity"]), -p["shared_keys"]))
+            result.append({
+                "cluster": number,
+                "severity": cluster_severity(cluster),
+                "packages": sorted(names[i] for i in cluster["packages"]),
+                "shared_keys": sum(p["shared_keys"] for p in cluster["pairs"]),
+                "pairs": cluster["pairs"],
+            })
+        return result
+
+
+# ──────────────────────────────
+# 📄 REPORT
+# ──────────────────────────────
+def write_conflict_report(clusters: list[dict], output_path: Path) -> None:
+    """Write clusters as JSON for a .json path, otherwise as one CSV row per package pair."""
+    output_path = Path(output_path)
+    if output_path.suffix.lower() == ".json":
+        with open(output_path, "w") as f:
+            json.dump(clusters, f, indent=2)
+        return
+
+    with open(output_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            "cluster", "severity", "verdict", "mod1", "mod2",
+            "shared_keys", "identical_keys", "by_category", "by_type",
+        ])
+        for cluster in clusters:
+            for pair in cluster["pairs"]:
+                by_category = ";".join(f"{c}:{n}" for c, n in pair["by_category"].items())
+                by_type = ";".join(f"{t}:{n}" for t, n in pair["by_type"].items())
+                writer.writerow([
+                    cluster["cluster"], pair["severity"], pair["verdict"], pair["mod1"], pair["mod2"],
+                    pair["shared_keys"], pair["identical_keys"], by_category, by_type,
+                ])
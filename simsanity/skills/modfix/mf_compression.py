@@ -0,0 +1,215 @@
+"""
+🗜️ mf_compression.py
+Lazy resource decompression for DBPF packages (zlib and EA RefPack/QFS).
+Nothing is decompressed until a resource is requested. Output is streamed
+into a reusable buffer, and an optional LRU cache keeps recently
+decompressed resources so repeated analyses do not pay twice.
+"""
+
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+
+from .mf_dbpf import (
+    COMPRESSION_NONE,
+    COMPRESSION_REFPACK,
+    COMPRESSION_ZLIB,
+    ResourceEntry,
+)
+from .mf_mmap import open_mapped
+
+ZLIB_STREAM_CHUNK = 256 * 1024
+
+
+# ──────────────────────────────
+# 🧩 REFPACK / QFS
+# ──────────────────────────────
+def refpack_size(data) -> int:
+    """Return the decompressed size stored in a RefPack header."""
+    if len(data) < 5 or data[1] != 0xFB:
+        raise ValueError("missing RefPack signature")
+    flags = data[0]
+    size_bytes = 4 if flags & 0x80 else 3
+    pos = 2 + (size_bytes if flags & 0x01 else 0)
+    return int.from_bytes(bytes(data[pos:pos + size_bytes]), "big")
+
+
+def refpack_decompress(data, out: bytearray | None = None) -> memoryview:
+    """
+    Decompress EA RefPack (QFS) data into `out` (grown as needed) and
+    return a memoryview of the decompressed bytes.
+    """
+    flags = data[0]
+    size_bytes = 4 if flags & 0x80 else 3
+    size = refpack_size(data)
+    src = 2 + size_bytes * (2 if flags & 0x01 else 1)
+
+    if out is None:
+        out = bytearray(size)
+    elif len(out) < size:
+        out.extend(bytes(size - len(out)))
+    dst = 0
+    end = len(data)
+
+    while src < end:
+        b0 = data[src]
+        if b0 < 0x80:
+            b1 = data[src + 1]
+            src += 2
+            literal = b0 & 0x03
+            copy_len = ((b0 & 0x1C) >> 2) + 3
+            copy_off = ((b0 & 0x60) << 3) + b1 + 1
+        elif b0 < 0xC0:
+            b1, b2 = data[src + 1], data[src + 2]
+            src += 3
+            literal = (b1 >> 6) & 0x03
+            copy_len = (b0 & 0x3F) + 4
+            copy_off = ((b1 & 0x3F) << 8) + b2 + 1
+        elif b0 < 0xE0:
+            b1, b2, b3 = data[src + 1], data[src + 2], data[src + 3]
+            src += 4
+            literal = b0 & 0x03
+            copy_len = ((b0 & 0x0C) << 6) + b3 + 5
+            copy_off = ((b0 & 0x10) << 12) + (b1 << 8) + b2 + 1
+        elif b0 < 0xFC:
+            src += 1
+            literal = ((b0 & 0x1F) << 2) + 4
+            copy_len = 0
+            copy_off = 0
+        else:
+            # End-of-stream marker carries up to three trailing literals
+            src += 1
+            literal = b0 & 0x03
+            out[dst:dst + literal] = data[src:src + literal]
+            dst += literal
+            break
+
+        if literal:
+            out[dst:dst + literal] = data[src:src + literal]
+            src += literal
+            dst += literal
+        if copy_len:
+            start = dst - copy_off
+            if start < 0:
+                raise ValueError("RefPack back-reference before start of output")
+            if copy_off >= copy_len:
+                out[dst:dst + copy_len] = out[start:start + copy_len]
+            else:
+                # Overlapping copy repeats the last `copy_off` bytes
+                for i in range(copy_len):
+                    out[dst + i] = out[start + i]
+            dst += copy_len
+
+    if dst != size:
+        raise ValueError(f"RefPack stream produced {dst} bytes, header says {size}")
+    return memoryview(out)[:size]
+
+
+# ──────────────────────────────
+# 🌀 ZLIB
+# ──────────────────────────────
+def zlib_decompress(data, size: int, out: bytearray | None = None) -> memoryview:
+    """Stream-decompress zlib data into `out` in bounded chunks."""
+    if out is None:
+        out = bytearray(size)
+    elif len(out) < size:
+        out.extend(bytes(size - len(out)))
+
+    inflater = zlib.decompressobj()
+    pos = 0
+    pending = data
+    while True:
+        chunk = inflater.decompress(pending, ZLIB_STREAM_CHUNK)
+        out[pos:pos + len(chunk)] = chunk
+        pos += len(chunk)
+        pending = inflater.unconsumed_tail
+        if not pending:
+            break
+    tail = inflater.flush()
+    out[pos:pos + len(tail)] = tail
+    pos += len(tail)
+
+    if pos != size:
+        raise ValueError(f"zlib stream produced {pos} bytes, index says {size}")
+    return memoryview(out)[:size]
+
+
+def decompress(entry: ResourceEntry, stored, out: bytearray | None = None) -> memoryview:
+    """Decompress a resource's stored bytes according to its index entry."""
+    if entry.compression == COMPRESSION_NONE:
+        return memoryview(stored)
+    if entry.compression == COMPRESSION_ZLIB:
+        return zlib_decompress(stored, entry.mem_size, out)
+    if entry.compression == COMPRESSION_REFPACK:
+        return refpack_decompress(stored, out)
+    raise ValueError(f"unsupported compression type 0x{entry.compression:04X}")
+
+
+# ──────────────────────────────
+# ♻️ LRU CACHE
+# ──────────────────────────────
+class ResourceCache:
+    """Least-recently-used cache of decompressed resources, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: OrderedDict[tuple, bytes] = OrderedDict()
+
+    def get(self, key: tuple) -> bytes | None:
+        data = self._items.get(key)
+        if data is not None:
+            self._items.move_to_end(key)
+        return data
+
+    def put(self, key: tuple, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self._items[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= len(evicted)
+
+
+# ──────────────────────────────
+# 📖 LAZY READER
+# ──────────────────────────────
+class ResourceReader:
+    """
+    Reads resources of one package on demand.
+    `read()` returns an independent bytes object (cached if a cache is given);
+    `read_into()` reuses the reader's buffer and returns a view that is only
+    valid until the next call.
+    """
+
+    def __init__(self, pkg_path: Path, cache: ResourceCache | None = None):
+        self.pkg_path = Path(pkg_path)
+        self.cache = cache
+        self._buffer = bytearray()
+
+    def read_into(self, entry: ResourceEntry) -> memoryview:
+        size = entry.mem_size if entry.compressed else entry.file_size
+        if len(self._buffer) < size:
+            # Replace rather than resize: an earlier view may still be exported
+            self._buffer = bytearray(size)
+        with open_mapped(self.pkg_path) as pkg:
+            with pkg.resource(entry) as stored:
+                if entry.compression == COMPRESSION_NONE:
+                    self._buffer[:size] = stored
+                    return memoryview(self._buffer)[:size]
+                return decompress(entry, stored, self._buffer)
+
+    def read(self, entry: ResourceEntry) -> bytes:
+        key = (str(self.pkg_path), entry.type, entry.group, entry.instance, entry.offset)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        data = bytes(self.read_into(entry))
+        if self.cache is not None:
+            self.cache.put(key, data)
+        return data
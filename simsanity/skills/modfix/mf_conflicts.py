@@ -4,9 +4,23 @@ Detects mod conflicts (duplicate TGI keys) and broken or corrupt Sims 4 mod file
 Extracted from modfix.py for modularization.
 """
 
+import csv
 from pathlib import Path
 from colorama import Fore
 from .mf_utils import c
+from .mf_mmap import open_mapped, release_mapped
+from .mf_index_cache import TGIIndex
+from .mf_parallel import map_chunks
+from .mf_dbpf import ResourceEntry
+from .mf_keymerge import KeySpiller
+from . import mf_keyarray as keyarray
+from .mf_clusters import ConflictClusters, write_conflict_report
+from .mf_restypes import max_severity, severity_of, severity_rank
+from .mf_content_hash import PayloadHasher
+from .mf_load_order import MAX_PACKAGE_DEPTH, is_loaded, winners_first, write_override_table
+from .mf_refs import package_references
+from .mf_validate import validate_files
+from .mf_walker import MOD_EXTENSIONS, ModsTree, walk_mods
 
 CACHE_FILE = Path(__file__).parent / "manual_mods_path.txt"
 
@@ -34,139 +48,319 @@ def clear_cached_mod_path():
 # ──────────────────────────────
 # ⚔️ TGI KEY READER
 # ──────────────────────────────
-def read_tgi_keys(pkg_path: Path) -> set[bytes]:
+def read_tgi_keys(pkg_path: Path) -> set[tuple[int, int, int]]:
     """
-    Extract raw TGI keys (Type, Group, Instance identifiers)
-    from a Sims 4 .package file for conflict detection.
+    Extract the exact (Type, Group, Instance) keys of every resource
+    in a Sims 4 .package file for conflict detection.
+    Only the mapped pages holding the DBPF header and index table are touched.
     """
     keys = set()
     try:
         if not pkg_path.exists():
             return keys
-        with pkg_path.open("rb") as f:
-            data = f.read()
-            offset = 0
-            while True:
-                idx = data.find(b'TGIN', offset)
-                if idx == -1:
-                    break
-                keys.add(data[idx:idx + 16])
-                offset = idx + 1
+        with open_mapped(pkg_path) as pkg:
+            keys = {entry.key for entry in pkg.index()}
     except Exception as e:
         print(f"Error reading TGI from {pkg_path}: {e}")
     return keys
 
 
+# ──────────────────────────────
+# ⚡ PARALLEL INDEX READING
+# ──────────────────────────────
+def _read_entries_chunk(paths: list[str], with_refs: bool = False) -> list[tuple]:
+    """
+    Pool worker: read the index of each package in `paths`, and with
+    `with_refs` the keys its resources reference.
+    Returns plain tuples (path, entries or None, refs, error or None) to keep pickling cheap.
+    """
+    results = []
+    for path in paths:
+        try:
+            with open_mapped(Path(path)) as pkg:
+                entries = pkg.index()
+            refs = package_references(Path(path), entries) if with_refs else []
+            results.append((path, [tuple(e) for e in entries], refs, None))
+        except Exception as e:
+            results.append((path, None, [], str(e)))
+    return results
+
+
+def _read_entries_refs_chunk(paths: list[str]) -> list[tuple]:
+    return _read_entries_chunk(paths, with_refs=True)
+
+
+def iter_package_entries(files: list[Path], workers: int = 1, chunk_size: int = 64,
+                         with_refs: bool = False):
+    """
+    Yield (path, [ResourceEntry], refs, error) for every package in `files`,
+    fanning the parsing out to a process pool when `workers > 1`.
+    `refs` stays empty unless `with_refs` is set (see mf_refs.package_references).
+    Results arrive in completion order, not input order.
+    """
+    worker = _read_entries_refs_chunk if with_refs else _read_entries_chunk
+    for path, entries, refs, error in map_chunks(worker, [str(f) for f in files], workers, chunk_size):
+        yield Path(path), [ResourceEntry(*e) for e in entries or ()], refs, error
+
+
+# ──────────────────────────────
+# 🗄️ INDEX REFRESH
+# ──────────────────────────────
+def refresh_tgi_index(mod_files: list[Path], index_path: Path, log_callback=print,
+                      workers: int = 1, chunk_size: int = 64,
+                      fingerprints: dict[str, tuple] | None = None, prune: bool = True) -> None:
+    """
+    Bring the persistent TGI index up to date for `mod_files`.
+    Unchanged packages are not opened at all; changed ones are parsed
+    in a process pool when `workers > 1`, together with the resource
+    references used by the missing-dependency report.
+    `fingerprints` from a walk (see mf_walker) spare a stat per package.
+    Without `prune`, rows of packages missing from `mod_files` are kept.
+    """
+    with TGIIndex(index_path) as index:
+        stale, removed = index.stale(mod_files, fingerprints=fingerprints, prune=prune)
+        log_callback(
+            f"🗄️ TGI index: {len(mod_files) - len(stale)} unchanged, "
+            f"{len(stale)} new or changed, {removed} removed."
+        )
+        stale_fps = {str(file): fp for file, fp in stale}
+        parsed = iter_package_entries([file for file, _ in stale], workers, chunk_size, with_refs=True)
+        for i, (file, entries, refs, error) in enumerate(parsed, 1):
+            if error:
+                # Cache the failure too, so a corrupt file is not re-read until it changes
+                log_callback(f"⚠️ Error reading TGI from {file.name}: {error}")
+            index.store(file, stale_fps[str(file)], entries, refs)
+            if i % 25 == 0 or i == len(stale):
+                log_callback(f"🗄️ Indexed {i}/{len(stale)} changed packages...")
+
+
 # ──────────────────────────────
 # ⚔️ CONFLICT DETECTOR
 # ──────────────────────────────
-def detect_conflicting_tgi(mods: Path, output_path: Path, quarantine: bool = True, log_callback=print) -> list[tuple[str, str]]:
+def iter_file_keys(mod_files: list[Path], index_path: Path | None = None, workers: int = 1,
+                   chunk_size: int = 64):
     """
-    Identify mod conflicts where two mods contain identical TGI keys.
-    Optionally quarantines duplicates and streams progress updates.
-    Returns a list of conflicting pairs.
+    Yield (file id, keys) for every package, one package at a time.
+    The file id is the package's position in `mod_files`.
+    """
+    if index_path:
+        with TGIIndex(index_path) as index:
+            for file_id, file in enumerate(mod_files):
+                yield file_id, index.keys_for(file)
+        return
+
+    ids = {str(file): file_id for file_id, file in enumerate(mod_files)}
+    for file, entries, _, error in iter_package_entries(mod_files, workers, chunk_size):
+        if error:
+            print(f"Error reading TGI from {file}: {error}")
+        yield ids[str(file)], {e.key for e in entries}
+
+
+def find_shared_keys(file_keys, total_files: int, memory_limit_mb: int = 256, log_callback=print):
     """
+    Yield ((type, group, instance), file id, owner id) for every key a file
+    shares with the lowest file id that owns it.
+    Uses packed NumPy arrays while they fit in `memory_limit_mb`, otherwise
+    (or without NumPy) the on-disk external merge.
+    """
+    limit = memory_limit_mb * 1024 * 1024
+    builder = keyarray.KeyArrayBuilder() if keyarray.available() else None
+
+    with KeySpiller(memory_limit_mb) as spiller:
+        for i, (file_id, keys) in enumerate(file_keys, 1):
+            if builder is not None:
+                builder.add(file_id, keys)
+                if builder.nbytes * keyarray.SORT_OVERHEAD > limit:
+                    log_callback("💾 Key array exceeds the memory limit, switching to on-disk merge...")
+                    for spilled_id, spilled_keys in builder.iter_files():
+                        spiller.add(spilled_id, spilled_keys)
+                    builder = None
+            else:
+                spiller.add(file_id, keys)
+            if i % 25 == 0 or i == total_files:
+                log_callback(f"🔍 Scanned {i}/{total_files} mods...")
+
+        if builder is not None:
+            found = keyarray.find_conflicts(builder.build())
+            yield from (
+                ((t, g, inst), f, o)
+                for f, o, t, g, inst in zip(
+                    found.files.tolist(), found.owners.tolist(), found.types.tolist(),
+                    found.groups.tolist(), found.instances.tolist(),
+                )
+            )
+            return
+
+        if spiller.spilled_runs:
+            log_callback(f"💾 Merging {spiller.total_records} keys from {spiller.spilled_runs} sorted runs on disk...")
+        for key, owners in spiller.duplicates():
+            for file_id in owners[1:]:
+                yield key, file_id, owners[0]
+
+
+def _display_name(mods: Path, file: Path) -> str:
+    """Path relative to the Mods folder, so same-named files in different folders stay distinct."""
     try:
-        total_files = sum(1 for _ in mods.rglob("*.package"))
-        if total_files > 10000:
-            log_callback(f"⚠️ [DEBUG] Too many package files ({total_files}), skipping scan to prevent hang.")
-            return []
-    except Exception as e:
-        log_callback(f"⚠️ [DEBUG] Could not count mod files: {e}")
+        return file.relative_to(mods).as_posix()
+    except ValueError:
+        return file.name
+
 
-    tgi_map = {}
-    conflicts = []
+def detect_conflicting_tgi(mods: Path, output_path: Path, quarantine: bool = True, log_callback=print,
+                           index_path: Path | None = None, workers: int = 1,
+                           chunk_size: int = 64, memory_limit_mb: int = 256,
+                           quarantine_severity: str = "high", hash_payloads: bool = True,
+                           overrides_path: Path | None = None, tree: ModsTree | None = None) -> list[dict]:
+    """
+    Identify mod conflicts where two mods contain identical TGI keys.
+    Optionally quarantines duplicates and streams progress updates.
+    With `index_path`, keys come from the persistent TGI index and only
+    new or changed packages are re-read. `workers > 1` parses packages in a
+    process pool, `chunk_size` packages per task.
+    Keys are matched in packed NumPy arrays, or with an external sort that
+    spills to temporary files above `memory_limit_mb`, so there is no limit
+    on library size.
+    Only packages whose shared resources reach `quarantine_severity`
+    (see mf_restypes) are quarantined; harmless overlaps such as duplicate
+    thumbnails stay in place and are only reported.
+    With `hash_payloads`, each contested resource is hashed (only its byte
+    range is read) and byte-identical copies are reported as "duplicate, safe"
+    instead of conflicts. Digests are cached in the TGI index when one is used.
+    Packages are matched in game load order (see mf_load_order): the package
+    that loses a contested resource is the one quarantined, and with an index
+    `overrides_path` receives a winner/loser table per contested resource.
+    Files come from `tree` (see mf_walker) when given, or from a fresh walk;
+    quarantined packages are dropped from it.
+    Returns clusters of mutually conflicting packages (see mf_clusters).
+    """
     quarantined = []
 
     if not mods.exists():
         log_callback(f"❌ Mods folder not found: {mods}")
-        return conflicts
+        return []
 
     # Limit search scope to only Electronic Arts and The Sims 4 directories within Mods folder
-    mod_files = []
-    for folder in mods.rglob("*"):
-        if folder.is_dir() and is_within_ea_mods(folder):
-            mod_files.extend(folder.glob("*.package"))
+    tree = tree or walk_mods(mods)
+    records = [r for r in tree.records(".package") if is_within_ea_mods(Path(r.path))]
+    mod_files = [Path(r.path) for r in records]
     log_callback(f"🧩 [DEBUG] Restricted scan scope. Found {len(mod_files)} package files in Sims-related folders.")
     log_callback(f"📦 Scanning {len(mod_files)} package files for TGI keys...")
 
-    for i, file in enumerate(mod_files, 1):
-        # Skip files outside of Electronic Arts or The Sims 4 Mods folders
-        if not is_within_ea_mods(file):
-            log_callback(f"🚫 [SAFEGUARD] Skipping file outside EA Mods folder: {file}")
-            continue
-        log_callback(f"🧩 [DEBUG] Starting file {i}/{len(mod_files)}: {file.name}")
-        try:
-            keys = read_tgi_keys(file)
-            log_callback(f"🧩 [DEBUG] Finished reading TGI keys from: {file.name} ({len(keys)} keys)")
-            for key in keys:
-                if key in tgi_map:
-                    conflict_pair = (file.name, tgi_map[key].name)
-                    conflicts.append(conflict_pair)
-
-                    # Quarantine handling
-                    if quarantine:
-                        if not is_within_ea_mods(file):
-                            log_callback(f"🚫 [SAFEGUARD] Prevented quarantining file outside EA Mods folder: {file}")
-                            continue
-                        q_dir = mods / "ModFix_Quarantine"
-                        q_dir.mkdir(exist_ok=True)
-                        dest = q_dir / file.name
-                        file.rename(dest)
-                        quarantined.append(dest)
-                        log_callback(f"⚔️ Conflict detected between {file.name} and {tgi_map[key].name}. Quarantined {file.name}.")
-                else:
-                    tgi_map[key] = file
-
-            log_callback(f"🧩 [DEBUG] Completed scan of {i} files so far...")
-
-            if i % 25 == 0 or i == len(mod_files):
-                log_callback(f"🔍 Scanned {i}/{len(mod_files)} mods...")
+    # Winners first: for every shared key the lowest file id is the package the game uses
+    mod_files = winners_first(mods, mod_files)
+    unloaded = sum(1 for f in mod_files if not is_loaded(mods, f))
+    if unloaded:
+        log_callback(f"🕳️ {unloaded} packages are nested more than {MAX_PACKAGE_DEPTH} folders deep and are never loaded by the game.")
 
-        except Exception as e:
-            log_callback(f"⚠️ Error scanning {file.name}: {e}")
+    if index_path:
+        refresh_tgi_index(mod_files, index_path, log_callback, workers, chunk_size,
+                          fingerprints={r.path: r.fingerprint for r in records})
+        if overrides_path:
+            write_override_table(index_path, mods, overrides_path, log_callback)
 
-    # Write CSV
-    with open(output_path, "w") as f:
-        f.write("mod1,mod2\n")
-        for m1, m2 in conflicts:
-            f.write(f"{m1},{m2}\n")
+    conflicts = ConflictClusters()
+    losers = {}
+    loser_types: dict[int, set] = {}
+    identical_count = 0
+    hash_index = TGIIndex(index_path) if index_path and hash_payloads else None
+    hasher = PayloadHasher(hash_index) if hash_payloads else None
+    try:
+        # owner_id is the load-order winner of the key; file_id is a package it overrides
+        for key, file_id, owner_id in find_shared_keys(
+            iter_file_keys(mod_files, index_path, workers, chunk_size), len(mod_files), memory_limit_mb, log_callback
+        ):
+            identical = hasher is not None and hasher.identical(mod_files[file_id], mod_files[owner_id], key)
+            conflicts.add(file_id, owner_id, key[0], identical)
+            if identical:
+                identical_count += 1
+                continue
+            # Name the partner behind the most severe resource this package loses
+            types = loser_types.setdefault(file_id, set())
+            if file_id not in losers or severity_rank(severity_of(key[0])) > severity_rank(max_severity(types)):
+                losers[file_id] = owner_id
+            types.add(key[0])
+    finally:
+        if hash_index is not None:
+            hash_index.close()
 
-    if conflicts:
-        log_callback(f"⚠️ Found {len(conflicts)} TGI conflicts. Results saved to {output_path}")
+    if identical_count:
+        log_callback(f"🧬 {identical_count} shared resources are byte-identical copies — marked as duplicate, safe.")
+
+    # Quarantine handling
+    if quarantine:
+        threshold = severity_rank(quarantine_severity)
+        kept = {i for i in losers if severity_rank(max_severity(loser_types[i])) < threshold}
+        if kept:
+            log_callback(
+                f"ℹ️ {len(kept)} packages only share lower-severity resources "
+                f"(below {quarantine_severity}); left in place, see the report."
+            )
+        for file_id, other_id in sorted(losers.items()):
+            if file_id in kept:
+                continue
+            file = mod_files[file_id]
+            if not is_within_ea_mods(file):
+                log_callback(f"🚫 [SAFEGUARD] Prevented quarantining file outside EA Mods folder: {file}")
+                continue
+            try:
+                q_dir = mods / "ModFix_Quarantine"
+                q_dir.mkdir(exist_ok=True)
+                dest = q_dir / file.name
+                release_mapped(file)
+                file.rename(dest)
+                quarantined.append(dest)
+                tree.discard([file])
+                log_callback(
+                    f"⚔️ {mod_files[other_id].name} overrides {file.name} in load order. Quarantined {file.name}."
+                )
+            except Exception as e:
+                log_callback(f"⚠️ Could not quarantine {file.name}: {e}")
+
+    clusters = conflicts.clusters([_display_name(mods, f) for f in mod_files])
+    write_conflict_report(clusters, output_path)
+
+    if clusters:
+        log_callback(
+            f"⚠️ Found {len(conflicts)} conflicting package pairs in {len(clusters)} clusters. "
+            f"Results saved to {output_path}"
+        )
     else:
         log_callback("✅ No TGI conflicts found.")
 
     if quarantined:
         log_callback(f"🚷 Quarantined {len(quarantined)} mods to /ModFix_Quarantine")
 
-    return conflicts
+    return clusters
 
 
 # ──────────────────────────────
 # 🚫 BROKEN MOD DETECTION
 # ──────────────────────────────
-def detect_broken_mods(mods: Path, output_path: Path) -> None:
+def detect_broken_mods(mods: Path, output_path: Path, deep: bool = False, index_path: Path | None = None,
+                       workers: int = 1, chunk_size: int = 32, log_callback=print,
+                       tree: ModsTree | None = None) -> list[tuple[str, list[str]]]:
     """
-    Scan for broken or unreadable Sims 4 mod files and export results.
+    Scan for broken or corrupt Sims 4 mod files and export results.
+    Packages are checked structurally (see mf_validate); `deep` also
+    decompresses every resource. With an index, unchanged files reuse
+    their cached result. Returns [(path relative to Mods, problems)].
     """
-    broken = []
-    for file in mods.rglob("*"):
-        if file.suffix.lower() in {".package", ".ts4script"}:
-            try:
-                if file.stat().st_size == 0:
-                    broken.append(file.name)
-                else:
-                    with file.open("rb") as f:
-                        f.read(1)
-            except Exception:
-                broken.append(file.name)
+    tree = tree or walk_mods(mods)
+    results = validate_files(
+        tree.paths(*MOD_EXTENSIONS), deep, index_path, workers, chunk_size, log_callback,
+        fingerprints=tree.fingerprints(*MOD_EXTENSIONS),
+    )
+    broken = sorted(
+        (_display_name(mods, file), problems) for file, problems in results.items() if problems
+    )
 
     if broken:
-        with open(output_path, "w") as f:
-            f.write("broken_mods\n")
-            for name in broken:
-                f.write(f"{name}\n")
-        print(c(f"🚫 Found {len(broken)} broken mods. Exported to {output_path}", Fore.YELLOW))
+        with open(output_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["broken_mods", "problems"])
+            for name, problems in broken:
+                writer.writerow([name, "; ".join(problems)])
+        log_callback(c(f"🚫 Found {len(broken)} broken mods. Exported to {output_path}", Fore.YELLOW))
     else:
-        print(c("✅ No broken mods found.", Fore.GREEN))
+        log_callback(c("✅ No broken mods found.", Fore.GREEN))
+    return broken
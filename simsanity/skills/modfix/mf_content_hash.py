@@ -0,0 +1,94 @@
+"""
+🧬 mf_content_hash.py
+Content hashes of conflicting resources.
+Two packages that ship byte-identical copies of a resource (shared creator
+meshes, common textures) do not really conflict. Only the byte ranges of the
+contested resources are read, and digests are cached in the TGI index so
+re-runs do not read them again.
+"""
+
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+
+from .mf_compression import ResourceCache, ResourceReader
+from .mf_dbpf import ResourceEntry
+from .mf_index_cache import TGIIndex
+from .mf_mmap import open_mapped
+
+DIGEST_SIZE = 16
+# Package index maps kept when there is no TGI index (conflicts come in pairs)
+MAX_ENTRY_MAPS = 4
+# Digests memoised in memory; a key's copies are compared together, so recent ones are what repeats
+MAX_DIGESTS = 50_000
+
+
+def payload_digest(reader: ResourceReader, entry: ResourceEntry) -> bytes:
+    """Hash the decompressed payload, so differently compressed copies still match."""
+    with reader.read_into(entry) as payload:
+        return hashlib.blake2b(payload, digest_size=DIGEST_SIZE).digest()
+
+
+class PayloadHasher:
+    """
+    Resolves (package, key) → payload digest.
+    With an index, entries and digests come from and go to SQLite; without one,
+    the package indexes of the last few packages are kept and digests live in
+    memory. Either way the most recent digests are memoised. One reader, and so one decompression buffer, serves every package.
+    """
+
+    def __init__(self, index: TGIIndex | None = None):
+        self.index = index
+        self._digests: OrderedDict[tuple[str, tuple], bytes | None] = OrderedDict()
+        self._entries: OrderedDict[str, dict[tuple, ResourceEntry]] = OrderedDict()
+        # Small cache: hashing reads each payload once
+        self._shared_reader = ResourceReader(Path(), ResourceCache(8 * 1024 * 1024))
+
+    def _reader(self, path: str) -> ResourceReader:
+        # The reader maps the package on each read, so pointing it elsewhere is enough
+        self._shared_reader.pkg_path = Path(path)
+        return self._shared_reader
+
+    def _entry(self, path: str, key: tuple) -> ResourceEntry | None:
+        entries = self._entries.get(path)
+        if entries is None:
+            with open_mapped(Path(path)) as pkg:
+                entries = self._entries[path] = {e.key: e for e in pkg.index()}
+            if len(self._entries) > MAX_ENTRY_MAPS:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(path)
+        return entries.get(key)
+
+    def digest(self, path: Path, key: tuple[int, int, int]) -> bytes | None:
+        """Digest of one resource's payload, or None if it cannot be read."""
+        memo_key = (str(path), key)
+        if memo_key in self._digests:
+            self._digests.move_to_end(memo_key)
+            return self._digests[memo_key]
+
+        digest = None
+        try:
+            if self.index is not None:
+                found = self.index.entry_for(path, key)
+                if found is not None:
+                    package_id, entry = found
+                    digest = self.index.cached_digest(package_id, key)
+                    if digest is None:
+                        digest = payload_digest(self._reader(str(path)), entry)
+                        self.index.store_digest(package_id, key, digest)
+            else:
+                entry = self._entry(str(path), key)
+                if entry is not None:
+                    digest = payload_digest(self._reader(str(path)), entry)
+        except Exception as e:
+            print(f"Error hashing {key} in {path}: {e}")
+
+        self._digests[memo_key] = digest
+        if len(self._digests) > MAX_DIGESTS:
+            self._digests.popitem(last=False)
+        return digest
+
+    def identical(self, path_a: Path, path_b: Path, key: tuple[int, int, int]) -> bool:
+        digest_a = self.digest(path_a, key)
+        return digest_a is not None and digest_a == self.digest(path_b, key)
@@ -0,0 +1,171 @@
+"""
+💥 mf_crashlog.py
+Crash log analyzer for lastException / lastUIException files.
+Resource IDs, tuning names and script paths found in a log are resolved
+to the mod files that provide them through the persistent TGI index
+(key → package) and its .ts4script module table (module → archive), so a
+crash points at a handful of suspects instead of a 50/50 bisection.
+"""
+
+import html
+import json
+import re
+from pathlib import Path
+
+from .mf_index_cache import TGIIndex
+from .mf_restypes import type_name
+from .mf_ts4script import module_name
+
+CRASH_LOG_PATTERNS = ["lastException*.txt", "lastUIException*.txt", "lastCrash*.txt"]
+
+_HEX_ID = re.compile(r"\b0x([0-9A-Fa-f]{8,16})\b")
+_DECIMAL_ID = re.compile(r"\b(?:id|instance|guid|guid64|tuning_id)\s*[=:]?\s*\(?(\d{6,20})\b", re.IGNORECASE)
+# Creator-prefixed tuning names, e.g. "creator:Buff_Happy"
+_TUNING_NAME = re.compile(r"(?<![\w\\/])([A-Za-z][\w]{1,40}:[A-Za-z][\w]{2,120})\b")
+_SCRIPT_PATH = re.compile(r"File \"([^\"]+\.pyc?)\"")
+
+# Traceback frames from the game's own scripts are never a mod's fault
+_GAME_SCRIPT_MARKERS = ("gameplay/scripts/", "/core/", "/simulation/", "/base/lib/")
+
+
+# ──────────────────────────────
+# 🔎 LOG PARSING
+# ──────────────────────────────
+def fnv64(text: str) -> int:
+    """FNV-1 64-bit hash of the lower-cased name, as the game derives tuning instance IDs."""
+    h = 0xCBF29CE484222325
+    for byte in text.lower().encode("utf-8"):
+        h = (h * 0x100000001B3) & 0xFFFFFFFFFFFFFFFF
+        h ^= byte
+    return h
+
+
+def parse_crash_log(text: str) -> dict:
+    """
+    Extract resource IDs, tuning names and script module paths from a crash log.
+    Logs are XML with the traceback HTML-escaped inside, so they are scanned as text.
+    """
+    text = html.unescape(text)
+    ids = {int(m, 16) for m in _HEX_ID.findall(text)}
+    ids.update(int(m) for m in _DECIMAL_ID.findall(text))
+
+    scripts = []
+    for path in _SCRIPT_PATH.findall(text):
+        normalized = path.replace("\\", "/")
+        if any(marker in normalized.lower() for marker in _GAME_SCRIPT_MARKERS):
+            continue
+        if normalized not in scripts:
+            scripts.append(normalized)
+
+    return {
+        "ids": sorted(i for i in ids if 0 < i < (1 << 64)),
+        "tuning_names": sorted(set(_TUNING_NAME.findall(text))),
+        "scripts": scripts,
+    }
+
+
+def module_candidates(script_path: str) -> list[str]:
+    """
+    Dotted module names a traceback path could belong to, longest first.
+    Inside a .ts4script the path is exact; otherwise suffixes of at least two
+    parts are tried, since a bare module name like "utils" matches too much.
+    """
+    lowered = script_path.lower()
+    if ".ts4script/" in lowered:
+        cut = lowered.index(".ts4script/") + len(".ts4script/")
+        name = module_name(script_path[cut:])
+        return [name] if name else []
+    name = module_name(script_path.split(":", 1)[-1])
+    if not name:
+        return []
+    parts = name.split(".")
+    return [".".join(parts[i:]) for i in range(len(parts) - 1)]
+
+
+# ──────────────────────────────
+# 🧭 RESOLUTION
+# ──────────────────────────────
+def _display(mods: Path, path: Path) -> str:
+    try:
+        return path.relative_to(mods).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def resolve_findings(parsed: dict, index: TGIIndex, mods: Path) -> list[dict]:
+    """Map each extracted clue to the mod files that provide it."""
+    findings = []
+
+    for instance in parsed["ids"]:
+        hits = index.packages_with_instance(instance)
+        if hits:
+            findings.append({
+                "kind": "resource",
+                "value": f"{instance:016X}",
+                "mods": sorted({_display(mods, p) for p, _, _ in hits}),
+                "resources": sorted({type_name(t) for _, t, _ in hits}),
+            })
+
+    for name in parsed["tuning_names"]:
+        instance = fnv64(name)
+        # Tools set the high bit on IDs of custom tuning
+        hits = index.packages_with_instance(instance) or index.packages_with_instance(instance | (1 << 63))
+        if hits:
+            findings.append({
+                "kind": "tuning",
+                "value": name,
+                "mods": sorted({_display(mods, p) for p, _, _ in hits}),
+                "resources": sorted({type_name(t) for _, t, _ in hits}),
+            })
+
+    for script in parsed["scripts"]:
+        for module in module_candidates(script):
+            archives = index.archives_for_module(module)
+            if archives:
+                findings.append({
+                    "kind": "script",
+                    "value": module,
+                    "mods": sorted({_display(mods, p) for p in archives}),
+                    "resources": [script],
+                })
+                break
+
+    return findings
+
+
+def find_crash_logs(sims_dir: Path) -> list[Path]:
+    """Crash logs the game wrote into The Sims 4 folder (the parent of Mods)."""
+    sims_dir = Path(sims_dir)
+    logs = set()
+    for pattern in CRASH_LOG_PATTERNS:
+        logs.update(p for p in sims_dir.glob(pattern) if p.is_file())
+    return sorted(logs)
+
+
+def analyze_crash_logs(logs: list[Path], mods: Path, index_path: Path, output_path: Path,
+                       log_callback=print) -> list[dict]:
+    """
+    Parse `logs`, resolve their clues against the index and write a JSON report
+    (one entry per log with the suspected mods). Returns the report entries.
+    The TGI and script indexes must be up to date.
+    """
+    report = []
+    with TGIIndex(index_path) as index:
+        for log in logs:
+            try:
+                text = log.read_text(errors="ignore")
+            except OSError as e:
+                log_callback(f"⚠️ Could not read {log.name}: {e}")
+                continue
+            findings = resolve_findings(parse_crash_log(text), index, mods)
+            suspects = sorted({m for f in findings for m in f["mods"]})
+            report.append({"log": str(log), "suspects": suspects, "findings": findings})
+            if suspects:
+                log_callback(f"💥 {log.name}: suspected mods → {', '.join(suspects[:5])}"
+                             + (f" (+{len(suspects) - 5} more)" if len(suspects) > 5 else ""))
+            else:
+                log_callback(f"💥 {log.name}: no installed mod matches the IDs or scripts in this log.")
+
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+    return report
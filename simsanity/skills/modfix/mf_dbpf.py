@@ -0,0 +1,248 @@
+"""
+📦 mf_dbpf.py
+Minimal DBPF 2.x (Sims 4 .package) header and index reader.
+Reads only the 96-byte header and the index table, never the resource data,
+so a conflict scan costs a few KB of I/O per package.
+DBPFWriter builds new packages from already-stored resource bytes.
+"""
+
+import os
+import shutil
+import struct
+import tempfile
+from pathlib import Path
+from typing import NamedTuple
+
+# ──────────────────────────────
+# 📐 FORMAT CONSTANTS
+# ──────────────────────────────
+HEADER_SIZE = 96
+DBPF_MAGIC = b"DBPF"
+
+# Index flag bits: when set, the field is stored once in the index header
+# instead of once per entry.
+INDEX_CONST_TYPE = 0x1
+INDEX_CONST_GROUP = 0x2
+INDEX_CONST_INSTANCE_HI = 0x4
+
+# Compression types stored in the extended index entry
+COMPRESSION_NONE = 0x0000
+COMPRESSION_ZLIB = 0x5A42
+COMPRESSION_REFPACK = 0xFFFF
+COMPRESSION_STREAMABLE = 0xFFFE
+COMPRESSION_DELETED = 0xFFE0
+
+# Bit 31 of the stored size marks an entry that carries compression fields
+EXTENDED_SIZE_FLAG = 0x80000000
+
+# Offsets and sizes are 32-bit, so one package must stay below 4 GB
+MAX_PACKAGE_BYTES = 0xFFFFFFFF
+INDEX_MAJOR_VERSION = 3
+# type, group, instance hi, instance lo, offset, size | EXTENDED_SIZE_FLAG,
+# decompressed size, compression type, committed flag
+INDEX_ENTRY = struct.Struct("<IIIIIIIHH")
+# Index rows are kept in memory up to this size, then spooled to disk
+INDEX_SPOOL_BYTES = 4 * 1024 * 1024
+
+
+class DBPFHeader(NamedTuple):
+    major: int
+    minor: int
+    index_count: int
+    index_offset: int
+    index_size: int
+
+
+class ResourceEntry(NamedTuple):
+    """One index record: the TGI key plus where and how the resource is stored."""
+    type: int
+    group: int
+    instance: int
+    offset: int
+    file_size: int
+    mem_size: int
+    compression: int
+
+    @property
+    def key(self) -> tuple[int, int, int]:
+        return (self.type, self.group, self.instance)
+
+    @property
+    def compressed(self) -> bool:
+        return self.compression != COMPRESSION_NONE
+
+
+# ──────────────────────────────
+# 🔍 HEADER / INDEX PARSING
+# ──────────────────────────────
+def parse_header(buf) -> DBPFHeader:
+    """
+    Parse a DBPF header from the first 96 bytes of `buf`.
+    Raises ValueError if the data is not a DBPF 2.x package.
+    """
+    if len(buf) < HEADER_SIZE:
+        raise ValueError("file too small for a DBPF header")
+    if bytes(buf[0:4]) != DBPF_MAGIC:
+        raise ValueError("missing DBPF magic")
+
+    major, minor = struct.unpack_from("<II", buf, 4)
+    if major != 2:
+        raise ValueError(f"unsupported DBPF version {major}.{minor}")
+
+    index_count, short_offset, index_size = struct.unpack_from("<III", buf, 36)
+    # DBPF 2.x keeps the index position at 64; older writers only fill the one at 40
+    (index_offset,) = struct.unpack_from("<I", buf, 64)
+    index_offset = index_offset or short_offset
+    return DBPFHeader(major, minor, index_count, index_offset, index_size)
+
+
+def parse_index(buf, count: int) -> list[ResourceEntry]:
+    """
+    Parse `count` index entries from a raw index table.
+    Handles the constant-type/group/instance flags used by Sims 4 packages.
+    """
+    try:
+        return _parse_index(buf, count)
+    except struct.error as e:
+        raise ValueError(f"truncated index table: {e}") from None
+
+
+def _parse_index(buf, count: int) -> list[ResourceEntry]:
+    entries = []
+    if count == 0:
+        return entries
+
+    (flags,) = struct.unpack_from("<I", buf, 0)
+    pos = 4
+    const_type = const_group = const_inst_hi = None
+    if flags & INDEX_CONST_TYPE:
+        (const_type,) = struct.unpack_from("<I", buf, pos)
+        pos += 4
+    if flags & INDEX_CONST_GROUP:
+        (const_group,) = struct.unpack_from("<I", buf, pos)
+        pos += 4
+    if flags & INDEX_CONST_INSTANCE_HI:
+        (const_inst_hi,) = struct.unpack_from("<I", buf, pos)
+        pos += 4
+
+    for _ in range(count):
+        if const_type is None:
+            (res_type,) = struct.unpack_from("<I", buf, pos)
+            pos += 4
+        else:
+            res_type = const_type
+        if const_group is None:
+            (group,) = struct.unpack_from("<I", buf, pos)
+            pos += 4
+        else:
+            group = const_group
+        if const_inst_hi is None:
+            (inst_hi,) = struct.unpack_from("<I", buf, pos)
+            pos += 4
+        else:
+            inst_hi = const_inst_hi
+
+        inst_lo, offset, file_size, mem_size = struct.unpack_from("<IIII", buf, pos)
+        pos += 16
+
+        compression = COMPRESSION_NONE
+        if file_size & EXTENDED_SIZE_FLAG:
+            (compression,) = struct.unpack_from("<H", buf, pos)
+            pos += 4  # compression type + "committed" flag
+            file_size &= ~EXTENDED_SIZE_FLAG
+
+        entries.append(ResourceEntry(
+            res_type, group, (inst_hi << 32) | inst_lo,
+            offset, file_size, mem_size, compression,
+        ))
+    return entries
+
+
+# ──────────────────────────────
+# 📂 FILE READER
+# ──────────────────────────────
+def read_package_index(pkg_path: Path) -> list[ResourceEntry]:
+    """
+    Read the index of a .package file without touching resource data.
+    Deleted entries are skipped. Raises ValueError on malformed packages.
+    """
+    with Path(pkg_path).open("rb") as f:
+        header = parse_header(f.read(HEADER_SIZE))
+        if header.index_count == 0:
+            return []
+        f.seek(header.index_offset)
+        raw = f.read(header.index_size)
+    if len(raw) < header.index_size:
+        raise ValueError("index table runs past end of file")
+    return [e for e in parse_index(raw, header.index_count) if e.compression != COMPRESSION_DELETED]
+
+
+# ──────────────────────────────
+# ✍️ FILE WRITER
+# ──────────────────────────────
+class DBPFWriter:
+    """
+    Streams resources into a new DBPF 2.1 package.
+    Resource bytes are written as stored (compressed or not) and the index is
+    spooled to a temporary file, so memory stays flat however many resources
+    are added. The package is written to `<path>.tmp` and moved into place by
+    `close()`; leaving the `with` block on an exception discards it.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(bytes(HEADER_SIZE))
+        self._index = tempfile.SpooledTemporaryFile(max_size=INDEX_SPOOL_BYTES)
+        self.count = 0
+        self.size = HEADER_SIZE
+
+    def add(self, key: tuple[int, int, int], stored, mem_size: int,
+            compression: int = COMPRESSION_NONE) -> int:
+        """Append one resource's stored bytes and return the offset they were written at."""
+        offset = self.size
+        file_size = len(stored)
+        if offset + file_size > MAX_PACKAGE_BYTES:
+            raise ValueError(f"{self.path.name} would exceed the 4 GB package limit")
+        res_type, group, instance = key
+        self._file.write(stored)
+        self._index.write(INDEX_ENTRY.pack(
+            res_type, group, instance >> 32, instance & 0xFFFFFFFF,
+            offset, file_size | EXTENDED_SIZE_FLAG, mem_size, compression, 1,
+        ))
+        self.size += file_size
+        self.count += 1
+        return offset
+
+    def close(self) -> None:
+        """Write the index and header, then move the package into place."""
+        index_offset = self.size
+        index_size = 4 + self.count * INDEX_ENTRY.size
+        self._file.write(struct.pack("<I", 0))  # no constant type/group/instance fields
+        self._index.seek(0)
+        shutil.copyfileobj(self._index, self._file)
+        self._index.close()
+
+        header = bytearray(HEADER_SIZE)
+        struct.pack_into("<4sII", header, 0, DBPF_MAGIC, 2, 1)
+        struct.pack_into("<III", header, 36, self.count, 0, index_size)
+        struct.pack_into("<II", header, 60, INDEX_MAJOR_VERSION, index_offset)
+        self._file.seek(0)
+        self._file.write(header)
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        self._index.close()
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,333 @@
+"""
+🎮 mf_gameindex.py
+Sorted key index of the game's own packages, used to flag mods that
+override EA resources (the usual breakage after a patch).
+The index is a flat file: a 32-byte header followed by unique big-endian
+(type, group, instance) records in ascending order, 16 bytes each. It is
+memory-mapped and binary-searched, so checking a package costs a few
+page reads, not a load of several million keys.
+The index is built from a local game install when one is found, or
+imported from a user-supplied key list.
+"""
+
+import csv
+import hashlib
+import mmap
+import os
+import re
+import struct
+from pathlib import Path
+
+from colorama import Fore
+
+from . import mf_keyarray as keyarray
+from .mf_index_cache import TGIIndex, _from_sql
+from .mf_mmap import open_mapped
+from .mf_parallel import map_chunks
+from .mf_restypes import type_name
+
+np = keyarray.np
+
+GAME_INDEX_FILENAME = "ModFix_GameIndex.bin"
+
+# magic, format version, key count, fingerprint of the game files it was built from
+HEADER = struct.Struct("<4sIQ16s")
+MAGIC = b"SSGI"
+FORMAT_VERSION = 2
+# Big-endian so that byte order equals numeric (type, group, instance) order
+RECORD = struct.Struct(">IIQ")
+
+# Fingerprint stored for imported key lists: never matches a game install
+IMPORTED_FINGERPRINT = b"\0" * 16
+
+GAME_DIR_CANDIDATES = [
+    Path("C:/Program Files/EA Games/The Sims 4"),
+    Path("C:/Program Files (x86)/Origin Games/The Sims 4"),
+    Path("C:/Program Files/Origin Games/The Sims 4"),
+    Path("C:/Program Files (x86)/Steam/steamapps/common/The Sims 4"),
+    Path("C:/Program Files/Steam/steamapps/common/The Sims 4"),
+    Path("/Applications/The Sims 4.app/Contents"),
+    Path.home() / "Applications/The Sims 4.app/Contents",
+    Path.home() / ".steam/steam/steamapps/common/The Sims 4",
+]
+
+_KEY_PATTERN = re.compile(r"([0-9A-Fa-f]{8})[:\-_ ,]([0-9A-Fa-f]{8})[:\-_ ,]([0-9A-Fa-f]{16})")
+
+
+def game_index_path_for(mods: Path) -> Path:
+    """Default location: beside the other ModFix reports, outside the Mods folder."""
+    return Path(mods).parent / GAME_INDEX_FILENAME
+
+
+# ──────────────────────────────
+# 🔍 GAME INSTALL DISCOVERY
+# ──────────────────────────────
+def find_game_dir() -> Path | None:
+    """Locate the game install, honoring an optional SIMS4_GAME_FOLDER_OVERRIDE env var."""
+    override = os.getenv("SIMS4_GAME_FOLDER_OVERRIDE")
+    if override:
+        override_path = Path(override).expanduser()
+        if override_path.is_dir():
+            return override_path
+        print(f"{Fore.YELLOW}⚠️ SIMS4_GAME_FOLDER_OVERRIDE does not exist: {override_path}{Fore.RESET}")
+
+    for candidate in GAME_DIR_CANDIDATES:
+        if (candidate / "Data").is_dir():
+            return candidate
+    return None
+
+
+def game_packages(game_dir: Path) -> list[Path]:
+    """Every package of the base game and installed packs, in a stable order."""
+    return sorted(Path(game_dir).rglob("*.package"))
+
+
+def source_fingerprint(packages: list[Path]) -> bytes:
+    """Digest of the game packages' paths, sizes and mtimes; changes when a patch lands."""
+    h = hashlib.blake2b(digest_size=16)
+    for pkg in packages:
+        try:
+            st = pkg.stat()
+        except OSError:
+            continue
+        h.update(f"{pkg}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.digest()
+
+
+# ──────────────────────────────
+# 🏗️ BUILDING
+# ──────────────────────────────
+def _read_packed_keys_chunk(paths: list[str]) -> list[tuple[str, bytes, str | None]]:
+    """Pool worker: (path, packed big-endian keys, error or None) per package."""
+    results = []
+    for path in paths:
+        try:
+            with open_mapped(Path(path)) as pkg:
+                packed = b"".join(RECORD.pack(*entry.key) for entry in pkg.index())
+            results.append((path, packed, None))
+        except Exception as e:
+            results.append((path, b"", str(e)))
+    return results
+
+
+def _sorted_unique(packed: bytearray) -> bytes:
+    """Sort fixed-size records and drop duplicates."""
+    size = RECORD.size
+    if np is not None:
+        # Fixed-width byte strings compare like the big-endian keys they hold
+        records = np.unique(np.frombuffer(bytes(packed), dtype=f"S{size}"))
+        return b"".join(r.ljust(size, b"\0") for r in records.tolist()) if records.size else b""
+    return b"".join(sorted({bytes(packed[i:i + size]) for i in range(0, len(packed), size)}))
+
+
+def write_game_index(records: bytes, output_path: Path, source_fp: bytes) -> int:
+    """Write sorted unique records atomically and return the key count."""
+    output_path = Path(output_path)
+    count = len(records) // RECORD.size
+    tmp_path = output_path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, count, source_fp))
+        f.write(records)
+    # Drop a mapping of the old file first, or the replace fails on Windows
+    release_game_index(output_path)
+    os.replace(tmp_path, output_path)
+    return count
+
+
+def build_game_index(game_dir: Path, output_path: Path, log_callback=print,
+                     workers: int = 1, chunk_size: int = 16) -> int:
+    """Read the index of every game package and write the sorted key file."""
+    packages = game_packages(game_dir)
+    log_callback(f"🎮 Indexing {len(packages)} game packages in {game_dir}...")
+    packed = bytearray()
+    for i, (path, keys, error) in enumerate(
+        map_chunks(_read_packed_keys_chunk, [str(p) for p in packages], workers, chunk_size), 1
+    ):
+        if error:
+            log_callback(f"⚠️ Error reading game package {Path(path).name}: {error}")
+        packed += keys
+        if i % 50 == 0 or i == len(packages):
+            log_callback(f"🎮 Read {i}/{len(packages)} game packages...")
+
+    count = write_game_index(_sorted_unique(packed), output_path, source_fingerprint(packages))
+    log_callback(f"🎮 Game index holds {count} unique resource keys: {output_path}")
+    return count
+
+
+def import_key_list(source: Path, output_path: Path, log_callback=print) -> int:
+    """
+    Convert a user-supplied key list into a game index. Accepts an existing
+    index file (copied after validation) or text with one hex
+    TTTTTTTT:GGGGGGGG:IIIIIIIIIIIIIIII key per line, as exported by package tools.
+    """
+    source = Path(source)
+    with open(source, "rb") as f:
+        head = f.read(HEADER.size)
+    if head[:4] == MAGIC:
+        with GameIndex(source) as imported:
+            records = imported.records()
+        count = write_game_index(records, output_path, IMPORTED_FINGERPRINT)
+    else:
+        packed = bytearray()
+        with open(source, "r", errors="ignore") as f:
+            for line in f:
+                match = _KEY_PATTERN.search(line)
+                if match:
+                    packed += RECORD.pack(*(int(part, 16) for part in match.groups()))
+        count = write_game_index(_sorted_unique(packed), output_path, IMPORTED_FINGERPRINT)
+    log_callback(f"🎮 Imported {count} game resource keys from {source.name}.")
+    return count
+
+
+# ──────────────────────────────
+# 🔎 LOOKUPS
+# ──────────────────────────────
+class GameIndex:
+    """Memory-mapped, binary-searchable view of a game index file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._array = None
+        self._map = None
+        self._file = open(self.path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, self.count, self.source_fp = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"{self.path.name} is not a ModFix game index")
+            if HEADER.size + self.count * RECORD.size > len(self._map):
+                raise ValueError(f"{self.path.name} is truncated")
+        except (ValueError, struct.error):
+            self.close()
+            raise
+        if np is not None:
+            self._array = np.frombuffer(self._map, dtype=f"S{RECORD.size}", count=self.count, offset=HEADER.size)
+
+    def close(self) -> None:
+        # The NumPy view must be dropped before the mapping can close
+        self._array = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def records(self) -> bytes:
+        """All packed records, e.g. to copy an imported index."""
+        return self._map[HEADER.size:HEADER.size + self.count * RECORD.size]
+
+    def _record(self, pos: int) -> bytes:
+        start = HEADER.size + pos * RECORD.size
+        return self._map[start:start + RECORD.size]
+
+    def __contains__(self, key: tuple[int, int, int]) -> bool:
+        target = RECORD.pack(*key)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._record(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo < self.count and self._record(lo) == target
+
+    def overridden(self, keys) -> list[tuple[int, int, int]]:
+        """Return the subset of `keys` that the game itself provides, in sorted order."""
+        keys = sorted(keys)
+        if not keys or self.count == 0:
+            return []
+        if self._array is None:
+            return [key for key in keys if key in self]
+        queries = np.array([RECORD.pack(*key) for key in keys], dtype=f"S{RECORD.size}")
+        pos = np.searchsorted(self._array, queries)
+        pos[pos >= self.count] = 0
+        hits = self._array[pos] == queries
+        return [key for key, hit in zip(keys, hits.tolist()) if hit]
+
+
+_OPEN_INDEXES: dict[str, GameIndex] = {}
+
+
+def load_game_index(path: Path) -> GameIndex | None:
+    """Shared, lazily opened game index, or None when the file is missing or invalid."""
+    key = str(path)
+    index = _OPEN_INDEXES.get(key)
+    if index is None:
+        if not Path(path).exists():
+            return None
+        try:
+            index = _OPEN_INDEXES[key] = GameIndex(path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"⚠️ Ignoring game index {path}: {e}")
+            return None
+    return index
+
+
+def release_game_index(path: Path) -> None:
+    index = _OPEN_INDEXES.pop(str(path), None)
+    if index is not None:
+        index.close()
+
+
+def ensure_game_index(mods: Path, log_callback=print, workers: int = 1) -> GameIndex | None:
+    """
+    Return the game index for `mods`, (re)building it first when a game
+    install is found and its packages changed since the last build.
+    Without an install, an existing (e.g. imported) index is used as is.
+    """
+    path = game_index_path_for(mods)
+    game_dir = find_game_dir()
+    if game_dir is not None:
+        fp = source_fingerprint(game_packages(game_dir))
+        current = load_game_index(path)
+        if current is None or current.source_fp != fp:
+            build_game_index(game_dir, path, log_callback, workers)
+    elif not path.exists():
+        log_callback("🎮 Game install not found and no game index supplied; EA overrides are not checked.")
+    return load_game_index(path)
+
+
+# ──────────────────────────────
+# 🛠️ OVERRIDE REPORT
+# ──────────────────────────────
+def write_game_overrides(index_path: Path, game_index: GameIndex, mods: Path, output_path: Path,
+                         log_callback=print) -> int:
+    """
+    Check every package in the TGI index against the game index and write one
+    CSV row per overridden EA resource. Returns the number of overriding packages.
+    """
+    packages = 0
+    with TGIIndex(index_path) as index, open(output_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["package", "type", "group", "instance", "resource"])
+        for package_id, path in index.conn.execute("SELECT id, path FROM packages ORDER BY path").fetchall():
+            keys = [
+                (t, g, _from_sql(i))
+                for t, g, i in index.conn.execute(
+                    "SELECT type, grp, instance FROM resources WHERE package_id = ?", (package_id,)
+                )
+            ]
+            hits = game_index.overridden(keys)
+            if not hits:
+                continue
+            try:
+                name = Path(path).relative_to(mods).as_posix()
+            except ValueError:
+                name = path
+            for t, g, i in hits:
+                writer.writerow([name, f"{t:08X}", f"{g:08X}", f"{i:016X}", type_name(t)])
+            packages += 1
+
+    if packages:
+        log_callback(f"🎮 {packages} packages override EA game resources. Results saved to {output_path}")
+    else:
+        log_callback("🎮 No mod overrides an EA game resource.")
+    return packages
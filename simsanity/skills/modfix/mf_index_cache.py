@@ -0,0 +1,434 @@
+"""
+🗄️ mf_index_cache.py
+Persistent, incremental TGI index for the Mods folder.
+Each package's resource keys are stored in SQLite next to the ModFix reports,
+together with the size, mtime and inode they were read from. Re-runs only
+re-parse packages that are new or changed and drop rows for deleted ones.
+The keys each resource references (see mf_refs) are stored alongside, so
+the reference graph follows the same incremental updates, and so are the
+Python modules, imports and inspection report of each .ts4script archive
+(see mf_ts4script).
+"""
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+from .mf_dbpf import ResourceEntry
+
+INDEX_FILENAME = "ModFix_Index.sqlite"
+# Bump when a change needs every package re-parsed (e.g. a new per-package table)
+SCHEMA_VERSION = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS packages (
+    id       INTEGER PRIMARY KEY,
+    path     TEXT UNIQUE NOT NULL,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode    INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS resources (
+    package_id  INTEGER NOT NULL REFERENCES packages(id) ON DELETE CASCADE,
+    type        INTEGER NOT NULL,
+    grp         INTEGER NOT NULL,
+    instance    INTEGER NOT NULL,
+    offset      INTEGER NOT NULL,
+    file_size   INTEGER NOT NULL,
+    mem_size    INTEGER NOT NULL,
+    compression INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_resources_key ON resources(type, grp, instance);
+CREATE INDEX IF NOT EXISTS idx_resources_package ON resources(package_id);
+CREATE INDEX IF NOT EXISTS idx_resources_instance ON resources(instance);
+CREATE TABLE IF NOT EXISTS resource_hashes (
+    package_id INTEGER NOT NULL REFERENCES packages(id) ON DELETE CASCADE,
+    type       INTEGER NOT NULL,
+    grp        INTEGER NOT NULL,
+    instance   INTEGER NOT NULL,
+    digest     BLOB NOT NULL,
+    PRIMARY KEY (package_id, type, grp, instance)
+);
+CREATE TABLE IF NOT EXISTS resource_refs (
+    package_id   INTEGER NOT NULL REFERENCES packages(id) ON DELETE CASCADE,
+    src_type     INTEGER NOT NULL,
+    src_grp      INTEGER NOT NULL,
+    src_instance INTEGER NOT NULL,
+    ref_type     INTEGER NOT NULL,
+    ref_grp      INTEGER NOT NULL,
+    ref_instance INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_refs_package ON resource_refs(package_id);
+CREATE TABLE IF NOT EXISTS script_archives (
+    id       INTEGER PRIMARY KEY,
+    path     TEXT UNIQUE NOT NULL,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode    INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS script_modules (
+    archive_id INTEGER NOT NULL REFERENCES script_archives(id) ON DELETE CASCADE,
+    module     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_script_modules_module ON script_modules(module);
+CREATE INDEX IF NOT EXISTS idx_script_modules_archive ON script_modules(archive_id);
+CREATE TABLE IF NOT EXISTS script_imports (
+    archive_id INTEGER NOT NULL REFERENCES script_archives(id) ON DELETE CASCADE,
+    module     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_script_imports_archive ON script_imports(archive_id);
+CREATE TABLE IF NOT EXISTS script_reports (
+    archive_id INTEGER PRIMARY KEY REFERENCES script_archives(id) ON DELETE CASCADE,
+    report     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS validation (
+    path     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode    INTEGER NOT NULL,
+    deep     INTEGER NOT NULL,
+    problems TEXT NOT NULL
+);
+"""
+
+
+def index_path_for(mods: Path) -> Path:
+    """Default index location: beside ModFix_Conflicts.json, outside the Mods folder."""
+    return Path(mods).parent / INDEX_FILENAME
+
+
+# SQLite integers are signed 64-bit; instance IDs use the full unsigned range.
+def _to_sql(value: int) -> int:
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _from_sql(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def fingerprint(stat_result: os.stat_result) -> tuple[int, int, int]:
+    """(size, mtime_ns, inode) used to decide whether a cached row is still valid."""
+    return (stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino)
+
+
+# ──────────────────────────────
+# 🗄️ INDEX
+# ──────────────────────────────
+class TGIIndex:
+    """SQLite-backed package → resource key index."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            # Rows written by an older version lack newer per-package data
+            with self.conn:
+                self.conn.execute("DELETE FROM packages")
+                self.conn.execute("DELETE FROM script_archives")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ──────────────────────────────
+    # 🔄 INCREMENTAL SYNC
+    # ──────────────────────────────
+    def stale(self, files: list[Path], table: str = "packages",
+              fingerprints: dict[str, tuple] | None = None,
+              prune: bool = True) -> tuple[list[tuple[Path, tuple]], int]:
+        """
+        Compare `files` with the stored fingerprints in `table`
+        ("packages" or "script_archives").
+        Fingerprints already taken by a walk (see mf_walker) are used as given;
+        other files are stat'ed.
+        With `prune`, rows for files no longer in `files` are deleted; without
+        it `files` may be just the changed part of the library (see mf_watch).
+        Returns ([(path, fingerprint), ...] needing a re-parse, number removed).
+        """
+        fingerprints = fingerprints or {}
+        known = {
+            path: (size, mtime_ns, inode)
+            for path, size, mtime_ns, inode in self.conn.execute(
+                f"SELECT path, size, mtime_ns, inode FROM {table}"
+            )
+        }
+        stale = []
+        seen = set()
+        for file in files:
+            key = str(file)
+            seen.add(key)
+            fp = fingerprints.get(key)
+            if fp is None:
+                try:
+                    fp = fingerprint(os.stat(key))
+                except OSError:
+                    continue
+            if known.get(key) != fp:
+                stale.append((file, fp))
+
+        gone = [(path,) for path in known if path not in seen] if prune else []
+        if gone:
+            self.conn.executemany(f"DELETE FROM {table} WHERE path = ?", gone)
+            self.conn.commit()
+        return stale, len(gone)
+
+    def forget(self, paths: list[str]) -> None:
+        """Drop every cached row for files that were deleted."""
+        with self.conn:
+            for table in ("packages", "script_archives", "validation"):
+                self.conn.executemany(f"DELETE FROM {table} WHERE path = ?", [(str(p),) for p in paths])
+
+    def rename(self, moves: list[tuple[str, str]]) -> None:
+        """
+        Carry cached rows over to the new path of moved files (see mf_manifest),
+        so a file that was only moved or renamed is not parsed or validated again.
+        """
+        with self.conn:
+            for table in ("packages", "script_archives", "validation"):
+                for old, new in moves:
+                    self.conn.execute(f"DELETE FROM {table} WHERE path = ?", (new,))
+                    self.conn.execute(f"UPDATE {table} SET path = ? WHERE path = ?", (new, old))
+
+    def store(self, path: Path, fp: tuple[int, int, int], entries: list[ResourceEntry],
+              refs: list[tuple] = ()) -> None:
+        """
+        Replace the stored rows for one package.
+        `refs` holds (src type, src group, src instance, ref type, ref group, ref instance) rows.
+        """
+        key = str(path)
+        with self.conn:
+            self.conn.execute("DELETE FROM packages WHERE path = ?", (key,))
+            cur = self.conn.execute(
+                "INSERT INTO packages (path, size, mtime_ns, inode) VALUES (?, ?, ?, ?)",
+                (key, *fp),
+            )
+            package_id = cur.lastrowid
+            self.conn.executemany(
+                "INSERT INTO resources VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (package_id, e.type, e.group, _to_sql(e.instance),
+                     e.offset, e.file_size, e.mem_size, e.compression)
+                    for e in entries
+                ],
+            )
+            self.conn.executemany(
+                "INSERT INTO resource_refs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (package_id, st, sg, _to_sql(si), rt, rg, _to_sql(ri))
+                    for st, sg, si, rt, rg, ri in refs
+                ],
+            )
+
+    def store_script(self, path: Path, fp: tuple[int, int, int], modules: list[str],
+                     report: dict | None = None, imports: list[str] = ()) -> None:
+        """Replace the stored modules, imports and inspection report for one .ts4script archive."""
+        key = str(path)
+        with self.conn:
+            self.conn.execute("DELETE FROM script_archives WHERE path = ?", (key,))
+            cur = self.conn.execute(
+                "INSERT INTO script_archives (path, size, mtime_ns, inode) VALUES (?, ?, ?, ?)",
+                (key, *fp),
+            )
+            self.conn.executemany(
+                "INSERT INTO script_modules VALUES (?, ?)",
+                [(cur.lastrowid, module) for module in modules],
+            )
+            self.conn.executemany(
+                "INSERT INTO script_imports VALUES (?, ?)",
+                [(cur.lastrowid, module) for module in imports],
+            )
+            if report is not None:
+                self.conn.execute(
+                    "INSERT INTO script_reports VALUES (?, ?)", (cur.lastrowid, json.dumps(report))
+                )
+
+    # ──────────────────────────────
+    # 🔎 QUERIES
+    # ──────────────────────────────
+    def keys_for(self, path: Path) -> set[tuple[int, int, int]]:
+        """Return the stored (type, group, instance) keys of one package."""
+        rows = self.conn.execute(
+            "SELECT r.type, r.grp, r.instance "
+            "FROM resources r JOIN packages p ON p.id = r.package_id WHERE p.path = ?",
+            (str(path),),
+        )
+        return {(t, g, _from_sql(i)) for t, g, i in rows}
+
+    def entry_for(self, path: Path, key: tuple[int, int, int]) -> tuple[int, ResourceEntry] | None:
+        """Return (package id, entry) for one resource key of a package, or None."""
+        res_type, group, instance = key
+        row = self.conn.execute(
+            "SELECT p.id, r.offset, r.file_size, r.mem_size, r.compression "
+            "FROM resources r JOIN packages p ON p.id = r.package_id "
+            "WHERE p.path = ? AND r.type = ? AND r.grp = ? AND r.instance = ?",
+            (str(path), res_type, group, _to_sql(instance)),
+        ).fetchone()
+        if row is None:
+            return None
+        package_id, offset, file_size, mem_size, compression = row
+        return package_id, ResourceEntry(res_type, group, instance, offset, file_size, mem_size, compression)
+
+    def cached_digest(self, package_id: int, key: tuple[int, int, int]) -> bytes | None:
+        res_type, group, instance = key
+        row = self.conn.execute(
+            "SELECT digest FROM resource_hashes WHERE package_id = ? AND type = ? AND grp = ? AND instance = ?",
+            (package_id, res_type, group, _to_sql(instance)),
+        ).fetchone()
+        return row[0] if row else None
+
+    def store_digest(self, package_id: int, key: tuple[int, int, int], digest: bytes) -> None:
+        res_type, group, instance = key
+        self.conn.execute(
+            "INSERT OR REPLACE INTO resource_hashes VALUES (?, ?, ?, ?, ?)",
+            (package_id, res_type, group, _to_sql(instance), digest),
+        )
+
+    def entries_for(self, path: Path) -> list[ResourceEntry]:
+        """Return the stored index entries of one package."""
+        rows = self.conn.execute(
+            "SELECT r.type, r.grp, r.instance, r.offset, r.file_size, r.mem_size, r.compression "
+            "FROM resources r JOIN packages p ON p.id = r.package_id WHERE p.path = ?",
+            (str(path),),
+        )
+        return [
+            ResourceEntry(t, g, _from_sql(i), off, fs, ms, comp)
+            for t, g, i, off, fs, ms, comp in rows
+        ]
+
+    def dangling_refs(self):
+        """
+        Yield (package path, source key, referenced key) for every stored
+        reference whose target no indexed package provides, in one indexed join.
+        """
+        rows = self.conn.execute(
+            "SELECT p.path, rr.src_type, rr.src_grp, rr.src_instance, "
+            "       rr.ref_type, rr.ref_grp, rr.ref_instance "
+            "FROM resource_refs rr "
+            "JOIN packages p ON p.id = rr.package_id "
+            "LEFT JOIN resources r "
+            "  ON r.type = rr.ref_type AND r.grp = rr.ref_grp AND r.instance = rr.ref_instance "
+            "WHERE r.package_id IS NULL "
+            "ORDER BY p.path"
+        )
+        for path, st, sg, si, rt, rg, ri in rows:
+            yield Path(path), (st, sg, _from_sql(si)), (rt, rg, _from_sql(ri))
+
+    def sharing_packages(self, path: Path) -> dict[Path, int]:
+        """Return {other package: number of resource keys it shares with `path`}."""
+        rows = self.conn.execute(
+            "SELECT p2.path, COUNT(*) FROM packages p "
+            "JOIN resources r ON r.package_id = p.id "
+            "JOIN resources r2 ON r2.type = r.type AND r2.grp = r.grp AND r2.instance = r.instance "
+            "  AND r2.package_id != r.package_id "
+            "JOIN packages p2 ON p2.id = r2.package_id "
+            "WHERE p.path = ? GROUP BY p2.path",
+            (str(path),),
+        )
+        return {Path(other): count for other, count in rows}
+
+    def packages_with_instance(self, instance: int) -> list[tuple[Path, int, int]]:
+        """Return (package path, type, group) for every resource with this instance ID."""
+        rows = self.conn.execute(
+            "SELECT p.path, r.type, r.grp "
+            "FROM resources r JOIN packages p ON p.id = r.package_id WHERE r.instance = ?",
+            (_to_sql(instance),),
+        )
+        return [(Path(path), t, g) for path, t, g in rows]
+
+    def archives_for_module(self, module: str) -> list[Path]:
+        """Return the .ts4script archives that contain the dotted module name."""
+        rows = self.conn.execute(
+            "SELECT a.path FROM script_modules m JOIN script_archives a ON a.id = m.archive_id "
+            "WHERE m.module = ?",
+            (module,),
+        )
+        return [Path(path) for path, in rows]
+
+    def shared_script_packages(self):
+        """
+        Yield (top-level package, module, archive path) for every module whose
+        top-level package is shipped by more than one .ts4script archive,
+        ordered by package so each collision arrives as one run of rows.
+        """
+        top = "CASE WHEN instr(module, '.') THEN substr(module, 1, instr(module, '.') - 1) ELSE module END"
+        rows = self.conn.execute(
+            f"SELECT {top} AS top, m.module, a.path "
+            "FROM script_modules m JOIN script_archives a ON a.id = m.archive_id "
+            f"WHERE {top} IN (SELECT {top} FROM script_modules "
+            f"                GROUP BY 1 HAVING COUNT(DISTINCT archive_id) > 1) "
+            "ORDER BY top, a.path"
+        )
+        for package, module, path in rows:
+            yield package, module, Path(path)
+
+    def script_modules(self) -> dict[Path, set[str]]:
+        """Return {archive path: modules it contains} for every indexed .ts4script."""
+        modules: dict[Path, set[str]] = {}
+        for path, in self.conn.execute("SELECT path FROM script_archives"):
+            modules[Path(path)] = set()
+        rows = self.conn.execute(
+            "SELECT a.path, m.module FROM script_modules m JOIN script_archives a ON a.id = m.archive_id"
+        )
+        for path, module in rows:
+            modules[Path(path)].add(module)
+        return modules
+
+    def script_imports(self) -> dict[Path, set[str]]:
+        """Return {archive path: absolute imports found in its bytecode}."""
+        imports: dict[Path, set[str]] = {}
+        rows = self.conn.execute(
+            "SELECT a.path, i.module FROM script_imports i JOIN script_archives a ON a.id = i.archive_id"
+        )
+        for path, module in rows:
+            imports.setdefault(Path(path), set()).add(module)
+        return imports
+
+    def script_reports(self) -> dict[Path, dict]:
+        """Return {archive path: inspection report} for every indexed .ts4script."""
+        rows = self.conn.execute(
+            "SELECT a.path, r.report FROM script_reports r JOIN script_archives a ON a.id = r.archive_id"
+        )
+        return {Path(path): json.loads(report) for path, report in rows}
+
+    # ──────────────────────────────
+    # 🩺 VALIDATION RESULTS
+    # ──────────────────────────────
+    def validation_results(self, files: list[Path], prune: bool = True) -> dict[str, tuple[tuple, bool, list[str]]]:
+        """
+        Return {path: (fingerprint, deep, problems)} of cached checks for `files`.
+        With `prune`, results for files no longer in `files` are deleted.
+        """
+        wanted = {str(file) for file in files}
+        cached, gone = {}, []
+        for path, size, mtime_ns, inode, deep, problems in self.conn.execute(
+            "SELECT path, size, mtime_ns, inode, deep, problems FROM validation"
+        ):
+            if path in wanted:
+                cached[path] = ((size, mtime_ns, inode), bool(deep), json.loads(problems))
+            elif prune:
+                gone.append((path,))
+        if gone:
+            with self.conn:
+                self.conn.executemany("DELETE FROM validation WHERE path = ?", gone)
+        return cached
+
+    def store_validation(self, rows: list[tuple[str, tuple, bool, list[str]]]) -> None:
+        """Store (path, fingerprint, deep, problems) check results."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO validation VALUES (?, ?, ?, ?, ?, ?)",
+                [(path, *fp, int(deep), json.dumps(problems)) for path, fp, deep, problems in rows],
+            )
@@ -12,26 +12,30 @@ import json
 import csv
 
 from .mf_sorter import category_for  # helper that categorizes mods
+from .mf_walker import MOD_EXTENSIONS, ModsTree, walk_mods
+
+
+def _inventory_entry(mods: Path, record) -> dict:
+    """Inventory fields for one walked file; sizes and dates come from the walk, not a stat."""
+    name = Path(record.path).name
+    return {
+        "name": name,
+        "path": str(Path(record.path).relative_to(mods)),
+        "size_kb": round(record.size / 1024, 2),
+        "category": category_for(name),
+        "added": datetime.fromtimestamp(record.mtime_ns / 1e9).isoformat(),
+    }
 
 # ──────────────────────────────
 # 📦 JSON EXPORT
 # ──────────────────────────────
-def export_mod_inventory_to_json(mods: Path, output_path: Path) -> None:
+def export_mod_inventory_to_json(mods: Path, output_path: Path, tree: ModsTree | None = None) -> None:
     """
     Scan mods directory and export mod metadata to a JSON file.
-    Each entry includes: name, path, size, category, and creation date.
+    Each entry includes: name, path, size, category, and date last written.
     """
-    inventory = []
-    for file in mods.rglob("*"):
-        if file.suffix.lower() in {".package", ".ts4script"}:
-            entry = {
-                "name": file.name,
-                "path": str(file.relative_to(mods)),
-                "size_kb": round(file.stat().st_size / 1024, 2),
-                "category": category_for(file),
-                "added": datetime.fromtimestamp(file.stat().st_ctime).isoformat()
-            }
-            inventory.append(entry)
+    tree = tree or walk_mods(mods)
+    inventory = [_inventory_entry(mods, record) for record in tree.records(*MOD_EXTENSIONS)]
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
     with open(output_path, "w") as f:
@@ -42,7 +46,7 @@ def export_mod_inventory_to_json(mods: Path, output_path: Path) -> None:
 # ──────────────────────────────
 # 📄 CSV EXPORT (MERGED WITH MODNOTES)
 # ──────────────────────────────
-def export_mod_inventory_to_csv(mods: Path, output_path: Path) -> None:
+def export_mod_inventory_to_csv(mods: Path, output_path: Path, tree: ModsTree | None = None) -> None:
     """
     Export mods list to CSV, merging ModNotes.csv (custom user descriptions and URLs).
     """
@@ -60,19 +64,13 @@ def export_mod_inventory_to_csv(mods: Path, output_path: Path) -> None:
                 }
 
     inventory = []
-    for file in mods.rglob("*"):
-        if file.suffix.lower() in {".package", ".ts4script"}:
-            note = notes.get(file.name, {})
-            entry = {
-                "name": file.name,
-                "path": str(file.relative_to(mods)),
-                "size_kb": round(file.stat().st_size / 1024, 2),
-                "category": category_for(file),
-                "added": datetime.fromtimestamp(file.stat().st_ctime).isoformat(),
-                "description": note.get("description", ""),
-                "source_url": note.get("source_url", "")
-            }
-            inventory.append(entry)
+    tree = tree or walk_mods(mods)
+    for record in tree.records(*MOD_EXTENSIONS):
+        entry = _inventory_entry(mods, record)
+        note = notes.get(entry["name"], {})
+        entry["description"] = note.get("description", "")
+        entry["source_url"] = note.get("source_url", "")
+        inventory.append(entry)
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
     with open(output_path, "w", newline='') as f:
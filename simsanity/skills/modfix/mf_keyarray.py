@@ -0,0 +1,102 @@
+"""
+🔢 mf_keyarray.py
+NumPy duplicate-key detection over packed TGI arrays.
+Keys are stored as a structured array (type u4, group u4, instance u8,
+file id u4), 20 bytes per resource instead of a dict entry per key.
+Duplicates come from one sort plus an adjacent-difference pass.
+NumPy is optional: `available()` is False when it is not installed and
+callers fall back to mf_keymerge.
+"""
+
+from typing import Iterable, NamedTuple
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+KEY_FIELDS = [("type", "<u4"), ("group", "<u4"), ("instance", "<u8"), ("file", "<u4")]
+KEY_DTYPE = np.dtype(KEY_FIELDS) if np is not None else None
+
+# Sorting needs the array plus an argsort index and a sorted copy
+SORT_OVERHEAD = 3
+
+
+def available() -> bool:
+    return np is not None
+
+
+class KeyConflicts(NamedTuple):
+    """One row per (shared key, later owner): parallel arrays of equal length."""
+    files: "np.ndarray"       # file id that conflicts
+    owners: "np.ndarray"      # file id that owned the key first
+    types: "np.ndarray"
+    groups: "np.ndarray"
+    instances: "np.ndarray"
+
+
+# ──────────────────────────────
+# 📥 BUILDER
+# ──────────────────────────────
+class KeyArrayBuilder:
+    """Accumulates keys per file into packed arrays."""
+
+    def __init__(self):
+        self._chunks = []
+        self.count = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.count * KEY_DTYPE.itemsize
+
+    def add(self, file_id: int, keys: Iterable[tuple[int, int, int]]) -> None:
+        keys = list(keys)
+        if not keys:
+            return
+        chunk = np.empty(len(keys), dtype=KEY_DTYPE)
+        chunk["type"], chunk["group"], chunk["instance"] = zip(*keys)
+        chunk["file"] = file_id
+        self._chunks.append(chunk)
+        self.count += len(chunk)
+
+    def iter_files(self):
+        """Yield (file id, keys) back out, e.g. to hand over to the spilling engine."""
+        for chunk in self._chunks:
+            yield int(chunk["file"][0]), zip(chunk["type"].tolist(), chunk["group"].tolist(),
+                                             chunk["instance"].tolist())
+
+    def build(self) -> "np.ndarray":
+        if not self._chunks:
+            return np.empty(0, dtype=KEY_DTYPE)
+        array = np.concatenate(self._chunks)
+        self._chunks = []
+        return array
+
+
+# ──────────────────────────────
+# 🔍 DUPLICATE DETECTION
+# ──────────────────────────────
+def find_conflicts(keys: "np.ndarray") -> KeyConflicts:
+    """
+    Sort by (type, group, instance, file) and compare each row with the one
+    before it. Every row that repeats the previous key is paired with the
+    lowest file id owning that key.
+    """
+    order = np.lexsort((keys["file"], keys["instance"], keys["group"], keys["type"]))
+    ordered = keys[order]
+
+    same = np.zeros(len(ordered), dtype=bool)
+    if len(ordered) > 1:
+        same[1:] = (
+            (ordered["type"][1:] == ordered["type"][:-1])
+            & (ordered["group"][1:] == ordered["group"][:-1])
+            & (ordered["instance"][1:] == ordered["instance"][:-1])
+        )
+
+    # Index of the first row of each run of equal keys
+    run_start = np.maximum.accumulate(np.where(same, 0, np.arange(len(ordered))))
+    owners = ordered["file"][run_start]
+    dup = same & (ordered["file"] != owners)
+
+    rows = ordered[dup]
+    return KeyConflicts(rows["file"], owners[dup], rows["type"], rows["group"], rows["instance"])
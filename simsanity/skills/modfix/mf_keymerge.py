@@ -0,0 +1,125 @@
+"""
+🧮 mf_keymerge.py
+Bounded-memory duplicate-key finder for conflict scans.
+(key, file id) records are buffered up to a memory ceiling, sorted and
+spilled to temporary run files, then combined with an external k-way merge.
+Memory use depends on the ceiling, not on the size of the Mods library.
+"""
+
+import heapq
+import struct
+import tempfile
+from typing import Iterable, Iterator
+
+# Big-endian so that byte order equals numeric (type, group, instance) order
+RECORD = struct.Struct(">IIQI")
+KEY_BYTES = 16
+
+# Rough in-memory cost of one buffered record (bytes object + list slot)
+BYTES_PER_BUFFERED_RECORD = 64
+
+# Runs merged at once; more runs are first merged down in passes
+MAX_MERGE_FANIN = 64
+
+READ_CHUNK_RECORDS = 4096
+
+
+class KeySpiller:
+    """
+    Collects (type, group, instance) keys per file id and yields every key
+    owned by more than one file, together with the sorted owning file ids.
+    """
+
+    def __init__(self, memory_limit_mb: int = 256, tmp_dir=None):
+        self.max_buffered = max(1024, memory_limit_mb * 1024 * 1024 // BYTES_PER_BUFFERED_RECORD)
+        self.tmp_dir = tmp_dir
+        self._buffer: list[bytes] = []
+        self._runs = []
+        self.total_records = 0
+
+    def add(self, file_id: int, keys: Iterable[tuple[int, int, int]]) -> None:
+        pack = RECORD.pack
+        before = len(self._buffer)
+        for res_type, group, instance in keys:
+            self._buffer.append(pack(res_type, group, instance, file_id))
+        self.total_records += len(self._buffer) - before
+        if len(self._buffer) >= self.max_buffered:
+            self._spill()
+
+    @property
+    def spilled_runs(self) -> int:
+        return len(self._runs)
+
+    # ──────────────────────────────
+    # 💾 RUN FILES
+    # ──────────────────────────────
+    def _spill(self) -> None:
+        self._buffer.sort()
+        run = tempfile.TemporaryFile(dir=self.tmp_dir)
+        run.write(b"".join(self._buffer))
+        run.seek(0)
+        self._runs.append(run)
+        self._buffer = []
+
+    @staticmethod
+    def _read_run(run) -> Iterator[bytes]:
+        size = RECORD.size
+        run.seek(0)
+        while True:
+            block = run.read(size * READ_CHUNK_RECORDS)
+            if not block:
+                return
+            for start in range(0, len(block), size):
+                yield block[start:start + size]
+
+    def _merge_down(self) -> None:
+        """Merge runs in groups until at most MAX_MERGE_FANIN remain."""
+        while len(self._runs) > MAX_MERGE_FANIN:
+            group, self._runs = self._runs[:MAX_MERGE_FANIN], self._runs[MAX_MERGE_FANIN:]
+            merged = tempfile.TemporaryFile(dir=self.tmp_dir)
+            batch = []
+            for record in heapq.merge(*(self._read_run(r) for r in group)):
+                batch.append(record)
+                if len(batch) >= READ_CHUNK_RECORDS:
+                    merged.write(b"".join(batch))
+                    batch = []
+            merged.write(b"".join(batch))
+            for run in group:
+                run.close()
+            self._runs.append(merged)
+
+    # ──────────────────────────────
+    # 🔀 MERGE
+    # ──────────────────────────────
+    def duplicates(self) -> Iterator[tuple[tuple[int, int, int], list[int]]]:
+        """Yield ((type, group, instance), [file ids]) for keys found in 2+ files."""
+        self._buffer.sort()
+        self._merge_down()
+        streams = [self._read_run(r) for r in self._runs] + [iter(self._buffer)]
+
+        current_key = None
+        owners: list[int] = []
+        for record in heapq.merge(*streams):
+            key = record[:KEY_BYTES]
+            if key != current_key:
+                if len(owners) > 1:
+                    yield RECORD.unpack(current_key + b"\0\0\0\0")[:3], owners
+                current_key = key
+                owners = []
+            file_id = RECORD.unpack(record)[3]
+            if not owners or owners[-1] != file_id:
+                owners.append(file_id)
+        if len(owners) > 1:
+            yield RECORD.unpack(current_key + b"\0\0\0\0")[:3], owners
+
+    def close(self) -> None:
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._buffer = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,116 @@
+"""
+🏁 mf_load_order.py
+Works out which package wins a contested resource.
+Model of the game's Mods/Resource.cfg rules:
+- packages are loaded pattern by pattern, `*.package` first, then
+  `*/*.package`, and so on down to MAX_PACKAGE_DEPTH subfolders;
+- within one depth, files load in case-insensitive path order;
+- a package nested deeper than MAX_PACKAGE_DEPTH is never loaded;
+- when two loaded packages carry the same key, the one loaded last wins.
+"""
+
+import csv
+from pathlib import Path
+
+from .mf_index_cache import TGIIndex, _from_sql
+from .mf_restypes import type_name
+
+# Default Resource.cfg loads packages up to five folders below Mods
+MAX_PACKAGE_DEPTH = 5
+# Script mods are only picked up one folder deep
+MAX_SCRIPT_DEPTH = 1
+
+
+def _relative_parts(mods: Path, path: Path) -> tuple[str, ...]:
+    try:
+        return Path(path).relative_to(mods).parts
+    except ValueError:
+        return Path(path).parts
+
+
+def _display(mods: Path, path: Path) -> str:
+    return "/".join(_relative_parts(mods, path))
+
+
+def depth_of(mods: Path, path: Path) -> int:
+    """Number of folders between Mods and the file."""
+    return len(_relative_parts(mods, path)) - 1
+
+
+def is_loaded(mods: Path, path: Path) -> bool:
+    max_depth = MAX_SCRIPT_DEPTH if Path(path).suffix.lower() == ".ts4script" else MAX_PACKAGE_DEPTH
+    return depth_of(mods, path) <= max_depth
+
+
+def load_order_key(mods: Path, path: Path) -> tuple:
+    """Sort key matching the order the game loads packages in."""
+    parts = _relative_parts(mods, path)
+    return (len(parts) - 1, tuple(p.casefold() for p in parts))
+
+
+def winners_first(mods: Path, files: list[Path]) -> list[Path]:
+    """
+    Order `files` so that, for any shared key, the package the game uses comes
+    before every package it overrides: loaded packages by descending load
+    order, then packages that are never loaded.
+    """
+    loaded = [f for f in files if is_loaded(mods, f)]
+    unloaded = [f for f in files if not is_loaded(mods, f)]
+    loaded.sort(key=lambda f: load_order_key(mods, f), reverse=True)
+    unloaded.sort(key=lambda f: load_order_key(mods, f))
+    return loaded + unloaded
+
+
+# ──────────────────────────────
+# 📋 WINNER / LOSER TABLE
+# ──────────────────────────────
+def iter_winners(index: TGIIndex, mods: Path):
+    """
+    Yield (key, winner path or None, [loser paths]) for every key carried by
+    more than one package, in a single ordered pass over the index.
+    The winner is None when none of the owners is loaded by the game.
+    """
+    rows = index.conn.execute(
+        "SELECT r.type, r.grp, r.instance, p.path "
+        "FROM resources r JOIN packages p ON p.id = r.package_id "
+        "JOIN (SELECT type, grp, instance FROM resources "
+        "      GROUP BY type, grp, instance HAVING COUNT(DISTINCT package_id) > 1) d "
+        "  ON d.type = r.type AND d.grp = r.grp AND d.instance = r.instance "
+        "ORDER BY r.type, r.grp, r.instance"
+    )
+
+    current = None
+    owners: list[Path] = []
+    for res_type, group, instance, path in rows:
+        key = (res_type, group, instance)
+        if key != current:
+            if owners:
+                yield _resolve(mods, current, owners)
+            current, owners = key, []
+        owners.append(Path(path))
+    if owners:
+        yield _resolve(mods, current, owners)
+
+
+def _resolve(mods: Path, key: tuple, owners: list[Path]):
+    ordered = winners_first(mods, owners)
+    winner = ordered[0] if is_loaded(mods, ordered[0]) else None
+    res_type, group, instance = key
+    return (res_type, group, _from_sql(instance)), winner, [p for p in ordered if p != winner]
+
+
+def write_override_table(index_path: Path, mods: Path, output_path: Path, log_callback=print) -> int:
+    """Write one CSV row per contested resource naming the winning and losing packages."""
+    rows = 0
+    with TGIIndex(index_path) as index, open(output_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["type", "group", "instance", "resource", "winner", "losers"])
+        for (res_type, group, instance), winner, losers in iter_winners(index, mods):
+            writer.writerow([
+                f"{res_type:08X}", f"{group:08X}", f"{instance:016X}", type_name(res_type),
+                _display(mods, winner) if winner else "(not loaded)",
+                ";".join(_display(mods, p) for p in losers),
+            ])
+            rows += 1
+    log_callback(f"🏁 Load-order winners for {rows} contested resources saved to {output_path}")
+    return rows
@@ -0,0 +1,109 @@
+"""
+📒 mf_manifest.py
+Remembers what the Mods folder looked like at the end of the last run.
+The manifest lists every file's path, size, mtime and inode (as walked by
+mf_walker). On the next run a single pass over the new walk sorts files
+into added, removed, modified and renamed (same inode and size under a new
+path), so stages can limit themselves to what changed.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import NamedTuple
+
+from .mf_walker import ModsTree
+
+MANIFEST_FILENAME = "ModFix_Manifest.json"
+MANIFEST_VERSION = 1
+
+
+class ManifestDiff(NamedTuple):
+    """Changes since the last manifest; paths are absolute, as walked."""
+
+    added: list[str]
+    removed: list[str]
+    modified: list[str]
+    renamed: list[tuple[str, str]]
+
+    @property
+    def unchanged(self) -> bool:
+        return not (self.added or self.removed or self.modified or self.renamed)
+
+    def changed_paths(self) -> set[str]:
+        """Files that exist now and have to be looked at again."""
+        return {*self.added, *self.modified, *(new for _, new in self.renamed)}
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.removed)} removed, "
+            f"{len(self.modified)} modified, {len(self.renamed)} moved or renamed"
+        )
+
+
+def mods_manifest_path(mods: Path) -> Path:
+    """Default location: beside the other ModFix reports, outside the Mods folder."""
+    return Path(mods).parent / MANIFEST_FILENAME
+
+
+def load_manifest(path: Path, mods: Path) -> dict[str, tuple[int, int, int]] | None:
+    """
+    Return {absolute path: (size, mtime_ns, inode)} from the last run, or None
+    when there is no usable manifest (first run, other version, other folder).
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != MANIFEST_VERSION or data.get("root") != str(mods):
+        return None
+    root = str(mods)
+    return {os.path.join(root, rel): (size, mtime_ns, inode) for rel, size, mtime_ns, inode in data["files"]}
+
+
+def save_manifest(tree: ModsTree, path: Path) -> None:
+    """Write the walked state of the folder, replacing the old manifest atomically."""
+    root = str(tree.root)
+    files = sorted(
+        [os.path.relpath(r.path, root), r.size, r.mtime_ns, r.inode] for r in tree.files
+    )
+    tmp = Path(path).with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "root": root, "files": files}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def diff_manifest(old: dict[str, tuple[int, int, int]], tree: ModsTree) -> ManifestDiff:
+    """
+    Compare the last manifest with a new walk in one pass over each.
+    A file that vanished from one path while a file with the same inode and
+    size appeared at another counts as renamed, not as removed plus added.
+    """
+    added, modified = [], []
+    seen = set()
+    for record in tree.files:
+        before = old.get(record.path)
+        if before is None:
+            added.append(record.path)
+            continue
+        seen.add(record.path)
+        if before != record.fingerprint:
+            modified.append(record.path)
+
+    gone = {}
+    for path, (size, _, inode) in old.items():
+        if path not in seen:
+            gone.setdefault((inode, size), []).append(path)
+
+    renamed, still_added = [], []
+    fingerprints = {r.path: r.fingerprint for r in tree.files} if gone else {}
+    for path in added:
+        size, _, inode = fingerprints.get(path, (None, None, None))
+        candidates = gone.get((inode, size))
+        if inode and candidates:
+            renamed.append((candidates.pop(), path))
+        else:
+            still_added.append(path)
+    removed = [path for paths in gone.values() for path in paths]
+    return ManifestDiff(sorted(still_added), sorted(removed), sorted(modified), sorted(renamed))
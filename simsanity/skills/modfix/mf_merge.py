@@ -0,0 +1,311 @@
+"""
+🧱 mf_merge.py
+Merges many small CC packages into a few large ones to cut game load time.
+Resource bytes are copied from the mapped source packages exactly as stored
+(no recompression) and the merged index is spooled to disk, so thousands of
+inputs merge in bounded memory. Every merged package gets a streamed JSON
+manifest recording where each resource came from (see mf_split).
+"""
+
+import json
+import re
+import struct
+from pathlib import Path
+
+from .mf_dbpf import DBPFWriter, MAX_PACKAGE_BYTES
+from .mf_load_order import is_loaded, load_order_key, winners_first
+from .mf_mmap import open_mapped, release_mapped
+from .mf_walker import ModsTree, walk_mods
+
+MERGED_DIRNAME = "ModFix_Merged"
+ORIGINALS_DIRNAME = "ModFix_MergedOriginals"
+MANIFEST_VERSION = 2
+
+# Large enough to matter for load time, small enough to re-split quickly
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+_PACKED_KEY = struct.Struct(">IIQ")
+
+
+def manifest_path_for(merged: Path) -> Path:
+    return Path(merged).with_suffix(".manifest.json")
+
+
+def _relative(mods: Path, path: Path) -> str:
+    try:
+        return Path(path).relative_to(mods).as_posix()
+    except ValueError:
+        return str(path)
+
+
+# ──────────────────────────────
+# 📜 STREAMED MANIFEST
+# ──────────────────────────────
+class ManifestWriter:
+    """
+    Writes {"version", "merged", "sources": [...]} one source at a time,
+    so the manifest of a huge merge never sits in memory.
+    Each source records its original path, size and mtime, the resources
+    it contributed as [type, group, instance, offset, file_size, mem_size,
+    compression] (offsets into the merged package), and the keys dropped
+    because another (winning) package provides them. A dropped key whose
+    winner is not in the same merged package carries the winner's source
+    path (relative to Mods) as a fourth element.
+    """
+
+    def __init__(self, path: Path, merged_name: str):
+        self.path = Path(path)
+        self._file = open(self.path, "w")
+        self._file.write(
+            f'{{"version": {MANIFEST_VERSION}, "merged": {json.dumps(merged_name)}, "sources": [\n'
+        )
+        self.count = 0
+
+    def add(self, record: dict) -> None:
+        if self.count:
+            self._file.write(",\n")
+        self._file.write(json.dumps(record, separators=(",", ":")))
+        self.count += 1
+
+    def close(self) -> None:
+        self._file.write("\n]}\n")
+        self._file.close()
+
+
+# ──────────────────────────────
+# 🧱 MERGING
+# ──────────────────────────────
+def _next_output(stem: Path, start: int) -> tuple[Path, int]:
+    """First `<stem>_NN.package` that does not exist yet, so earlier merges are never overwritten."""
+    number = start
+    while True:
+        candidate = stem.with_name(f"{stem.name}_{number:02d}.package")
+        if not candidate.exists():
+            return candidate, number
+        number += 1
+
+
+def _stored_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def find_losing_copies(ordered: list[Path], sources: set[Path], workers: int = 1,
+                       log_callback=print) -> dict[Path, dict[tuple, Path]]:
+    """
+    For packages `ordered` winners first, return {source: {key: winning package}}
+    for every key a package in `sources` carries but loses to another one.
+    Keys are compared with the bounded-memory duplicate finder of the conflict
+    scan, so only the losing copies of `sources` are held in memory.
+    """
+    from .mf_conflicts import find_shared_keys, iter_file_keys
+
+    losers: dict[Path, dict[tuple, Path]] = {}
+    shared = find_shared_keys(iter_file_keys(ordered, workers=workers), len(ordered), log_callback=log_callback)
+    for key, file_id, owner_id in shared:
+        if ordered[file_id] in sources:
+            losers.setdefault(ordered[file_id], {})[key] = ordered[owner_id]
+    return losers
+
+
+def merge_packages(inputs: list[Path], stem: Path, mods: Path, max_bytes: int = DEFAULT_MAX_BYTES,
+                   log_callback=print, losers: dict[Path, dict[tuple, Path]] | None = None
+                   ) -> list[tuple[Path, list[Path]]]:
+    """
+    Merge `inputs` into `<stem>_NN.package` files of at most `max_bytes`.
+    `losers` ({source: {key: winning package}}, see find_losing_copies) names
+    the copies to leave out; by default they are worked out from the input
+    order (for a key found in several inputs the first copy is kept).
+    A source is never split across merged packages, and a key is written to
+    only one of them, so the game cannot pick up a later copy.
+    If anything fails, the merged packages written so far are removed again.
+    Returns [(merged package, [sources it contains])]; unreadable sources are left out.
+    """
+    max_bytes = min(max_bytes, MAX_PACKAGE_BYTES)
+    if losers is None:
+        losers = find_losing_copies(list(inputs), set(inputs), log_callback=lambda message: None)
+    results = []
+    writer = manifest = None
+    merged_sources: list[Path] = []
+    in_output: set[Path] = set()
+    number = 1
+
+    def finish():
+        if writer is None:
+            return
+        writer.close()
+        manifest.close()
+        results.append((writer.path, list(merged_sources)))
+        log_callback(f"🧱 {writer.path.name}: {len(merged_sources)} packages, {writer.count} resources.")
+
+    try:
+        for source in inputs:
+            # Start the next merged package rather than splitting a source across two
+            if writer is not None and writer.size + _stored_size(source) > max_bytes:
+                finish()
+                writer = manifest = None
+                merged_sources, in_output = [], set()
+
+            copying = False
+            try:
+                with open_mapped(source) as pkg:
+                    entries = pkg.index()
+                    # Check every range up front so a bad source adds nothing to the merged file
+                    for entry in entries:
+                        if entry.offset + entry.file_size > pkg.size:
+                            raise ValueError(f"resource {entry.type:08X}:{entry.instance:016X} runs past end of file")
+
+                    if writer is None:
+                        output, number = _next_output(stem, number)
+                        writer = DBPFWriter(output)
+                        manifest = ManifestWriter(manifest_path_for(output), output.name)
+
+                    lost = losers.get(source, {})
+                    contributed, dropped = [], []
+                    copying = True
+                    for entry in entries:
+                        winner = lost.get(entry.key)
+                        if winner is not None:
+                            # The winner's own source path, or nothing when it is in this package
+                            dropped.append(list(entry.key) if winner in in_output
+                                           else [*entry.key, _relative(mods, winner)])
+                            continue
+                        with pkg.resource(entry) as stored:
+                            offset = writer.add(entry.key, stored, entry.mem_size, entry.compression)
+                        contributed.append([*entry.key, offset, entry.file_size, entry.mem_size, entry.compression])
+            except (OSError, ValueError) as e:
+                if copying:
+                    # The merged file is half-written; give it up rather than ship it
+                    raise
+                log_callback(f"⚠️ Skipping {source.name}: {e}")
+                continue
+
+            st = source.stat()
+            manifest.add({
+                "source": _relative(mods, source),
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "resources": contributed,
+                "dropped": dropped,
+            })
+            merged_sources.append(source)
+            in_output.add(source)
+        finish()
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+            manifest.close()
+            manifest.path.unlink(missing_ok=True)
+        # The originals have not moved yet, so finished packages would load everything twice
+        for output, _ in results:
+            release_mapped(output)
+            output.unlink(missing_ok=True)
+            manifest_path_for(output).unlink(missing_ok=True)
+        raise
+    return results
+
+
+def move_originals(sources: list[Path], mods: Path, log_callback=print) -> None:
+    """Move merged sources out of Mods (keeping their folders) so they are not loaded twice."""
+    originals = Path(mods).parent / ORIGINALS_DIRNAME
+    for source in sources:
+        target = originals / _relative(mods, source)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        release_mapped(source)
+        try:
+            source.rename(target)
+        except OSError as e:
+            log_callback(f"⚠️ Could not move {source.name} out of Mods: {e}")
+
+
+def merge_by_category(mods: Path, log_callback=print, max_bytes: int = DEFAULT_MAX_BYTES,
+                      min_group: int = 2, dry_run: bool = False,
+                      tree: ModsTree | None = None) -> dict[str, list[Path]]:
+    """
+    Group loaded packages by Tiny Tagger category and merge each group into
+    Mods/ModFix_Merged/Merged_<Category>_NN.package.
+    Winners are resolved once against the load order of every loaded package,
+    merged or not: a copy that loses anywhere is left out of the merged file,
+    and a package whose winning copy would lose once moved to ModFix_Merged
+    is not merged at all. So every key keeps the copy the game was using.
+    Merged sources move to ModFix_MergedOriginals beside Mods.
+    Returns {category: [merged packages]} (planned inputs on a dry run).
+    """
+    from .mf_parallel import default_workers
+    from .tinytagger import load_tags, tag_file
+
+    mods = Path(mods)
+    merged_dir = mods / MERGED_DIRNAME
+    tags = load_tags()
+    loaded = [pkg for pkg in (tree or walk_mods(mods)).paths(".package") if is_loaded(mods, pkg)]
+    groups: dict[str, list[Path]] = {}
+    for pkg in loaded:
+        if merged_dir not in pkg.parents:
+            groups.setdefault(tag_file(_relative(mods, pkg), tags), []).append(pkg)
+    groups = {category: packages for category, packages in groups.items() if len(packages) >= min_group}
+
+    def stem_for(category: str) -> Path:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", category).strip("_") or "Misc"
+        return merged_dir / f"Merged_{slug}"
+
+    # Where each candidate would load from once merged (first free output of its category)
+    outputs_for = {category: _next_output(stem_for(category), 1)[0] for category in groups}
+    planned = {pkg: outputs_for[category] for category, packages in groups.items() for pkg in packages}
+
+    from .mf_conflicts import find_shared_keys, iter_file_keys
+    ordered = winners_first(mods, loaded)
+    log_callback(f"🧱 Resolving load-order winners across {len(ordered)} packages...")
+    shared = find_shared_keys(iter_file_keys(ordered, workers=default_workers()), len(ordered),
+                              log_callback=lambda message: None)
+    losers: dict[Path, dict[tuple, Path]] = {}
+    # A winner outlives an unmerged loser only while it loads after it; from ModFix_Merged it might not
+    pinned = set()
+    for key, file_id, owner_id in shared:
+        loser, winner = ordered[file_id], ordered[owner_id]
+        if loser in planned:
+            losers.setdefault(loser, {})[key] = winner
+        elif winner in planned and load_order_key(mods, planned[winner]) <= load_order_key(mods, loser):
+            pinned.add(winner)
+
+    # Packages left unmerged (pinned, or in a group that became too small) are losers that stay put
+    changed = True
+    while changed:
+        changed = False
+        for packages in groups.values():
+            remaining = [pkg for pkg in packages if pkg not in pinned]
+            if len(remaining) < min_group and remaining:
+                pinned.update(remaining)
+                changed = True
+        for loser in list(pinned):
+            for winner in losers.get(loser, {}).values():
+                if (winner in planned and winner not in pinned
+                        and load_order_key(mods, planned[winner]) <= load_order_key(mods, loser)):
+                    pinned.add(winner)
+                    changed = True
+    if pinned:
+        log_callback(f"📌 {len(pinned)} packages stay unmerged: merged, they would lose resources they win now.")
+
+    result = {}
+    for category, packages in sorted(groups.items()):
+        packages = [pkg for pkg in packages if pkg not in pinned]
+        if not packages:
+            continue
+        if dry_run:
+            log_callback(f"🧱 [DRY RUN] Would merge {len(packages)} {category} packages.")
+            result[category] = packages
+            continue
+
+        merged_dir.mkdir(exist_ok=True)
+        log_callback(f"🧱 Merging {len(packages)} {category} packages...")
+        try:
+            outputs = merge_packages(winners_first(mods, packages), stem_for(category), mods, max_bytes,
+                                     log_callback, losers=losers)
+        except (OSError, ValueError) as e:
+            log_callback(f"⚠️ Could not merge {category} packages, left as they were: {e}")
+            continue
+        for _, sources in outputs:
+            move_originals(sources, mods, log_callback)
+        result[category] = [output for output, _ in outputs]
+    return result
@@ -0,0 +1,173 @@
+"""
+🗺️ mf_mmap.py
+Shared memory-mapped access layer for ModFix package readers.
+Files are mapped read-only and exposed as memoryviews, so header checks,
+index parsing and resource slicing work on the mapped pages without copying.
+A package session keeps mappings open across the stages of one ModFix run.
+"""
+
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from .mf_dbpf import COMPRESSION_DELETED, HEADER_SIZE, DBPFHeader, ResourceEntry, parse_header, parse_index
+
+# ──────────────────────────────
+# 🗺️ MAPPED FILE
+# ──────────────────────────────
+class MappedFile:
+    """
+    Read-only memory map of a file.
+    `view` is a memoryview over the whole file; slices of it share the mapped
+    pages and must be released before the file is closed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = self.path.open("rb")
+        self._mmap = None
+        try:
+            st = os.fstat(self._file.fileno())
+            self.size = st.st_size
+            self.mtime_ns = st.st_mtime_ns
+            if self.size:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.view = memoryview(self._mmap)
+            else:
+                # mmap refuses empty files
+                self.view = memoryview(b"")
+        except Exception:
+            self._file.close()
+            raise
+
+    def close(self) -> None:
+        self.view.release()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # A caller still holds a slice; the map is freed once it is dropped
+                pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ──────────────────────────────
+    # 📦 DBPF HELPERS
+    # ──────────────────────────────
+    def header(self) -> DBPFHeader:
+        """Parse the DBPF header straight from the mapped pages."""
+        return parse_header(self.view[:HEADER_SIZE])
+
+    def index(self) -> list[ResourceEntry]:
+        """
+        Parse the index table in place, leaving out deleted entries (as
+        read_package_index does). Raises ValueError if it lies outside the file.
+        """
+        header = self.header()
+        if header.index_count == 0:
+            return []
+        end = header.index_offset + header.index_size
+        if end > self.size:
+            raise ValueError("index table runs past end of file")
+        with self.view[header.index_offset:end] as raw:
+            return [e for e in parse_index(raw, header.index_count) if e.compression != COMPRESSION_DELETED]
+
+    def resource(self, entry: ResourceEntry) -> memoryview:
+        """Return the stored (possibly compressed) bytes of a resource without copying."""
+        end = entry.offset + entry.file_size
+        if end > self.size:
+            raise ValueError(f"resource {entry.type:08X}:{entry.group:08X}:{entry.instance:016X} runs past end of file")
+        return self.view[entry.offset:end]
+
+
+# ──────────────────────────────
+# ♻️ PACKAGE SESSION CACHE
+# ──────────────────────────────
+class MappedPackageCache:
+    """
+    Keeps up to `max_open` mappings alive (least recently used are closed first).
+    A mapping is reopened if the file's size or mtime changed since it was mapped.
+    """
+
+    def __init__(self, max_open: int = 256):
+        self.max_open = max_open
+        self._maps: OrderedDict[str, MappedFile] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: Path) -> MappedFile:
+        key = str(path)
+        with self._lock:
+            mapped = self._maps.get(key)
+            if mapped is not None:
+                st = os.stat(key)
+                if st.st_size == mapped.size and st.st_mtime_ns == mapped.mtime_ns:
+                    self._maps.move_to_end(key)
+                    return mapped
+                self._maps.pop(key).close()
+
+            mapped = MappedFile(path)
+            self._maps[key] = mapped
+            while len(self._maps) > self.max_open:
+                _, oldest = self._maps.popitem(last=False)
+                oldest.close()
+            return mapped
+
+    def release(self, path: Path) -> None:
+        """Close the mapping for `path`, e.g. before the file is moved or deleted."""
+        with self._lock:
+            mapped = self._maps.pop(str(path), None)
+        if mapped is not None:
+            mapped.close()
+
+    def close(self) -> None:
+        with self._lock:
+            while self._maps:
+                _, mapped = self._maps.popitem()
+                mapped.close()
+
+
+_ACTIVE_CACHE: MappedPackageCache | None = None
+
+
+@contextmanager
+def package_session(max_open: int = 256):
+    """
+    Share mappings between every reader called inside the block.
+    Used by stream_handle so later stages hit pages the first stage mapped.
+    """
+    global _ACTIVE_CACHE
+    previous = _ACTIVE_CACHE
+    cache = MappedPackageCache(max_open)
+    _ACTIVE_CACHE = cache
+    try:
+        yield cache
+    finally:
+        _ACTIVE_CACHE = previous
+        cache.close()
+
+
+@contextmanager
+def open_mapped(path: Path):
+    """
+    Yield a MappedFile for `path`.
+    Inside a package session the mapping is shared and stays open afterwards.
+    """
+    if _ACTIVE_CACHE is not None:
+        yield _ACTIVE_CACHE.get(path)
+    else:
+        with MappedFile(path) as mapped:
+            yield mapped
+
+
+def release_mapped(path: Path) -> None:
+    """Drop a session mapping before moving a file (required on Windows)."""
+    if _ACTIVE_CACHE is not None:
+        _ACTIVE_CACHE.release(path)
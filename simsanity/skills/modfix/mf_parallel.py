@@ -0,0 +1,53 @@
+"""
+⚡ mf_parallel.py
+Chunked worker-pool helper shared by ModFix stages that read many files.
+Work items are grouped into chunks so each task amortises pickling and
+scheduling overhead; results are yielded in the parent as chunks finish,
+so callers can keep streaming progress to the UI.
+"""
+
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Iterator, Sequence
+
+
+def default_workers() -> int:
+    """Leave one core for the web server / UI thread."""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def chunked(items: Sequence, size: int) -> Iterator[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def map_chunks(worker: Callable[[Sequence], list], items: Sequence, workers: int = 1,
+               chunk_size: int = 64, use_threads: bool = False) -> Iterator:
+    """
+    Run `worker(chunk) -> list of results` over `items` and yield each result.
+    `workers <= 1` runs in-process. `worker` must be a module-level function
+    when processes are used. Frozen (PyInstaller) builds always use threads,
+    because spawning would relaunch the whole app.
+    """
+    chunk_size = max(1, chunk_size)
+    if workers <= 1 or len(items) <= chunk_size:
+        for chunk in chunked(items, chunk_size):
+            yield from worker(chunk)
+        return
+
+    use_threads = use_threads or getattr(sys, "frozen", False)
+    executor_cls = ThreadPoolExecutor if use_threads else ProcessPoolExecutor
+    chunks = chunked(items, chunk_size)
+    with executor_cls(max_workers=workers) as pool:
+        # Only a few chunks are in flight, and a result is dropped once yielded,
+        # so memory tracks the window rather than the whole input
+        pending = {pool.submit(worker, chunk) for chunk in islice(chunks, workers * 2)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            pending |= {pool.submit(worker, chunk) for chunk in islice(chunks, len(done))}
+            while done:
+                results = done.pop().result()
+                yield from results
+                del results
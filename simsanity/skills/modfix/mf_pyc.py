@@ -0,0 +1,192 @@
+"""
+🐍 mf_pyc.py
+Reads the imports out of compiled Python (.pyc) files without running them.
+The host Python's marshal module cannot load code objects from other Python
+versions, so this is a small standalone marshal reader for the layouts used
+by CPython 3.7 (the game's version) through 3.10. Each code object's
+bytecode is scanned for IMPORT_NAME instructions.
+"""
+
+import struct
+
+# magic (4) + bit field (4) + mtime/size or source hash (8), since 3.7 (PEP 552)
+PYC_HEADER_SIZE = 16
+
+# Versions whose marshal and opcode layouts this reader understands
+SUPPORTED_VERSIONS = ("3.7", "3.8", "3.9", "3.10")
+
+# Opcodes shared by 3.7–3.10 (wordcode: one opcode byte, one argument byte)
+LOAD_CONST = 100
+IMPORT_NAME = 108
+EXTENDED_ARG = 144
+
+# Deeper nesting than this is not produced by the compiler; treat it as damage
+MAX_DEPTH = 256
+
+_INT32 = struct.Struct("<i")
+_INT64 = struct.Struct("<q")
+_DOUBLE = struct.Struct("<d")
+
+_NULL = object()
+
+
+class Code:
+    """The parts of a code object import analysis needs."""
+
+    __slots__ = ("code", "consts", "names")
+
+    def __init__(self, code: bytes, consts: tuple, names: tuple):
+        self.code = code
+        self.consts = consts
+        self.names = names
+
+
+class _Reader:
+    """Marshal reader for one .pyc body (format version 4)."""
+
+    def __init__(self, data: bytes, version: str):
+        self.data = data
+        self.pos = 0
+        self.refs: list = []
+        # 3.8 added co_posonlyargcount ahead of co_kwonlyargcount
+        self.code_ints = 5 if version == "3.7" else 6
+
+    def _take(self, size: int) -> bytes:
+        end = self.pos + size
+        if size < 0 or end > len(self.data):
+            raise ValueError("marshal data runs past end of file")
+        chunk = self.data[self.pos:end]
+        self.pos = end
+        return chunk
+
+    def _int32(self) -> int:
+        return _INT32.unpack(self._take(4))[0]
+
+    def _byte(self) -> int:
+        return self._take(1)[0]
+
+    def read(self, depth: int = 0):
+        if depth > MAX_DEPTH:
+            raise ValueError("marshal data nested too deeply")
+        code = self._byte()
+        flag, kind = code & 0x80, chr(code & 0x7F)
+        if kind == "r":
+            index = self._int32()
+            if not 0 <= index < len(self.refs):
+                raise ValueError(f"bad marshal back-reference {index}")
+            return self.refs[index]
+        if flag:
+            # Reserve the slot first, as CPython does for containers and code objects
+            slot = len(self.refs)
+            self.refs.append(None)
+        value = self._read_value(kind, depth)
+        if flag:
+            self.refs[slot] = value
+        return value
+
+    def _read_value(self, kind: str, depth: int):
+        if kind == "0":
+            return _NULL
+        if kind == "N":
+            return None
+        if kind in "FT":
+            return kind == "T"
+        if kind in "S.":
+            return kind
+        if kind == "i":
+            return self._int32()
+        if kind == "I":
+            return _INT64.unpack(self._take(8))[0]
+        if kind == "l":
+            size = self._int32()
+            value = 0
+            for i in range(abs(size)):
+                value |= struct.unpack("<H", self._take(2))[0] << (15 * i)
+            return -value if size < 0 else value
+        if kind == "g":
+            return _DOUBLE.unpack(self._take(8))[0]
+        if kind == "y":
+            return complex(*struct.unpack("<dd", self._take(16)))
+        if kind == "f":
+            return float(self._take(self._byte()))
+        if kind == "x":
+            real = float(self._take(self._byte()))
+            return complex(real, float(self._take(self._byte())))
+        if kind == "s":
+            return self._take(self._int32())
+        if kind in "ut":
+            return self._take(self._int32()).decode("utf-8", "surrogatepass")
+        if kind in "aA":
+            return self._take(self._int32()).decode("latin-1")
+        if kind in "zZ":
+            return self._take(self._byte()).decode("latin-1")
+        if kind in "()[<>":
+            size = self._byte() if kind == ")" else self._int32()
+            if size < 0:
+                raise ValueError("negative marshal container size")
+            items = tuple(self.read(depth + 1) for _ in range(size))
+            return items if kind in "()" else list(items) if kind == "[" else frozenset()
+        if kind == "{":
+            while self.read(depth + 1) is not _NULL:
+                self.read(depth + 1)
+            return {}
+        if kind == "c":
+            self._take(4 * self.code_ints)
+            code = self.read(depth + 1)
+            consts = self.read(depth + 1)
+            names = self.read(depth + 1)
+            for _ in range(5):  # varnames, freevars, cellvars, filename, name
+                self.read(depth + 1)
+            self._take(4)  # firstlineno
+            self.read(depth + 1)  # lnotab / linetable
+            if not isinstance(code, bytes) or not isinstance(consts, tuple) or not isinstance(names, tuple):
+                raise ValueError("malformed code object")
+            return Code(code, consts, names)
+        raise ValueError(f"unknown marshal type {kind!r}")
+
+
+def _code_objects(root: Code):
+    stack = [root]
+    while stack:
+        code = stack.pop()
+        yield code
+        stack.extend(c for c in code.consts if isinstance(c, Code))
+
+
+def code_imports(root: Code) -> set[str]:
+    """Absolute module names imported anywhere in `root` or its nested code objects."""
+    imports = set()
+    for code in _code_objects(root):
+        data = code.code
+        extended = 0
+        # `import a.b` / `from a import b` compile to LOAD_CONST level, LOAD_CONST fromlist, IMPORT_NAME
+        consts_loaded = [None, None]
+        for i in range(0, len(data) - 1, 2):
+            op, arg = data[i], data[i + 1] | extended
+            extended = arg << 8 if op == EXTENDED_ARG else 0
+            if op == EXTENDED_ARG:
+                continue
+            if op == IMPORT_NAME and arg < len(code.names):
+                level = consts_loaded[0]
+                # Relative imports stay inside the mod's own package
+                if not (isinstance(level, int) and level > 0):
+                    imports.add(code.names[arg])
+            if op == LOAD_CONST and arg < len(code.consts):
+                consts_loaded = [consts_loaded[1], code.consts[arg]]
+            else:
+                consts_loaded = [consts_loaded[1], None]
+    return imports
+
+
+def pyc_imports(data: bytes, version: str) -> set[str]:
+    """
+    Module names imported by a whole .pyc file (header included) compiled
+    by Python `version`. Raises ValueError for unsupported versions or
+    damaged files.
+    """
+    if version not in SUPPORTED_VERSIONS:
+        raise ValueError(f"cannot read Python {version} bytecode")
+    root = _Reader(data[PYC_HEADER_SIZE:], version).read()
+    if not isinstance(root, Code):
+        raise ValueError("file does not hold a code object")
+    return code_imports(root)
@@ -0,0 +1,95 @@
+"""
+🗜️ mf_recompress.py
+Rewrites packages with zlib-compressed resources to shrink the Mods folder
+(and the I/O done at every game launch and ModFix scan).
+Packages are processed in a worker pool; each one is rebuilt into a temp
+file and swapped in with an atomic replace. Resources that are already
+compressed, or that would not get smaller, are copied unchanged.
+"""
+
+import zlib
+from collections import Counter
+from pathlib import Path
+
+from .mf_dbpf import COMPRESSION_NONE, COMPRESSION_ZLIB, DBPFWriter
+from .mf_mmap import open_mapped, release_mapped
+from .mf_parallel import map_chunks
+from .mf_restypes import category_of
+
+ZLIB_LEVEL = 6
+# Below this the zlib header and checksum eat any gain
+MIN_RESOURCE_BYTES = 64
+
+
+def _recompress_package(path: Path, dry_run: bool) -> Counter:
+    """Rewrite one package and return the bytes saved per resource category."""
+    saved = Counter()
+    writer = None if dry_run else DBPFWriter(path)
+    try:
+        with open_mapped(path) as pkg:
+            for entry in pkg.index():
+                with pkg.resource(entry) as stored:
+                    data = stored
+                    compression = entry.compression
+                    if compression == COMPRESSION_NONE and entry.file_size >= MIN_RESOURCE_BYTES:
+                        packed = zlib.compress(stored, ZLIB_LEVEL)
+                        if len(packed) < entry.file_size:
+                            saved[category_of(entry.type)] += entry.file_size - len(packed)
+                            data, compression = packed, COMPRESSION_ZLIB
+                    if writer is not None:
+                        writer.add(entry.key, data, entry.mem_size, compression)
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+
+    if writer is not None:
+        if saved:
+            # The original must not be mapped while it is replaced (Windows)
+            release_mapped(path)
+            writer.close()
+        else:
+            writer.abort()
+    return saved
+
+
+def _recompress_chunk(paths: list[str], dry_run: bool = False) -> list[tuple[str, dict, str | None]]:
+    """Pool worker: (path, {category: bytes saved}, error or None) per package."""
+    results = []
+    for path in paths:
+        try:
+            results.append((path, dict(_recompress_package(Path(path), dry_run)), None))
+        except Exception as e:
+            results.append((path, {}, str(e)))
+    return results
+
+
+def _estimate_chunk(paths: list[str]) -> list[tuple[str, dict, str | None]]:
+    return _recompress_chunk(paths, dry_run=True)
+
+
+def recompress_packages(packages: list[Path], log_callback=print, workers: int = 1,
+                        chunk_size: int = 16, dry_run: bool = False) -> Counter:
+    """
+    Recompress `packages` and return the total bytes saved per category.
+    With `dry_run` nothing is written and the savings are only estimated.
+    """
+    worker = _estimate_chunk if dry_run else _recompress_chunk
+    totals = Counter()
+    changed = 0
+    for i, (path, saved, error) in enumerate(
+        map_chunks(worker, [str(p) for p in packages], workers, chunk_size), 1
+    ):
+        if error:
+            log_callback(f"⚠️ Could not recompress {Path(path).name}: {error}")
+        elif saved:
+            changed += 1
+            totals.update(saved)
+        if i % 100 == 0 or i == len(packages):
+            log_callback(f"🗜️ Processed {i}/{len(packages)} packages...")
+
+    verb = "Would save" if dry_run else "Saved"
+    log_callback(f"🗜️ {verb} {sum(totals.values()) / (1024 * 1024):.1f} MB in {changed} packages.")
+    for category, saved in totals.most_common():
+        log_callback(f"   {category}: {saved / (1024 * 1024):.1f} MB")
+    return totals
@@ -0,0 +1,144 @@
+"""
+🔗 mf_refs.py
+Cross-package reference graph.
+CAS parts and RCOL resources (models, LODs, slots) carry lists of the keys
+they point at: meshes, textures, region maps. When the package providing
+those keys is missing the game shows invisible or broken items. References
+are extracted while a package is indexed and stored in the TGI index, so
+dangling ones can be listed with a single join against the known resources.
+"""
+
+import csv
+import struct
+from pathlib import Path
+
+from .mf_compression import ResourceReader
+from .mf_dbpf import ResourceEntry
+from .mf_index_cache import TGIIndex
+from .mf_restypes import type_name
+
+TYPE_CASP = 0x034AEECB
+RCOL_TYPES = {
+    0x01661233,  # Model
+    0x01D10F34,  # Model LOD
+    0xD3044521,  # Slot
+}
+
+# Guards against misreading an unknown layout as a huge reference list
+MAX_REFERENCES = 4096
+
+# u64 instance followed by type and group (RCOL) or group and type (CAS part)
+_KEY_RECORD = struct.Struct("<QII")
+
+
+# ──────────────────────────────
+# 🧩 PAYLOAD PARSERS
+# ──────────────────────────────
+def casp_references(payload) -> list[tuple[int, int, int]]:
+    """
+    Keys listed in a CAS part's TGI block.
+    Layout: u32 version, u32 offset of the block (relative to byte 8),
+    ..., then at the block a u8 count and `count` instance/group/type records.
+    """
+    _, tgi_offset = struct.unpack_from("<II", payload, 0)
+    pos = tgi_offset + 8
+    count = payload[pos]
+    pos += 1
+    if pos + count * _KEY_RECORD.size > len(payload):
+        raise ValueError("CAS part TGI block runs past the end of the resource")
+    refs = []
+    for _ in range(count):
+        instance, group, res_type = _KEY_RECORD.unpack_from(payload, pos)
+        refs.append((res_type, group, instance))
+        pos += _KEY_RECORD.size
+    return refs
+
+
+def rcol_references(payload) -> list[tuple[int, int, int]]:
+    """
+    External keys listed in an RCOL header.
+    Layout: u32 version, u32 public chunks, u32 unused, u32 external count,
+    u32 internal count, then the internal chunk keys and the external keys,
+    both as instance/type/group records. Internal chunks live in the same
+    resource, so only the external list is returned.
+    """
+    _, _, _, external, internal = struct.unpack_from("<5I", payload, 0)
+    if external + internal > MAX_REFERENCES:
+        raise ValueError("implausible RCOL reference count")
+    pos = 20 + internal * _KEY_RECORD.size
+    if pos + external * _KEY_RECORD.size > len(payload):
+        raise ValueError("RCOL key list runs past the end of the resource")
+    refs = []
+    for _ in range(external):
+        instance, res_type, group = _KEY_RECORD.unpack_from(payload, pos)
+        refs.append((res_type, group, instance))
+        pos += _KEY_RECORD.size
+    return refs
+
+
+REFERENCE_PARSERS = {TYPE_CASP: casp_references}
+REFERENCE_PARSERS.update({t: rcol_references for t in RCOL_TYPES})
+
+
+def package_references(pkg_path: Path, entries: list[ResourceEntry]) -> list[tuple]:
+    """
+    Return (src type, src group, src instance, ref type, ref group, ref instance)
+    rows for every resource in `entries` whose type carries references.
+    Only those resources are read and decompressed; unreadable ones are skipped.
+    """
+    reader = None
+    rows = set()
+    for entry in entries:
+        parser = REFERENCE_PARSERS.get(entry.type)
+        if parser is None:
+            continue
+        if reader is None:
+            reader = ResourceReader(pkg_path)
+        try:
+            refs = parser(reader.read_into(entry))
+        except (ValueError, IndexError, struct.error):
+            continue
+        for ref in refs:
+            # Null keys and self references are placeholders, not dependencies
+            if ref[0] == 0 or ref[2] == 0 or ref == entry.key:
+                continue
+            rows.add((*entry.key, *ref))
+    return sorted(rows)
+
+
+# ──────────────────────────────
+# 🕳️ MISSING DEPENDENCIES
+# ──────────────────────────────
+def write_dangling_report(index_path: Path, mods: Path, output_path: Path, log_callback=print,
+                          game_index=None) -> int:
+    """
+    Write one CSV row per reference that no indexed package provides and
+    return the number of rows. The index must be up to date (see refresh_tgi_index).
+    With a `game_index` (mf_gameindex.GameIndex), references to EA resources
+    are not reported as missing.
+    """
+    rows = 0
+    packages = set()
+    with TGIIndex(index_path) as index, open(output_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["package", "resource", "missing_type", "missing_group", "missing_instance", "missing_resource"])
+        for path, (st, sg, si), (rt, rg, ri) in index.dangling_refs():
+            if game_index is not None and (rt, rg, ri) in game_index:
+                continue
+            try:
+                name = path.relative_to(mods).as_posix()
+            except ValueError:
+                name = str(path)
+            writer.writerow([
+                name, f"{type_name(st)} {st:08X}:{sg:08X}:{si:016X}",
+                f"{rt:08X}", f"{rg:08X}", f"{ri:016X}", type_name(rt),
+            ])
+            packages.add(path)
+            rows += 1
+
+    if rows:
+        log_callback(f"🕳️ {len(packages)} packages reference {rows} resources no installed mod provides. "
+                     f"Results saved to {output_path}")
+    else:
+        log_callback("🔗 Every referenced resource is provided by an installed mod.")
+    return rows
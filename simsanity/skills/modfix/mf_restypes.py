@@ -0,0 +1,97 @@
+"""
+🏷️ mf_restypes.py
+Sims 4 resource type IDs, grouped into categories with a conflict severity.
+Two mods overriding the same tuning change gameplay; two mods shipping the
+same thumbnail do not. Conflict reports and quarantine use these levels.
+"""
+
+# ──────────────────────────────
+# 📊 SEVERITY LEVELS
+# ──────────────────────────────
+SEVERITY_LEVELS = {"low": 1, "medium": 2, "high": 3}
+
+CATEGORY_SEVERITY = {
+    "tuning": "high",      # gameplay tuning XML and its SimData
+    "cas": "medium",       # CAS parts and skin tones
+    "object": "medium",    # object definitions / catalog entries
+    "mesh": "medium",      # geometry, models, rigs, slots
+    "string": "low",       # string tables
+    "image": "low",        # textures
+    "thumbnail": "low",    # catalog / CAS thumbnails
+    "other": "medium",     # unknown types are not assumed harmless
+}
+
+# type id → (display name, category)
+RESOURCE_TYPES = {
+    # Tuning
+    0x0333406C: ("XML tuning", "tuning"),
+    0x03B33DDF: ("Tuning instance", "tuning"),
+    0x545AC67A: ("SimData", "tuning"),
+    0xE882D22F: ("Interaction tuning", "tuning"),
+    0x6017E896: ("Buff tuning", "tuning"),
+    0xCB5FDDC7: ("Trait tuning", "tuning"),
+    0x0C772E27: ("Loot tuning", "tuning"),
+    0x7DF2169C: ("Snippet tuning", "tuning"),
+    0xB61DE6B4: ("Object tuning", "tuning"),
+
+    # CAS
+    0x034AEECB: ("CAS part", "cas"),
+    0x0354796A: ("Skin tone", "cas"),
+    0xAC16FBEC: ("Region map", "cas"),
+
+    # Objects
+    0xC0DB5AE7: ("Object definition", "object"),
+    0x319E4F1D: ("Catalog object", "object"),
+
+    # Meshes
+    0x015A1849: ("Geometry", "mesh"),
+    0x01661233: ("Model", "mesh"),
+    0x01D10F34: ("Model LOD", "mesh"),
+    0x8EAF13DE: ("Rig", "mesh"),
+    0xD3044521: ("Slot", "mesh"),
+
+    # Strings
+    0x220557DA: ("String table", "string"),
+
+    # Images
+    0x00B2D882: ("DDS image", "image"),
+    0x3453CF95: ("RLE2 image", "image"),
+    0xBA856C78: ("RLES image", "image"),
+    0x2F7D0004: ("PNG image", "image"),
+
+    # Thumbnails
+    0x3C1AF1F2: ("CAS thumbnail", "thumbnail"),
+    0x5B282D45: ("Body thumbnail", "thumbnail"),
+    0x3C2A8647: ("Buy/build thumbnail", "thumbnail"),
+}
+
+
+# ──────────────────────────────
+# 🔎 LOOKUPS
+# ──────────────────────────────
+def type_name(res_type: int) -> str:
+    return RESOURCE_TYPES.get(res_type, (f"Unknown {res_type:08X}", "other"))[0]
+
+
+def category_of(res_type: int) -> str:
+    return RESOURCE_TYPES.get(res_type, ("", "other"))[1]
+
+
+def severity_of(res_type: int) -> str:
+    return CATEGORY_SEVERITY[category_of(res_type)]
+
+
+def severity_rank(severity: str) -> int:
+    return SEVERITY_LEVELS.get(severity, 0)
+
+
+def max_severity(res_types) -> str:
+    """Highest severity among `res_types` ("low" when empty)."""
+    best = "low"
+    for res_type in res_types:
+        severity = severity_of(res_type)
+        if SEVERITY_LEVELS[severity] > SEVERITY_LEVELS[best]:
+            best = severity
+            if best == "high":
+                break
+    return best
@@ -0,0 +1,138 @@
+"""
+🔗 mf_script_deps.py
+Dependency graph of script mods, built from the imports in their bytecode.
+Every absolute import found by the script inspector (see mf_ts4script and
+mf_pyc) is matched against the modules other archives provide: a match is
+a dependency, an import no installed mod, game module or standard library
+module provides is a missing framework, and an import the providing mod
+lacks points at an outdated framework. Only new or changed archives are
+re-read; the graph itself is rebuilt from the index on every run.
+"""
+
+import json
+import sys
+import zipfile
+from pathlib import Path
+
+from .mf_index_cache import TGIIndex
+from .mf_load_order import is_loaded
+from .mf_ts4script import module_name, refresh_script_index
+
+# Frameworks other mods commonly require: top-level package → download name
+KNOWN_FRAMEWORKS = {
+    "sims4communitylib": "Sims 4 Community Library",
+    "lot51_core": "Lot 51 Core Library",
+    "xml_injector": "XML Injector",
+}
+
+# The game's own Python packages, relative to the install folder
+GAME_PYTHON_ARCHIVES = ("base.zip", "core.zip", "simulation.zip")
+GAME_PYTHON_DIR = Path("Data/Simulation/Gameplay")
+
+
+def _top(module: str) -> str:
+    return module.split(".", 1)[0]
+
+
+def game_modules(game_dir: Path | None) -> set[str] | None:
+    """Top-level packages the game ships, or None when its Python archives are not found."""
+    if game_dir is None:
+        return None
+    tops = set()
+    for name in GAME_PYTHON_ARCHIVES:
+        try:
+            with zipfile.ZipFile(Path(game_dir) / GAME_PYTHON_DIR / name) as archive:
+                tops.update(_top(m) for m in map(module_name, archive.namelist()) if m)
+        except (OSError, zipfile.BadZipFile):
+            continue
+    return tops or None
+
+
+def build_dependency_graph(index_path: Path, mods: Path, game_tops: set[str] | None = None) -> dict[Path, dict]:
+    """
+    Return {archive: {"depends_on", "missing", "outdated"}} for every loaded
+    archive with at least one external import.
+    Without the game's module list (`game_tops`), only imports of
+    KNOWN_FRAMEWORKS can be reported missing: anything else might be a game module.
+    """
+    with TGIIndex(index_path) as index:
+        modules = index.script_modules()
+        imports = index.script_imports()
+
+    providers: dict[str, list[Path]] = {}
+    for archive, names in modules.items():
+        for top in {_top(m) for m in names}:
+            providers.setdefault(top, []).append(archive)
+
+    graph = {}
+    for archive, imported in sorted(imports.items()):
+        if not is_loaded(mods, archive):
+            # Never imported by the game, so its own imports never run either
+            continue
+        own = {_top(m) for m in modules.get(archive, ())}
+        depends_on, missing, outdated = set(), set(), set()
+        for name in imported:
+            top = _top(name)
+            if top in own or top in sys.stdlib_module_names:
+                continue
+            found = [p for p in providers.get(top, ()) if p != archive]
+            loaded = [p for p in found if is_loaded(mods, p)]
+            if loaded:
+                depends_on.update(loaded)
+                if not any(name in modules[p] for p in loaded):
+                    outdated.add(name)
+            elif found:
+                missing.add(f"{top} (installed too deep in Mods to load)")
+            elif top in KNOWN_FRAMEWORKS:
+                missing.add(f"{top} ({KNOWN_FRAMEWORKS[top]})")
+            elif game_tops is not None and top not in game_tops:
+                missing.add(top)
+        if depends_on or missing or outdated:
+            graph[archive] = {"depends_on": depends_on, "missing": missing, "outdated": outdated}
+    return graph
+
+
+def analyze_script_dependencies(script_files: list[Path], index_path: Path, mods: Path, output_path: Path,
+                                game_dir: Path | None = None, log_callback=print,
+                                workers: int = 1, fingerprints: dict[str, tuple] | None = None) -> dict[Path, dict]:
+    """
+    Refresh the script index, build the dependency graph and save it as JSON:
+    one entry per archive with the mods it depends on and what it is missing,
+    plus every missing framework with the mods that need it.
+    """
+    refresh_script_index(script_files, index_path, log_callback, workers, fingerprints=fingerprints)
+    graph = build_dependency_graph(index_path, mods, game_modules(game_dir))
+
+    def name(path: Path) -> str:
+        try:
+            return path.relative_to(mods).as_posix()
+        except ValueError:
+            return str(path)
+
+    needed_by: dict[str, list[str]] = {}
+    for archive, deps in graph.items():
+        for framework in deps["missing"]:
+            needed_by.setdefault(framework, []).append(name(archive))
+
+    report = {
+        "archives": [
+            {
+                "archive": name(archive),
+                "depends_on": sorted(name(p) for p in deps["depends_on"]),
+                "missing": sorted(deps["missing"]),
+                "outdated": sorted(deps["outdated"]),
+            }
+            for archive, deps in graph.items()
+        ],
+        "missing_frameworks": dict(sorted(needed_by.items())),
+    }
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    outdated = sum(1 for deps in graph.values() if deps["outdated"])
+    if needed_by:
+        log_callback(f"🔗 {len(needed_by)} frameworks are missing: {', '.join(sorted(needed_by))}")
+    if outdated:
+        log_callback(f"🔗 {outdated} script mods import modules their framework does not have (outdated?).")
+    log_callback(f"🔗 Script dependency graph saved to {output_path}")
+    return graph
@@ -0,0 +1,331 @@
+"""
+✂️ mf_split.py
+Splits a merged package back into the packages it was built from.
+With the merge manifest (see mf_merge) an untouched original waiting in
+ModFix_MergedOriginals is simply moved back; otherwise the source is rebuilt
+from its resources in the merged package. Keys the merge dropped from a
+source (another source won them) come back as the winning copy, since the
+source's own bytes were not kept.
+Without one, resources are grouped by what links them (shared instance,
+custom group ID, CAS part / RCOL references) and each group becomes a
+package. Resource bytes are copied as stored, never decompressed, in file
+order, so splitting costs about as much as copying the merged file.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from .mf_clusters import UnionFind
+from .mf_dbpf import DBPFWriter, ResourceEntry
+from .mf_merge import ORIGINALS_DIRNAME, ManifestWriter, manifest_path_for
+from .mf_mmap import open_mapped, release_mapped
+from .mf_refs import package_references
+
+EXTRACTED_DIRNAME = "ModFix_Extracted"
+
+# Group IDs that carry no grouping information (EA default / "custom content" flag)
+_SHARED_GROUPS = {0x00000000, 0x80000000}
+
+
+def _write_package(path: Path, pkg, entries: list[ResourceEntry],
+                   borrowed: dict[Path, list[tuple]] | None = None, log_callback=print) -> int:
+    """
+    Copy `entries` from the mapped package `pkg` into a new package at `path`,
+    plus the `borrowed` keys from other merged packages ({package: [keys]}).
+    Returns the number of resources written.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with DBPFWriter(path) as writer:
+        for entry in sorted(entries, key=lambda e: e.offset):
+            with pkg.resource(entry) as stored:
+                writer.add(entry.key, stored, entry.mem_size, entry.compression)
+            count += 1
+        for other_path, keys in (borrowed or {}).items():
+            try:
+                with open_mapped(other_path) as other:
+                    by_key = {e.key: e for e in other.index()}
+                    missing = [key for key in keys if key not in by_key]
+                    for key in keys:
+                        entry = by_key.get(key)
+                        if entry is not None:
+                            with other.resource(entry) as stored:
+                                writer.add(entry.key, stored, entry.mem_size, entry.compression)
+                            count += 1
+            except (OSError, ValueError):
+                missing = keys
+            if missing:
+                log_callback(f"⚠️ {path.name}: {len(missing)} resources were kept in {other_path.name}, "
+                             f"which no longer has them.")
+    return count
+
+
+def _source_locations(merged_dir: Path) -> dict[str, Path]:
+    """{source path relative to Mods: merged package now holding it} from every manifest."""
+    locations = {}
+    for manifest_file in merged_dir.glob("*.manifest.json"):
+        try:
+            with open(manifest_file) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            continue
+        package = manifest_file.with_name(manifest["merged"])
+        for record in manifest["sources"]:
+            locations[record["source"]] = package
+    return locations
+
+
+def _borrowed_keys(mods: Path, merged: Path, manifest: dict, dropped: list[list],
+                   locations: dict[str, Path]) -> dict[Path, list[tuple]]:
+    """
+    {package: [keys]} for dropped keys whose winning copy lives in another
+    package: the winner's source if it is in Mods, else the merged package
+    holding it. (Version 1 manifests named a sibling merged package instead.)
+    """
+    borrowed: dict[Path, list[tuple]] = {}
+    for k in dropped:
+        if len(k) <= 3:
+            continue
+        if manifest["version"] < 2:
+            owner = merged.with_name(k[3])
+        else:
+            owner = Path(mods) / k[3]
+            if not owner.is_file():
+                owner = locations.get(k[3], owner)
+        borrowed.setdefault(owner, []).append(tuple(k[:3]))
+    return borrowed
+
+
+def _rewrite_merged(merged: Path, pkg, records: list[dict], adopt: dict[tuple, tuple] | None = None,
+                    repoint: dict[tuple, str] | None = None) -> tuple[Path, dict[tuple, str]]:
+    """
+    Write `merged` again (beside it, as .split.package) with only `records`.
+    `adopt` maps dropped entries (as tuples, with the owner if any) to
+    (mapped package, entry) copies: the first record that dropped one now
+    holds it. `repoint` maps dropped entries to the source that holds the
+    winning copy from now on. Returns the new file and {adopted key: source}.
+    """
+    adopt, repoint = adopt or {}, repoint or {}
+    rewritten = merged.with_name(merged.stem + ".split.package")
+    manifest_writer = ManifestWriter(manifest_path_for(rewritten), merged.name)
+    adopted: dict[tuple, str] = {}
+    with DBPFWriter(rewritten) as writer:
+        for record in records:
+            copies = [(pkg, ResourceEntry(*r)) for r in record["resources"]]
+            dropped = []
+            for k in record["dropped"]:
+                key = tuple(k[:3])
+                if tuple(k) in adopt:
+                    if key in adopted:
+                        dropped.append(list(key))
+                    else:
+                        adopted[key] = record["source"]
+                        copies.append(adopt[tuple(k)])
+                elif tuple(k) in repoint:
+                    dropped.append([*key, repoint[tuple(k)]])
+                else:
+                    dropped.append(k)
+            moved = []
+            for source, entry in copies:
+                with source.resource(entry) as stored:
+                    offset = writer.add(entry.key, stored, entry.mem_size, entry.compression)
+                moved.append([*entry.key, offset, entry.file_size, entry.mem_size, entry.compression])
+            manifest_writer.add({**record, "resources": moved, "dropped": dropped})
+    manifest_writer.close()
+    return rewritten, adopted
+
+
+def _replace_merged(merged: Path, rewritten: Path) -> None:
+    release_mapped(merged)
+    os.replace(rewritten, merged)
+    os.replace(manifest_path_for(rewritten), manifest_path_for(merged))
+
+
+def _hand_over(merged: Path, pkg, lost: dict[tuple, str], owners: dict[tuple, str],
+               log_callback=print) -> None:
+    """
+    Keys in `lost` ({key: extracted source that won it}) are leaving the game.
+    Other merged packages that dropped them in favour of that source take them
+    over: the first one keeps the bytes, the rest point at its source.
+    `owners` lists keys already taken over inside `merged` itself.
+    """
+    if not lost:
+        return
+    by_key = {e.key: e for e in pkg.index()}
+    owners = dict(owners)
+    for manifest_file in sorted(merged.parent.glob("*.manifest.json")):
+        sibling = manifest_file.with_name(manifest_file.name[:-len(".manifest.json")] + ".package")
+        if sibling == merged or not sibling.exists():
+            continue
+        with open(manifest_file) as f:
+            manifest = json.load(f)
+        if manifest["version"] < 2:
+            continue
+        refs = {
+            tuple(k) for record in manifest["sources"] for k in record["dropped"]
+            if len(k) > 3 and lost.get(tuple(k[:3])) == k[3] and tuple(k[:3]) in by_key
+        }
+        if not refs:
+            continue
+        adopt = {k: (pkg, by_key[k[:3]]) for k in refs if k[:3] not in owners}
+        repoint = {k: owners[k[:3]] for k in refs if k[:3] in owners}
+        with open_mapped(sibling) as sibling_pkg:
+            rewritten, adopted = _rewrite_merged(sibling, sibling_pkg, manifest["sources"], adopt, repoint)
+        _replace_merged(sibling, rewritten)
+        owners.update(adopted)
+        if adopted:
+            log_callback(f"✂️ {sibling.name} now holds {len(adopted)} resources from {merged.name}")
+
+
+def _restore_original(mods: Path, record: dict, target: Path) -> bool:
+    """Move the untouched original back if it is still in ModFix_MergedOriginals."""
+    original = Path(mods).parent / ORIGINALS_DIRNAME / record["source"]
+    try:
+        st = original.stat()
+    except OSError:
+        return False
+    if st.st_size != record["size"] or st.st_mtime_ns != record["mtime_ns"] or target.exists():
+        return False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(original, target)
+    return True
+
+
+# ──────────────────────────────
+# 📜 MANIFEST-DRIVEN SPLIT
+# ──────────────────────────────
+def split_with_manifest(merged: Path, mods: Path, extract: set[str] | None = None,
+                        output_dir: Path | None = None, log_callback=print) -> list[Path]:
+    """
+    Rebuild sources of a merged package from its manifest.
+    With `extract=None` every source goes back to its place under Mods and the
+    merged package is removed. Otherwise only the named sources (paths relative
+    to Mods) are written to `output_dir`, and the merged package is rewritten
+    without them; other merged packages that dropped keys in favour of an
+    extracted source take those keys over. Returns the packages written.
+    """
+    merged = Path(merged)
+    with open(manifest_path_for(merged)) as f:
+        manifest = json.load(f)
+    sources = manifest["sources"]
+    written = []
+    if extract is not None and not extract & {record["source"] for record in sources}:
+        log_callback(f"⚠️ {merged.name} does not contain {', '.join(sorted(extract))}.")
+        return written
+
+    rewritten = None
+    with open_mapped(merged) as pkg:
+        # Resources dropped from a source during the merge come back from the winning copy
+        by_key = None
+        if any(record["dropped"] for record in sources):
+            by_key = {e.key: e for e in pkg.index()}
+
+        locations = None
+        keep = []
+        # Keys won by extracted sources pass to the first kept source that dropped them
+        orphaned: dict[tuple, str] = {}
+        for record in sources:
+            if extract is not None and record["source"] not in extract:
+                keep.append(record)
+                continue
+            orphaned.update((tuple(r[:3]), record["source"]) for r in record["resources"])
+            target = (Path(output_dir) if extract is not None else Path(mods)) / record["source"]
+            if extract is None and _restore_original(mods, record, target):
+                log_callback(f"✂️ Restored original {record['source']}")
+                written.append(target)
+                continue
+            entries = [ResourceEntry(*r) for r in record["resources"]]
+            entries += [by_key[tuple(k)] for k in record["dropped"] if len(k) == 3 and tuple(k) in by_key]
+            if locations is None and any(len(k) > 3 for k in record["dropped"]):
+                locations = _source_locations(merged.parent)
+            borrowed = _borrowed_keys(mods, merged, manifest, record["dropped"], locations or {})
+            count = _write_package(target, pkg, entries, borrowed, log_callback)
+            log_callback(f"✂️ Rebuilt {record['source']} ({count} resources)")
+            restored = count - len(record["resources"])
+            if restored:
+                # Their own copies were not kept by the merge
+                log_callback(f"⚠️ {restored} resources of {record['source']} "
+                             f"come from the copy that won the merge.")
+            written.append(target)
+
+        if extract is not None:
+            adopted = {}
+            if keep:
+                # Rewrite the merged package without the extracted sources
+                adopt = {key: (pkg, by_key[key]) for key in orphaned} if by_key else {}
+                rewritten, adopted = _rewrite_merged(merged, pkg, keep, adopt)
+            # Extracted sources leave the game; a full split puts every source back in Mods
+            _hand_over(merged, pkg, orphaned, adopted, log_callback)
+
+    if rewritten is None:
+        release_mapped(merged)
+        merged.unlink()
+        manifest_path_for(merged).unlink()
+    else:
+        _replace_merged(merged, rewritten)
+    return written
+
+
+# ──────────────────────────────
+# 🧩 HEURISTIC SPLIT
+# ──────────────────────────────
+def group_resources(pkg_path: Path, entries: list[ResourceEntry]) -> list[list[ResourceEntry]]:
+    """
+    Group resources that belong to the same item: same instance (an object and
+    its thumbnail), same custom group ID, or linked by a CAS part / RCOL reference.
+    """
+    sets = UnionFind()
+    first_by_instance: dict[int, int] = {}
+    first_by_group: dict[int, int] = {}
+    position = {}
+    for i, entry in enumerate(entries):
+        sets.find(i)
+        position[entry.key] = i
+        j = first_by_instance.setdefault(entry.instance, i)
+        if j != i:
+            sets.union(i, j)
+        if entry.group not in _SHARED_GROUPS:
+            j = first_by_group.setdefault(entry.group, i)
+            if j != i:
+                sets.union(i, j)
+
+    for st, sg, si, rt, rg, ri in package_references(pkg_path, entries):
+        target = position.get((rt, rg, ri))
+        if target is not None:
+            sets.union(position[(st, sg, si)], target)
+
+    groups: dict[int, list[ResourceEntry]] = {}
+    for i, entry in enumerate(entries):
+        groups.setdefault(sets.find(i), []).append(entry)
+    return sorted(groups.values(), key=lambda g: min(e.offset for e in g))
+
+
+def split_heuristic(merged: Path, output_dir: Path, log_callback=print) -> list[Path]:
+    """Split a package without a manifest into one package per resource group."""
+    merged = Path(merged)
+    written = []
+    with open_mapped(merged) as pkg:
+        entries = pkg.index()
+        groups = group_resources(merged, entries)
+        for number, group in enumerate(groups, 1):
+            target = Path(output_dir) / f"{merged.stem}_part{number:03d}.package"
+            _write_package(target, pkg, group)
+            written.append(target)
+    log_callback(f"✂️ Split {merged.name} into {len(written)} packages by resource grouping (no manifest found).")
+    return written
+
+
+def split_merged(merged: Path, mods: Path, extract: set[str] | None = None,
+                 output_dir: Path | None = None, log_callback=print) -> list[Path]:
+    """
+    Split a merged package, using its manifest when there is one.
+    Without a manifest the parts go to `output_dir` (default: a folder named
+    after the package in ModFix_Extracted beside Mods, where the game does
+    not load them twice) and the merged package is left in place.
+    """
+    merged = Path(merged)
+    extracted = Path(mods).parent / EXTRACTED_DIRNAME
+    if manifest_path_for(merged).exists():
+        return split_with_manifest(merged, mods, extract, output_dir or extracted, log_callback)
+    return split_heuristic(merged, output_dir or extracted / merged.stem, log_callback)
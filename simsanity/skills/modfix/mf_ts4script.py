@@ -0,0 +1,255 @@
+"""
+📜 mf_ts4script.py
+Script mod (.ts4script) inspector.
+Each archive's zip central directory is read to list its Python files; the
+4-byte magic of every .pyc entry is compared with the game's Python (3.7),
+and source-only or mixed archives are flagged. Archives are inspected
+concurrently and the results, together with the module list used by the
+crash analyzer, are cached in the TGI index by file fingerprint.
+The module list also reveals archives shipping the same top-level package,
+of which only the first one on the import path is ever imported.
+"""
+
+import csv
+import re
+import zipfile
+from pathlib import Path
+
+from .mf_index_cache import TGIIndex
+from .mf_load_order import is_loaded, load_order_key
+from .mf_parallel import map_chunks
+from .mf_pyc import SUPPORTED_VERSIONS, pyc_imports
+
+# The game embeds CPython 3.7; bytecode from any other version fails to import
+GAME_PYTHON = "3.7"
+
+# Python source/bytecode files inside a .ts4script archive
+SCRIPT_SUFFIXES = (".py", ".pyc")
+
+# (first magic number, last magic number, version) as assigned in CPython's importlib
+PYC_MAGIC_RANGES = [
+    (3000, 3131, "3.0"),
+    (3141, 3151, "3.1"),
+    (3160, 3180, "3.2"),
+    (3190, 3230, "3.3"),
+    (3250, 3310, "3.4"),
+    (3320, 3351, "3.5"),
+    (3360, 3379, "3.6"),
+    (3390, 3394, "3.7"),
+    (3400, 3413, "3.8"),
+    (3420, 3425, "3.9"),
+    (3430, 3439, "3.10"),
+    (3450, 3495, "3.11"),
+    (3500, 3531, "3.12"),
+    (3550, 3571, "3.13"),
+]
+
+# Examples of offending members kept per archive
+MAX_LISTED_MEMBERS = 5
+
+
+def pyc_version(header: bytes) -> str | None:
+    """Python version a .pyc header belongs to, or None if the magic is not recognised."""
+    if len(header) < 4 or header[2:4] != b"\r\n":
+        return None
+    magic = int.from_bytes(header[:2], "little")
+    for first, last, version in PYC_MAGIC_RANGES:
+        if first <= magic <= last:
+            return version
+    return None
+
+
+def module_name(member: str) -> str | None:
+    """Dotted module name for an archive member path, or None if it is not Python."""
+    if not member.lower().endswith(SCRIPT_SUFFIXES):
+        return None
+    parts = [p for p in re.split(r"[\\/]", member) if p and p != "__pycache__"]
+    stem = parts[-1].rsplit(".", 1)[0]
+    # foo.cpython-37.pyc → foo
+    parts[-1] = stem.split(".", 1)[0]
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts) or None
+
+
+# ──────────────────────────────
+# 🔍 INSPECTION
+# ──────────────────────────────
+def inspect_archive(path: Path, with_imports: bool = False) -> tuple[list[str], dict, list[str]]:
+    """
+    Return (module names, report, imported modules) for one archive.
+    The report holds the .py / .pyc counts, the Python versions found,
+    the archive kind ("bytecode", "source-only", "mixed" or "empty") and
+    a list of problems, which stays empty when the game can load the archive.
+    Imports are only read (from the bytecode, see mf_pyc) with `with_imports`.
+    """
+    modules = set()
+    imports = set()
+    versions: dict[str, int] = {}
+    incompatible = []
+    py = pyc = 0
+
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            module = module_name(name)
+            if module is None:
+                continue
+            modules.add(module)
+            if name.lower().endswith(".py"):
+                py += 1
+                continue
+            pyc += 1
+            with archive.open(info) as member:
+                header = member.read(4)
+                version = pyc_version(header) or "unknown"
+                if with_imports and version in SUPPORTED_VERSIONS:
+                    try:
+                        imports |= pyc_imports(header + member.read(), version)
+                    except ValueError:
+                        # Damaged or obfuscated bytecode: the module list still stands
+                        pass
+            versions[version] = versions.get(version, 0) + 1
+            if version != GAME_PYTHON and len(incompatible) < MAX_LISTED_MEMBERS:
+                incompatible.append(name)
+
+    kind = "empty" if not py and not pyc else "source-only" if not pyc else "mixed" if py else "bytecode"
+    problems = []
+    if kind == "empty":
+        problems.append("no Python files")
+    elif kind == "source-only":
+        problems.append("source only: the game loads compiled .pyc files")
+    elif kind == "mixed":
+        problems.append(f"mixed: {py} .py files alongside {pyc} .pyc files")
+    wrong = {v: n for v, n in versions.items() if v != GAME_PYTHON}
+    if wrong:
+        found = ", ".join(f"{n} for Python {v}" for v, n in sorted(wrong.items()))
+        problems.append(f"bytecode not built for Python {GAME_PYTHON}: {found} (e.g. {', '.join(incompatible)})")
+
+    report = {"py": py, "pyc": pyc, "versions": versions, "kind": kind, "problems": problems}
+    return sorted(modules), report, sorted(imports)
+
+
+def _inspect_chunk(paths: list[str]) -> list[tuple[str, list[str], dict, list[str]]]:
+    """Pool worker: (path, modules, report, imports) per archive."""
+    results = []
+    for path in paths:
+        try:
+            modules, report, imports = inspect_archive(Path(path), with_imports=True)
+        except (OSError, zipfile.BadZipFile) as e:
+            modules, imports = [], []
+            report = {"py": 0, "pyc": 0, "versions": {}, "kind": "unreadable",
+                      "problems": [f"not a readable zip archive: {e}"]}
+        results.append((path, modules, report, imports))
+    return results
+
+
+# ──────────────────────────────
+# 🗄️ CACHED INDEX
+# ──────────────────────────────
+def refresh_script_index(script_files: list[Path], index_path: Path, log_callback=print,
+                         workers: int = 1, chunk_size: int = 16,
+                         fingerprints: dict[str, tuple] | None = None, prune: bool = True) -> None:
+    """
+    Bring the script tables of the index up to date for `script_files`.
+    Unchanged archives are not opened; changed ones are inspected, and
+    their bytecode scanned for imports, in a worker pool.
+    `fingerprints` from a walk (see mf_walker) spare a stat per archive.
+    Without `prune`, rows of archives missing from `script_files` are kept.
+    """
+    with TGIIndex(index_path) as index:
+        stale, removed = index.stale(script_files, table="script_archives", fingerprints=fingerprints,
+                                     prune=prune)
+        if stale or removed:
+            log_callback(f"📜 Script index: {len(stale)} new or changed archives, {removed} removed.")
+        stale_fps = {str(file): fp for file, fp in stale}
+        for path, modules, report, imports in map_chunks(
+            _inspect_chunk, list(stale_fps), workers, chunk_size
+        ):
+            index.store_script(Path(path), stale_fps[path], modules, report, imports)
+
+
+def inspect_scripts(script_files: list[Path], index_path: Path, mods: Path, output_path: Path,
+                    log_callback=print, workers: int = 1,
+                    fingerprints: dict[str, tuple] | None = None) -> dict[Path, dict]:
+    """
+    Refresh the script index and write one CSV row per archive the game
+    cannot load cleanly. Returns {archive: report} for those archives.
+    """
+    refresh_script_index(script_files, index_path, log_callback, workers, fingerprints=fingerprints)
+    with TGIIndex(index_path) as index:
+        reports = index.script_reports()
+    flagged = {path: report for path, report in sorted(reports.items()) if report["problems"]}
+
+    with open(output_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["archive", "kind", "python_versions", "problems"])
+        for path, report in flagged.items():
+            try:
+                name = path.relative_to(mods).as_posix()
+            except ValueError:
+                name = str(path)
+            versions = ";".join(f"{v}:{n}" for v, n in sorted(report["versions"].items()))
+            writer.writerow([name, report["kind"], versions, "; ".join(report["problems"])])
+
+    if flagged:
+        log_callback(f"📜 {len(flagged)} of {len(reports)} script mods will not load cleanly. Results saved to {output_path}")
+    else:
+        log_callback(f"📜 All {len(reports)} script mods are compiled for Python {GAME_PYTHON}.")
+    return flagged
+
+
+# ──────────────────────────────
+# ⚔️ NAMESPACE COLLISIONS
+# ──────────────────────────────
+def find_script_collisions(index_path: Path, mods: Path) -> list[tuple[str, Path, list[Path], int]]:
+    """
+    Return (top-level package, archive that wins, [shadowed archives], modules
+    present in more than one of them) for every package shipped by several
+    loaded archives. The game puts archives on the import path in load order,
+    so the first one provides the whole package and the others are never read.
+    """
+    owners: dict[str, dict[Path, set[str]]] = {}
+    with TGIIndex(index_path) as index:
+        for package, module, path in index.shared_script_packages():
+            if is_loaded(mods, path):
+                owners.setdefault(package, {}).setdefault(path, set()).add(module)
+
+    collisions = []
+    for package, archives in owners.items():
+        if len(archives) < 2:
+            continue
+        ordered = sorted(archives, key=lambda p: load_order_key(mods, p))
+        seen, shared = set(), set()
+        for modules in archives.values():
+            shared |= seen & modules
+            seen |= modules
+        collisions.append((package, ordered[0], ordered[1:], len(shared)))
+    return collisions
+
+
+def detect_script_collisions(script_files: list[Path], index_path: Path, mods: Path, output_path: Path,
+                             log_callback=print, workers: int = 1,
+                             fingerprints: dict[str, tuple] | None = None) -> list[tuple[str, Path, list[Path], int]]:
+    """
+    Refresh the script index and write one CSV row per top-level package
+    that several script mods ship. Unchanged archives are not reopened.
+    """
+    refresh_script_index(script_files, index_path, log_callback, workers, fingerprints=fingerprints)
+    collisions = find_script_collisions(index_path, mods)
+
+    def name(path: Path) -> str:
+        try:
+            return path.relative_to(mods).as_posix()
+        except ValueError:
+            return str(path)
+
+    with open(output_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["package", "imported_from", "shadowed", "shared_modules"])
+        for package, winner, shadowed, shared in collisions:
+            writer.writerow([package, name(winner), ";".join(name(p) for p in shadowed), shared])
+
+    if collisions:
+        log_callback(f"⚔️ {len(collisions)} Python packages are shipped by more than one script mod. Results saved to {output_path}")
+    return collisions
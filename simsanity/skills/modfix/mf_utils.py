@@ -9,6 +9,9 @@ import hashlib
 from colorama import Fore, Style
 from pathlib import Path
 import os
+import threading
+
+from .mf_mmap import open_mapped
 
 # ──────────────────────────────
 # 🌐 STATE VARIABLES
@@ -28,79 +31,180 @@ def c(msg: str, col: str = Fore.WHITE) -> str:
 # ──────────────────────────────
 # 🔍 PATH VALIDATION
 # ──────────────────────────────
+# How far below each search root the Mods folder is looked for
+MAX_DISCOVERY_DEPTH = 4
+# Folders that never hold the Sims 4 user folder but can be huge to walk
+HEAVY_DIRNAMES = frozenset({
+    "node_modules", "__pycache__", "site-packages", "venv", ".venv",
+    "Library", "AppData", "Application Data", "Applications", "Pictures", "Photos",
+    "Music", "Movies", "Videos", "Steam", "steamapps", "Origin Games",
+    "Windows", "Program Files", "Program Files (x86)", "ModFix_Quarantine",
+})
+EA_DIRNAMES = ("Electronic Arts", "ElectronicArts", "EA Games")
+# How long a call waits for a background rediscovery before carrying on without it
+DISCOVERY_WAIT_SECONDS = 5.0
+
+_rediscovery = {"thread": None, "lock": threading.Lock()}
+
+
+def _search_roots() -> list[Path]:
+    """Where the Sims 4 user folder lives on Windows, macOS and OneDrive setups, most likely first."""
+    home = Path.home()
+    userprofile = Path(os.getenv("USERPROFILE") or home)
+    onedrive = Path(os.getenv("ONEDRIVE") or userprofile / "OneDrive")
+    roots = []
+    override = os.getenv("EA_FOLDER_OVERRIDE")
+    if override:
+        roots.append(Path(override).expanduser())
+    for base in (home, userprofile, onedrive):
+        roots += [base / "Documents", base / "OneDrive" / "Documents", base / "Desktop", base / "Downloads", base]
+    return list(dict.fromkeys(roots))
+
+
+def _is_sims_mods(path: str) -> bool:
+    """A Mods folder of the game: directly in "The Sims 4" or in an EA folder."""
+    parent = os.path.basename(os.path.dirname(path))
+    return parent == "The Sims 4" or parent in EA_DIRNAMES
+
+
+def _scan_for_mods(root: Path, max_depth: int, accept, seen: set) -> Path | None:
+    """
+    Breadth-first search below `root` for a folder named Mods that `accept`s,
+    at most `max_depth` levels deep. Hidden and HEAVY_DIRNAMES folders are not
+    entered, symlinks are not followed, and folders in `seen` are skipped.
+    """
+    level = [str(root)]
+    for _ in range(max_depth + 1):
+        below = []
+        for folder in level:
+            if folder in seen:
+                continue
+            seen.add(folder)
+            try:
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        try:
+                            if not entry.is_dir(follow_symlinks=False):
+                                continue
+                        except OSError:
+                            continue
+                        if entry.name.lower() == "mods" and accept(entry.path):
+                            return Path(entry.path)
+                        if entry.name.startswith(".") or entry.name in HEAVY_DIRNAMES:
+                            continue
+                        below.append(entry.path)
+            except OSError:
+                continue
+        level = below
+        if not level:
+            break
+    return None
+
+
+def find_mods_under(path: Path, max_depth: int = MAX_DISCOVERY_DEPTH) -> Path | None:
+    """The Mods folder itself, or the first one found a few levels below `path`."""
+    path = Path(path)
+    if path.name.lower() == "mods":
+        return path
+    return _scan_for_mods(path, max_depth, lambda found: True, set())
+
+
+def discover_mods_folder(max_depth: int = MAX_DISCOVERY_DEPTH) -> Path | None:
+    """
+    Find the game's Mods folder: the usual "Electronic Arts/The Sims 4/Mods"
+    spots are checked with one stat each, then every search root is scanned
+    breadth-first to a fixed depth. Returns None when nothing is found.
+    """
+    from core.utils import load_saved_ea_path
+
+    ea_folders = [load_saved_ea_path()] + [root / name for root in _search_roots() for name in EA_DIRNAMES]
+    for ea in filter(None, ea_folders):
+        for mods_path in (ea / "The Sims 4" / "Mods", ea / "Mods"):
+            if mods_path.is_dir():
+                return mods_path
+
+    seen: set = set()
+    for root in _search_roots():
+        found = _scan_for_mods(root, max_depth, _is_sims_mods, seen)
+        if found is not None:
+            return found
+    return None
+
+
+def _read_cached_mods_path() -> Path | None:
+    try:
+        cached = CACHE_FILE.read_text().strip()
+    except OSError:
+        return None
+    return Path(cached) if cached else None
+
+
+def remember_mods_path(path: Path) -> None:
+    """Persist the Mods folder so later runs only have to stat it."""
+    global MANUAL_MODS_PATH
+    MANUAL_MODS_PATH = str(path)
+    try:
+        CACHE_FILE.write_text(str(path))
+    except OSError as e:
+        print(f"{Fore.YELLOW}⚠️ Could not save Mods folder path: {e}{Fore.RESET}")
+
+
+def _rediscover() -> None:
+    found = discover_mods_folder()
+    if found is not None:
+        print(f"{Fore.GREEN}✅ Found Mods folder again at: {found}{Fore.RESET}")
+        remember_mods_path(found)
+
+
+def _rediscover_in_background(wait: float = DISCOVERY_WAIT_SECONDS) -> Path | None:
+    """
+    Search for a Mods folder that moved, on a background thread (one at a
+    time). The caller waits up to `wait` seconds; a search still running
+    after that saves its result to the cache for the next call.
+    """
+    with _rediscovery["lock"]:
+        thread = _rediscovery["thread"]
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=_rediscover, name="modfix-discovery", daemon=True)
+            _rediscovery["thread"] = thread
+            thread.start()
+    thread.join(wait)
+    if thread.is_alive():
+        return None
+    cached = _read_cached_mods_path()
+    return cached if cached is not None and cached.is_dir() else None
+
+
 def validate_mod_paths() -> Path:
     global MANUAL_MODS_PATH
     global MODFIX_STATE
     """
     Ensure the Sims 4 Mods folder exists and return it.
-    Dynamically searches for the Mods folder instead of using a hardcoded path.
+    The last known folder (found or chosen by hand) is checked with a single
+    stat; only a first run searches, and only a vanished folder triggers a
+    new search, run in the background.
     """
-    from core.utils import get_ea_folder
-
-    # Dynamically detect EA folder
-    ea_folder = get_ea_folder(auto_confirm=True)
-
-    # Build candidate Mods paths to search
-    possible_mods = [
-        ea_folder / "The Sims 4" / "Mods",
-        ea_folder / "Mods",
-        ea_folder.parent / "Mods",
-    ]
-
-    # Search for a valid Mods folder
-    for mods_path in possible_mods:
-        if mods_path.exists():
-            print(f"{Fore.GREEN}✅ Found Mods folder at: {mods_path}{Fore.RESET}")
-            # Ensure the returned path is the Mods folder, not its parent
-            mods_dir = Path(MANUAL_MODS_PATH or mods_path or ea_folder)
-            if mods_dir.name.lower() != "mods":
-                possible_mods = list(mods_dir.glob("**/Mods"))
-                if possible_mods:
-                    mods_dir = possible_mods[0]
-            return mods_dir
-
-    # Shallow scan if not found
-    print(f"{Fore.YELLOW}⚠️ Mods folder not found in typical locations, performing a quick scan...{Fore.RESET}")
-    for root, dirs, _ in os.walk(ea_folder.parent):
-        for d in dirs:
-            if d.lower() == "mods":
-                mods_path = Path(root) / d
-                print(f"{Fore.GREEN}✅ Found Mods folder by scan: {mods_path}{Fore.RESET}")
-                # Ensure the returned path is the Mods folder, not its parent
-                mods_dir = Path(MANUAL_MODS_PATH or mods_path or ea_folder)
-                if mods_dir.name.lower() != "mods":
-                    possible_mods = list(mods_dir.glob("**/Mods"))
-                    if possible_mods:
-                        mods_dir = possible_mods[0]
-                return mods_dir
+    cached = Path(MANUAL_MODS_PATH) if MANUAL_MODS_PATH else _read_cached_mods_path()
+    if cached is not None and cached.is_dir():
+        MANUAL_MODS_PATH = str(cached)
+        return cached
+
+    if cached is not None:
+        print(f"{Fore.YELLOW}⚠️ Mods folder is gone: {cached}. Searching for it again...{Fore.RESET}")
+        MANUAL_MODS_PATH = None
+        mods_path = _rediscover_in_background()
+    else:
+        print(f"{Fore.CYAN}🔎 Searching for the Mods folder...{Fore.RESET}")
+        mods_path = discover_mods_folder()
+        if mods_path is not None:
+            remember_mods_path(mods_path)
+    if mods_path is not None:
+        print(f"{Fore.GREEN}✅ Found Mods folder at: {mods_path}{Fore.RESET}")
+        return mods_path
 
     # Detect if running under Flask/web server
     import sys
     if "flask" in sys.modules or "werkzeug" in sys.modules:
-        if MANUAL_MODS_PATH and Path(MANUAL_MODS_PATH).exists():
-            print(f"{Fore.GREEN}✅ Using manually provided Mods folder: {MANUAL_MODS_PATH}{Fore.RESET}")
-            # Ensure the returned path is the Mods folder, not its parent
-            mods_dir = Path(MANUAL_MODS_PATH or ea_folder)
-            if mods_dir.name.lower() != "mods":
-                possible_mods = list(mods_dir.glob("**/Mods"))
-                if possible_mods:
-                    mods_dir = possible_mods[0]
-            return mods_dir
-
-        # Check persistent cache
-        if CACHE_FILE.exists():
-            cached = CACHE_FILE.read_text().strip()
-            if cached and Path(cached).exists():
-                MANUAL_MODS_PATH = cached
-                print(f"{Fore.GREEN}✅ Loaded cached Mods folder: {cached}{Fore.RESET}")
-                # Ensure the returned path is the Mods folder, not its parent
-                mods_dir = Path(MANUAL_MODS_PATH or ea_folder)
-                if mods_dir.name.lower() != "mods":
-                    possible_mods = list(mods_dir.glob("**/Mods"))
-                    if possible_mods:
-                        mods_dir = possible_mods[0]
-                return mods_dir
-
         print(f"{Fore.CYAN}🌐 Running in web mode — requesting manual Mods folder path via UI.{Fore.RESET}")
         MODFIX_STATE["manual_required"] = True
         return "manual_required"
@@ -111,30 +215,26 @@ def validate_mod_paths() -> Path:
     manual = input("Drop your 'Mods' folder path: ").strip('" ').strip("'")
     manual_path = Path(manual).expanduser().resolve()
 
-    if manual_path.exists():
-        print(f"{Fore.GREEN}✅ Using manual Mods folder: {manual_path}{Fore.RESET}")
-        # Ensure the returned path is the Mods folder, not its parent
-        mods_dir = Path(manual_path)
-        if mods_dir.name.lower() != "mods":
-            possible_mods = list(mods_dir.glob("**/Mods"))
-            if possible_mods:
-                mods_dir = possible_mods[0]
+    mods_dir = find_mods_under(manual_path) if manual_path.is_dir() else None
+    if mods_dir is not None:
+        print(f"{Fore.GREEN}✅ Using manual Mods folder: {mods_dir}{Fore.RESET}")
+        remember_mods_path(mods_dir)
         return mods_dir
-    else:
-        print(f"{Fore.RED}❌ Invalid path: {manual_path}{Fore.RESET}")
+    print(f"{Fore.RED}❌ Invalid path: {manual_path}{Fore.RESET}")
 
-    raise FileNotFoundError(f"❌ Could not locate a Mods folder under or near {ea_folder}")
+    raise FileNotFoundError("❌ Could not locate a Mods folder")
 
 
 # ──────────────────────────────
 # 🔑 FILE HASHING
 # ──────────────────────────────
-def md5(file: Path, chunk: int = 8192) -> str:
+def md5(file: Path, chunk: int = 1 << 20) -> str:
     """Generate an MD5 hash for a given file (used for duplicate detection)."""
     h = hashlib.md5()
-    with file.open("rb") as f:
-        for part in iter(lambda: f.read(chunk), b""):
-            h.update(part)
+    with open_mapped(file) as mapped:
+        for start in range(0, mapped.size, chunk):
+            with mapped.view[start:start + chunk] as part:
+                h.update(part)
     return h.hexdigest()
 
 
@@ -143,11 +243,13 @@ def md5(file: Path, chunk: int = 8192) -> str:
 # ──────────────────────────────
 def is_old_ts4script(file: Path) -> bool:
     """
-    Return True if a .ts4script file was compiled with old (pre-3.10) Python bytecode.
+    Return True if a .ts4script archive holds bytecode the game's Python cannot load.
+    The .pyc headers inside the archive are checked (see mf_ts4script); the
+    archive's own first bytes are just the zip signature.
     """
-    with file.open("rb") as f:
-        head = f.read(4)
-        return head in {b"\x42\x0D\x0D\x0A", b"\x33\x0D\x0D\x0A"}  # py 3.7/3.8/3.9
+    from .mf_ts4script import GAME_PYTHON, inspect_archive
+    _, report, _ = inspect_archive(file)
+    return any(version != GAME_PYTHON for version in report["versions"])
 
 
 # ──────────────────────────────
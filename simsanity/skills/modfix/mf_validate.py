@@ -0,0 +1,139 @@
+"""
+🩺 mf_validate.py
+Structural integrity checks for mod files.
+Packages: DBPF magic and version, index table inside the file, every
+resource range inside the file; deep mode also decompresses every resource.
+Script archives: the zip central directory must open; deep mode also
+verifies every member's CRC. Checks run in a worker pool and results are
+cached in the TGI index by size, mtime and inode.
+"""
+
+import struct
+import zipfile
+import zlib
+from pathlib import Path
+
+from .mf_compression import decompress
+from .mf_dbpf import COMPRESSION_NONE, COMPRESSION_STREAMABLE, HEADER_SIZE
+from .mf_index_cache import TGIIndex, fingerprint
+from .mf_mmap import open_mapped
+from .mf_parallel import map_chunks
+
+# Stop listing problems for one file after this many; it is broken either way
+MAX_PROBLEMS = 10
+
+
+def validate_package(path: Path, deep: bool = False) -> list[str]:
+    """Return the structural problems of one .package file (empty when it is sound)."""
+    problems = []
+    with open_mapped(path) as pkg:
+        if pkg.size == 0:
+            return ["empty file"]
+        try:
+            header = pkg.header()
+        except ValueError as e:
+            return [str(e)]
+        if header.index_count and header.index_offset < HEADER_SIZE:
+            return [f"index offset {header.index_offset} points into the header"]
+        try:
+            entries = pkg.index()
+        except ValueError as e:
+            return [str(e)]
+
+        buffer = bytearray()
+        for entry in entries:
+            name = f"{entry.type:08X}:{entry.group:08X}:{entry.instance:016X}"
+            if entry.offset < HEADER_SIZE or entry.offset + entry.file_size > pkg.size:
+                problems.append(f"resource {name} lies outside the file")
+            elif deep and entry.compression not in (COMPRESSION_NONE, COMPRESSION_STREAMABLE):
+                if len(buffer) < entry.mem_size:
+                    buffer = bytearray(entry.mem_size)
+                try:
+                    with pkg.resource(entry) as stored:
+                        decompress(entry, stored, buffer).release()
+                except (ValueError, IndexError, struct.error, zlib.error) as e:
+                    problems.append(f"resource {name} does not decompress: {e}")
+            if len(problems) >= MAX_PROBLEMS:
+                problems.append("further problems not listed")
+                break
+    return problems
+
+
+def validate_script(path: Path, deep: bool = False) -> list[str]:
+    """Return the structural problems of one .ts4script archive."""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            if deep:
+                try:
+                    bad = archive.testzip()
+                except (zlib.error, EOFError) as e:
+                    return [f"a member does not decompress: {e}"]
+                if bad is not None:
+                    return [f"member {bad} fails its CRC check"]
+    except zipfile.BadZipFile as e:
+        return [f"not a valid zip archive: {e}"]
+    return []
+
+
+def validate_file(path: Path, deep: bool = False) -> list[str]:
+    try:
+        if path.suffix.lower() == ".ts4script":
+            return validate_script(path, deep)
+        return validate_package(path, deep)
+    except OSError as e:
+        return [f"unreadable: {e}"]
+
+
+def _validate_chunk(paths: list[str], deep: bool = False) -> list[tuple[str, list[str]]]:
+    """Pool worker: (path, problems) per file."""
+    return [(path, validate_file(Path(path), deep)) for path in paths]
+
+
+def _validate_deep_chunk(paths: list[str]) -> list[tuple[str, list[str]]]:
+    return _validate_chunk(paths, deep=True)
+
+
+def validate_files(files: list[Path], deep: bool = False, index_path: Path | None = None,
+                   workers: int = 1, chunk_size: int = 32, log_callback=print,
+                   fingerprints: dict[str, tuple] | None = None, prune: bool = True) -> dict[Path, list[str]]:
+    """
+    Validate `files` and return {path: problems} for every file.
+    With an index, files whose fingerprint matches a cached result of at least
+    the requested depth are not opened again. `fingerprints` from a walk
+    (see mf_walker) are used instead of stat'ing each file. Without `prune`,
+    cached results of files missing from `files` are kept.
+    """
+    fingerprints = fingerprints or {}
+    results: dict[Path, list[str]] = {}
+    todo: list[tuple[Path, tuple]] = []
+    index = TGIIndex(index_path) if index_path else None
+    try:
+        cached = index.validation_results(files, prune) if index else {}
+        for file in files:
+            fp = fingerprints.get(str(file))
+            if fp is None:
+                try:
+                    fp = fingerprint(file.stat())
+                except OSError as e:
+                    results[file] = [f"unreadable: {e}"]
+                    continue
+            hit = cached.get(str(file))
+            if hit and hit[0] == fp and hit[1] >= deep:
+                results[file] = hit[2]
+            else:
+                todo.append((file, fp))
+
+        if todo:
+            log_callback(f"🩺 Validating {len(todo)} files ({len(files) - len(todo)} unchanged since last check)...")
+        todo_fps = {str(file): fp for file, fp in todo}
+        worker = _validate_deep_chunk if deep else _validate_chunk
+        rows = []
+        for path, problems in map_chunks(worker, list(todo_fps), workers, chunk_size):
+            results[Path(path)] = problems
+            rows.append((path, todo_fps[path], deep, problems))
+        if index:
+            index.store_validation(rows)
+    finally:
+        if index:
+            index.close()
+    return results
@@ -12,6 +12,7 @@ from datetime import datetime
 from pathlib import Path
 from colorama import Fore
 from .mf_utils import c
+from .mf_walker import MOD_EXTENSIONS, walk_mods
 
 # ──────────────────────────────
 # 🔎 VERSION CHECKING
@@ -35,18 +36,18 @@ def check_mod_versions(mods: Path, version_file: Path) -> None:
         return
 
     outdated = []
-    for file in mods.rglob("*"):
-        if file.suffix.lower() in {".package", ".ts4script"}:
-            name = file.name
-            if name in known_versions:
-                info = known_versions[name]
-                try:
-                    latest_time = datetime.fromisoformat(info["latest"])
-                except Exception:
-                    continue
-                file_time = datetime.fromtimestamp(file.stat().st_ctime)
-                if file_time < latest_time:
-                    outdated.append((file, latest_time.date(), file_time.date(), info.get("url")))
+    for record in walk_mods(mods).records(*MOD_EXTENSIONS):
+        file = Path(record.path)
+        name = file.name
+        if name in known_versions:
+            info = known_versions[name]
+            try:
+                latest_time = datetime.fromisoformat(info["latest"])
+            except Exception:
+                continue
+            file_time = datetime.fromtimestamp(record.ctime_ns / 1e9)
+            if file_time < latest_time:
+                outdated.append((file, latest_time.date(), file_time.date(), info.get("url")))
 
     if outdated:
         print(c("\n🔎 Outdated Mods Found:", Fore.YELLOW))
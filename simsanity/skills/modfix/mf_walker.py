@@ -0,0 +1,101 @@
+"""
+🚶 mf_walker.py
+Single-pass Mods folder walker shared by the ModFix stages.
+One os.scandir pass collects every file's size, mtime, inode and extension
+(the directory read already returns the type, so only files are stat'ed)
+into compact records. Stages take their file lists and cache fingerprints
+from the same ModsTree instead of each walking the folder again.
+"""
+
+import os
+from pathlib import Path
+
+# ModFix's own holding area inside Mods: its files are not part of the library
+SKIP_DIRNAMES = frozenset({"ModFix_Quarantine"})
+
+MOD_EXTENSIONS = (".package", ".ts4script")
+
+
+class FileRecord:
+    """One file found by the walker."""
+
+    __slots__ = ("path", "size", "mtime_ns", "ctime_ns", "inode", "ext")
+
+    def __init__(self, path: str, size: int, mtime_ns: int, ctime_ns: int, inode: int, ext: str):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.ctime_ns = ctime_ns
+        self.inode = inode
+        self.ext = ext
+
+    @property
+    def fingerprint(self) -> tuple[int, int, int]:
+        """Same (size, mtime_ns, inode) tuple as mf_index_cache.fingerprint."""
+        return (self.size, self.mtime_ns, self.inode)
+
+    def __repr__(self) -> str:
+        return f"FileRecord({self.path!r}, size={self.size})"
+
+
+class ModsTree:
+    """Files and folders under one root, as seen by a single walk."""
+
+    def __init__(self, root: Path, files: list[FileRecord], dirs: list[str]):
+        self.root = Path(root)
+        self.files = files
+        self.dirs = dirs
+
+    def records(self, *exts: str) -> list[FileRecord]:
+        """Records with one of the given (lower-case) extensions, or all of them."""
+        if not exts:
+            return list(self.files)
+        return [r for r in self.files if r.ext in exts]
+
+    def paths(self, *exts: str) -> list[Path]:
+        return [Path(r.path) for r in self.records(*exts)]
+
+    def fingerprints(self, *exts: str) -> dict[str, tuple[int, int, int]]:
+        """{path: fingerprint} for the cache checks of TGIIndex and mf_validate."""
+        return {r.path: r.fingerprint for r in self.records(*exts)}
+
+    def discard(self, paths) -> None:
+        """Forget files a stage moved or deleted."""
+        gone = {str(p) for p in paths}
+        if gone:
+            self.files = [r for r in self.files if r.path not in gone]
+
+
+def walk_mods(root: Path, skip_dirnames=SKIP_DIRNAMES) -> ModsTree:
+    """
+    Walk `root` once with os.scandir and return every file and folder below it.
+    Symlinked folders are not followed and unreadable folders are skipped.
+    """
+    files: list[FileRecord] = []
+    dirs: list[str] = []
+    stack = [str(root)]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in skip_dirnames:
+                                dirs.append(entry.path)
+                                stack.append(entry.path)
+                            continue
+                        if not entry.is_file():
+                            continue
+                        st = entry.stat()
+                        # On Windows the stat comes from the directory read, which lacks the file index
+                        inode = st.st_ino or entry.inode()
+                    except OSError:
+                        continue
+                    files.append(FileRecord(
+                        entry.path, st.st_size, st.st_mtime_ns, st.st_ctime_ns, inode,
+                        os.path.splitext(entry.name)[1].lower(),
+                    ))
+        except OSError:
+            continue
+    return ModsTree(root, files, dirs)
@@ -0,0 +1,296 @@
+"""
+👀 mf_watch.py
+Watch mode: checks mods the moment they land in the Mods folder.
+On Linux the folder is watched with inotify (through ctypes, no extra
+dependency); elsewhere it is polled with the single-pass walker. Bursts of
+events, such as unpacking a big CC set, are debounced into one batch. Each
+batch updates only the changed files in the TGI index, the script index and
+the validation cache, so the full scan that follows stays warm, and yields
+a verdict per file: suggested Tiny Tagger category, problems and conflicts.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+from .mf_conflicts import refresh_tgi_index
+from .mf_index_cache import TGIIndex
+from .mf_load_order import is_loaded
+from .mf_manifest import diff_manifest
+from .mf_ts4script import refresh_script_index
+from .mf_validate import validate_files
+from .mf_walker import MOD_EXTENSIONS, SKIP_DIRNAMES, walk_mods
+
+# Quiet time that ends a burst of changes, and the longest a burst is held back
+DEBOUNCE_SECONDS = 1.5
+MAX_BATCH_SECONDS = 10.0
+# Polling interval where inotify is not available
+POLL_SECONDS = 2.0
+# How often an idle watch yields, so a closed connection is noticed
+HEARTBEAT_SECONDS = 15.0
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+# A file counts once it is fully written or moved in; IN_CREATE is only used for new folders
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+
+_EVENT = struct.Struct("iIII")
+
+
+# ──────────────────────────────
+# 🐧 INOTIFY (LINUX)
+# ──────────────────────────────
+class InotifyWatcher:
+    """Recursive inotify watch on a folder; new subfolders are watched as they appear."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: dict[int, str] = {}
+        # Files known to be in the tree, to name the contents of folders that leave it
+        self._files: set[str] = set()
+        self._watch_tree(str(self.root))
+
+    def _watch_tree(self, folder: str) -> set[str]:
+        """Watch `folder` and its subfolders; return the files already inside."""
+        tree = walk_mods(Path(folder))
+        for sub in [folder, *tree.dirs]:
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(sub), WATCH_MASK)
+            if wd >= 0:
+                self._dirs[wd] = sub
+        files = {r.path for r in tree.files}
+        self._files |= files
+        return files
+
+    def _unwatch_tree(self, folder: str) -> set[str]:
+        """Stop watching a folder that left the tree; return the files it held."""
+        prefix = folder + os.sep
+        for wd, sub in list(self._dirs.items()):
+            if sub == folder or sub.startswith(prefix):
+                self._libc.inotify_rm_watch(self.fd, wd)
+                del self._dirs[wd]
+        files = {p for p in self._files if p.startswith(prefix)}
+        self._files -= files
+        return files
+
+    def wait(self, timeout: float) -> set[str]:
+        """Paths created, changed, moved or deleted within `timeout` seconds."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        pos = 0
+        while pos + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, pos)
+            name = data[pos + _EVENT.size:pos + _EVENT.size + length].rstrip(b"\0")
+            pos += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: look at everything again (cached checks make this cheap)
+                changed |= self._files | self._watch_tree(str(self.root))
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            folder = self._dirs.get(wd)
+            if folder is None:
+                continue
+            path = os.path.join(folder, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if os.path.basename(path) in SKIP_DIRNAMES:
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files moved in together with their folder raise no events of their own
+                    changed |= self._watch_tree(path)
+                elif mask & (IN_MOVED_FROM | IN_DELETE):
+                    changed |= self._unwatch_tree(path)
+                continue
+            if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                self._files.add(path)
+                changed.add(path)
+            elif mask & (IN_MOVED_FROM | IN_DELETE):
+                self._files.discard(path)
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+# ──────────────────────────────
+# 🔁 POLLING (EVERYWHERE ELSE)
+# ──────────────────────────────
+class PollingWatcher:
+    """Re-walks the folder every POLL_SECONDS and reports what differs."""
+
+    def __init__(self, root: Path, interval: float = POLL_SECONDS):
+        self.root = Path(root)
+        self.interval = interval
+        self._state = walk_mods(self.root).fingerprints()
+
+    def wait(self, timeout: float) -> set[str]:
+        time.sleep(min(timeout, self.interval))
+        tree = walk_mods(self.root)
+        diff = diff_manifest(self._state, tree)
+        self._state = tree.fingerprints()
+        return {*diff.added, *diff.removed, *diff.modified, *(p for move in diff.renamed for p in move)}
+
+    def close(self) -> None:
+        pass
+
+
+def open_watcher(root: Path):
+    """inotify on Linux, polling elsewhere or when inotify cannot be set up."""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root)
+
+
+def debounced(watcher, quiet: float = DEBOUNCE_SECONDS, max_wait: float = MAX_BATCH_SECONDS,
+              heartbeat: float = HEARTBEAT_SECONDS):
+    """
+    Yield sets of changed paths, each gathered until the folder has been quiet
+    for `quiet` seconds (or `max_wait` has passed since the first change).
+    An empty set is yielded every `heartbeat` seconds while nothing happens.
+    """
+    pending: set[str] = set()
+    first = None
+    last_yield = time.monotonic()
+    while True:
+        changed = watcher.wait(quiet if pending else heartbeat)
+        now = time.monotonic()
+        if changed:
+            pending |= changed
+            first = first or now
+            if now - first < max_wait:
+                continue
+        if pending:
+            yield pending
+            pending, first, last_yield = set(), None, now
+        elif now - last_yield >= heartbeat:
+            yield set()
+            last_yield = now
+
+
+# ──────────────────────────────
+# ✅ PER-FILE VERDICTS
+# ──────────────────────────────
+def _silent(message: str) -> None:
+    """Progress lines of the cache refreshes would drown the per-file verdicts."""
+
+
+def _watched(mods: Path, path: str) -> bool:
+    rel = Path(path).relative_to(mods) if Path(path).is_relative_to(mods) else None
+    return (
+        rel is not None
+        and Path(path).suffix.lower() in MOD_EXTENSIONS
+        and not any(part in SKIP_DIRNAMES for part in rel.parts)
+    )
+
+
+def check_changes(mods: Path, paths: set[str], index_path: Path, workers: int = 1) -> list[dict]:
+    """
+    Bring the caches up to date for `paths` only and return one verdict per
+    mod file: {"file", "status" ("added/changed" or "removed"), "tag",
+    "problems", "conflicts" (other packages sharing resource keys)}.
+    """
+    from .tinytagger import load_tags, tag_file
+
+    mods = Path(mods)
+    present, removed, fingerprints = [], [], {}
+    for path in sorted(p for p in paths if _watched(mods, p)):
+        try:
+            st = os.stat(path)
+        except OSError:
+            removed.append(path)
+            continue
+        present.append(Path(path))
+        fingerprints[path] = (st.st_size, st.st_mtime_ns, st.st_ino)
+
+    with TGIIndex(index_path) as index:
+        index.forget(removed)
+    packages = [p for p in present if p.suffix.lower() == ".package"]
+    scripts = [p for p in present if p.suffix.lower() == ".ts4script"]
+    refresh_tgi_index(packages, index_path, _silent, workers, fingerprints=fingerprints, prune=False)
+    refresh_script_index(scripts, index_path, _silent, workers, fingerprints=fingerprints, prune=False)
+    problems = validate_files(present, index_path=index_path, workers=workers, log_callback=_silent,
+                              fingerprints=fingerprints, prune=False)
+
+    tags = load_tags()
+    verdicts = [{"file": Path(p).relative_to(mods).as_posix(), "status": "removed",
+                 "tag": None, "problems": [], "conflicts": []} for p in removed]
+    with TGIIndex(index_path) as index:
+        reports = index.script_reports() if scripts else {}
+        for file in present:
+            rel = file.relative_to(mods).as_posix()
+            issues = list(problems.get(file, []))
+            if file in reports:
+                issues += [p for p in reports[file]["problems"] if p not in issues]
+            if not is_loaded(mods, file):
+                issues.append("nested too deep in Mods: the game will not load it")
+            conflicts = []
+            if file.suffix.lower() == ".package":
+                shared = index.sharing_packages(file)
+                # Rows of files moved outside a full run (e.g. by hand) are dropped here
+                gone = [str(other) for other in shared if not other.is_file()]
+                if gone:
+                    index.forget(gone)
+                conflicts = [f"{other.relative_to(mods).as_posix()} ({count} resources)"
+                             for other, count in sorted(shared.items())
+                             if str(other) not in gone and _watched(mods, str(other))]
+            verdicts.append({"file": rel, "status": "added/changed", "tag": tag_file(rel, tags),
+                             "problems": issues, "conflicts": conflicts})
+    return verdicts
+
+
+def format_verdict(verdict: dict) -> str:
+    """One line per file for the ModFix stream."""
+    if verdict["status"] == "removed":
+        return f"➖ {verdict['file']} removed."
+    line = f"🆕 {verdict['file']} → {verdict['tag']}"
+    if verdict["problems"]:
+        return f"{line}: 🚫 {'; '.join(verdict['problems'])}"
+    if verdict["conflicts"]:
+        return f"{line}: ⚔️ shares resources with {', '.join(verdict['conflicts'][:3])}"
+    return f"{line}: ✅ looks good"
+
+
+def watch_mods(mods: Path, index_path: Path, workers: int = 1, watcher=None):
+    """
+    Yield lists of verdicts as mods are added, changed or removed, and an
+    empty list as a heartbeat while the folder is idle. The watcher is
+    closed when the generator is closed (e.g. the client disconnects).
+    """
+    watcher = watcher or open_watcher(mods)
+    try:
+        for batch in debounced(watcher):
+            yield check_changes(mods, batch, index_path, workers) if batch else []
+    finally:
+        watcher.close()
@@ -87,9 +87,24 @@ def handle(user_input=None, context=None):
     # 🧹 CLEANER
     # ──────────────────────────────
     elif "clean" in text or "cache" in text or "thumb" in text:
-        clean_garbage_files(mods)
-        clear_keyword_files(["lastexception", "lastcrash", "lastuiexception"], mods)
-        remove_empty_folders(mods)
+        from .mf_crashlog import analyze_crash_logs
+        from .mf_index_cache import index_path_for
+        from .mf_ts4script import refresh_script_index
+        from .mf_walker import walk_mods
+        # One walk serves every cleaning pass; each drops what it deleted
+        tree = walk_mods(mods)
+        clean_garbage_files(mods, tree=tree)
+
+        def analyze_first(logs):
+            # Crash logs are the best clue to a broken mod: resolve them before deleting
+            refresh_script_index(
+                tree.paths(".ts4script"), index_path_for(mods), fingerprints=tree.fingerprints(".ts4script"),
+            )
+            analyze_crash_logs(logs, mods, index_path_for(mods), mods.parent / "ModFix_CrashReport.json")
+
+        clear_keyword_files(["lastexception", "lastcrash", "lastuiexception"], mods,
+                            before_delete=analyze_first, tree=tree)
+        remove_empty_folders(mods, tree=tree)
         log_action("Garbage and cache files removed.", reason="Cleaner")
         return {"response": "🧹 Mods folder cleaned and cache cleared."}
 
@@ -110,14 +125,50 @@ def handle(user_input=None, context=None):
         log_action("Mods sorted by category.", reason="Sorter")
         return {"response": "🗂 Mods sorted into category folders."}
 
+    # ──────────────────────────────
+    # 🗜️ RECOMPRESS
+    # ──────────────────────────────
+    elif "compress" in text or "shrink" in text:
+        from .mf_recompress import recompress_packages
+        from .mf_parallel import default_workers
+        from .mf_walker import walk_mods
+        saved = recompress_packages(walk_mods(mods).paths(".package"), workers=default_workers())
+        total_mb = sum(saved.values()) / (1024 * 1024)
+        log_action(f"Recompressed packages, saved {total_mb:.1f} MB.", reason="Recompress")
+        return {"response": f"🗜️ Recompressed mods and saved {total_mb:.1f} MB."}
+
+    # ──────────────────────────────
+    # ✂️ UNMERGE (checked before "merge", which it contains)
+    # ──────────────────────────────
+    elif "unmerge" in text or "split" in text:
+        from .mf_merge import MERGED_DIRNAME
+        from .mf_split import split_merged
+        restored = []
+        for merged in sorted((mods / MERGED_DIRNAME).glob("*.package")):
+            restored.extend(split_merged(merged, mods))
+        log_action(f"Split merged packages back into {len(restored)} packages.", reason="Unmerge")
+        return {"response": f"✂️ Restored {len(restored)} packages from merged files."}
+
+    # ──────────────────────────────
+    # 🧱 MERGE
+    # ──────────────────────────────
+    elif "merge" in text:
+        from .mf_merge import merge_by_category
+        merged = merge_by_category(mods)
+        total = sum(len(outputs) for outputs in merged.values())
+        log_action(f"Merged packages into {total} files across {len(merged)} categories.", reason="Merge")
+        return {"response": f"🧱 Merged {len(merged)} categories into {total} packages. Originals moved to ModFix_MergedOriginals."}
+
     # ──────────────────────────────
     # 📄 INVENTORY EXPORT
     # ──────────────────────────────
     elif "inventory" in text or "list" in text or "export" in text:
         json_path = mods.parent / "ModsInventory.json"
         csv_path = mods.parent / "ModsInventory.csv"
-        export_mod_inventory_to_json(mods, json_path)
-        export_mod_inventory_to_csv(mods, csv_path)
+        from .mf_walker import walk_mods
+        tree = walk_mods(mods)
+        export_mod_inventory_to_json(mods, json_path, tree=tree)
+        export_mod_inventory_to_csv(mods, csv_path, tree=tree)
         log_action("Inventory exported (JSON + CSV).", reason="Inventory")
         return {"response": f"📄 Exported mod inventory to:\n- {json_path}\n- {csv_path}"}
 
@@ -173,37 +224,130 @@ def stream_handle(context):
         # yield "🧩 [DEBUG] validate_mod_paths() starting..."
         mods = validate_mod_paths()
         # yield "🧩 [DEBUG] validate_mod_paths() returned."
+        if isinstance(mods, str) and mods == "manual_required":
+            yield "data: {\"status\": \"manual_required\"}\n\n"
+            return
         # Ensure we are operating inside the actual Mods folder
         from pathlib import Path
+        from .mf_utils import find_mods_under
         if Path(mods).name.lower() != "mods":
-            possible_mods = list(Path(mods).glob("**/Mods"))
-            if possible_mods:
-                mods = possible_mods[0]
+            possible_mods = find_mods_under(Path(mods))
+            if possible_mods is not None:
+                mods = possible_mods
                 yield f"📂 Adjusted Mods path to: {mods}"
             else:
                 yield f"❌ Mods folder not found under {mods}. Halting."
                 return
-        if isinstance(mods, str) and mods == "manual_required":
-            yield "data: {\"status\": \"manual_required\"}\n\n"
-            return
         yield f"📂 Found Mods folder: {mods}"
 
         # --- Step 1: Conflict analysis ---
         yield "⚙️ Analyzing mod conflicts... 💡 The more mods you have, the longer this step may take — please wait patiently."
         time.sleep(0.5)
         from .mf_conflicts import detect_conflicting_tgi
+        from .mf_mmap import package_session
+        from .mf_index_cache import TGIIndex, index_path_for
+        from .mf_parallel import default_workers
+        from .mf_walker import walk_mods
+        from .mf_manifest import diff_manifest, load_manifest, mods_manifest_path, save_manifest
+        # One walk of Mods feeds every analysis stage (quarantined files are dropped from it)
+        tree = walk_mods(Path(mods))
+        # Quarantine and sorting move files; this snapshot lets the index follow them
+        walked = tree.fingerprints()
+        # Compared with the folder as the last run left it; moved files keep their cached results
+        last_manifest = load_manifest(mods_manifest_path(mods), Path(mods))
+        delta = diff_manifest(last_manifest, tree) if last_manifest is not None else None
+        if delta is not None:
+            yield f"📒 Since the last run: {delta.summary()}."
+            if delta.renamed:
+                with TGIIndex(index_path_for(mods)) as index:
+                    index.rename(delta.renamed)
         # yield "🧩 [DEBUG] detect_conflicting_tgi() starting..."
         output_path = Path(mods).parent / "ModFix_Conflicts.json"
-        detect_conflicting_tgi(mods, output_path, quarantine=True)
+        # Mappings are shared by the read-only stages and closed before files get moved
+        with package_session():
+            detect_conflicting_tgi(
+                mods, output_path, quarantine=True,
+                index_path=index_path_for(mods), workers=default_workers(),
+                overrides_path=Path(mods).parent / "ModFix_Overrides.csv", tree=tree,
+            )
         # yield "🧩 [DEBUG] detect_conflicting_tgi() finished."
         yield f"⚔️ Conflict analysis complete. Results saved to {output_path}"
 
+        # Integrity: results are cached by fingerprint, so only new or changed files are opened
+        from .mf_conflicts import detect_broken_mods
+        broken_path = Path(mods).parent / "ModFix_Broken.csv"
+        broken = detect_broken_mods(
+            Path(mods), broken_path, index_path=index_path_for(mods), workers=default_workers(), tree=tree,
+        )
+        if broken:
+            yield f"🚫 {len(broken)} mod files are damaged or truncated. See {broken_path}"
+
+        # EA overrides: checked against a sorted key index of the game's own packages
+        from .mf_gameindex import ensure_game_index, write_game_overrides
+        game_index = ensure_game_index(Path(mods), log_callback=print, workers=default_workers())
+        if game_index is not None:
+            overrides_path = Path(mods).parent / "ModFix_GameOverrides.csv"
+            if write_game_overrides(index_path_for(mods), game_index, Path(mods), overrides_path):
+                yield f"🎮 Some mods override EA game resources and may break after patches. See {overrides_path}"
+
+        # The index refreshed above also holds every package's references
+        from .mf_refs import write_dangling_report
+        missing_path = Path(mods).parent / "ModFix_MissingDependencies.csv"
+        missing = write_dangling_report(index_path_for(mods), Path(mods), missing_path, game_index=game_index)
+        if missing:
+            yield f"🕳️ {missing} references point at resources no installed mod provides. See {missing_path}"
+
+        # Script mods: bytecode checked against the game's Python, cached by fingerprint
+        from .mf_ts4script import detect_script_collisions, inspect_scripts
+        script_files = tree.paths(".ts4script")
+        script_fps = tree.fingerprints(".ts4script")
+        scripts_path = Path(mods).parent / "ModFix_Scripts.csv"
+        bad_scripts = inspect_scripts(
+            script_files, index_path_for(mods), Path(mods), scripts_path, workers=default_workers(),
+            fingerprints=script_fps,
+        )
+        if bad_scripts:
+            yield f"📜 {len(bad_scripts)} script mods are built for the wrong Python version or ship no bytecode. See {scripts_path}"
+
+        # Two archives with the same top-level package: only one of them is ever imported
+        collisions_path = Path(mods).parent / "ModFix_ScriptCollisions.csv"
+        collisions = detect_script_collisions(
+            script_files, index_path_for(mods), Path(mods), collisions_path, workers=default_workers(),
+            fingerprints=script_fps,
+        )
+        if collisions:
+            yield f"⚔️ {len(collisions)} script packages are shadowed by another script mod. See {collisions_path}"
+
+        # Imports read from the same cached bytecode scan: which script mods need which frameworks
+        from .mf_gameindex import find_game_dir
+        from .mf_script_deps import analyze_script_dependencies
+        deps_path = Path(mods).parent / "ModFix_ScriptDependencies.json"
+        graph = analyze_script_dependencies(
+            script_files, index_path_for(mods), Path(mods), deps_path,
+            game_dir=find_game_dir(), workers=default_workers(), fingerprints=script_fps,
+        )
+        missing_frameworks = sorted({f for deps in graph.values() for f in deps["missing"]})
+        if missing_frameworks:
+            yield f"🔗 Script mods need frameworks that are not installed: {', '.join(missing_frameworks[:5])}. See {deps_path}"
+
+        # Crash logs are resolved through the same index (key → package, module → archive)
+        from .mf_crashlog import analyze_crash_logs, find_crash_logs
+        crash_logs = find_crash_logs(Path(mods).parent)
+        if crash_logs:
+            crash_path = Path(mods).parent / "ModFix_CrashReport.json"
+            crash_report = analyze_crash_logs(crash_logs, Path(mods), index_path_for(mods), crash_path)
+            suspects = sorted({m for entry in crash_report for m in entry["suspects"]})
+            if suspects:
+                yield f"💥 {len(crash_logs)} crash logs point at {len(suspects)} mods: {', '.join(suspects[:5])}. See {crash_path}"
+
         # --- Step 2: Sorting (Tiny Tagger integration) ---
         yield "✨ Sorting and labeling your Sims mods — this could take a while, please wait..."
         time.sleep(0.5)
         from .tinytagger import move_files
         # yield "🧩 [DEBUG] move_files() starting..."
-        move_files(mods, dry_run=False)
+        # Files the tagger already saw last run, unchanged, would get the same verdict again
+        changed = delta.changed_paths() if delta is not None else None
+        move_files(mods, dry_run=False, files=[r.path for r in tree.files if changed is None or r.path in changed])
         # yield "🧩 [DEBUG] move_files() finished."
         yield "📁 Organization complete."
 
@@ -212,10 +356,51 @@ def stream_handle(context):
         time.sleep(0.5)
         from .mf_cleaner import remove_empty_folders
         # yield "🧩 [DEBUG] remove_empty_folders() starting..."
-        remove_empty_folders(mods, aggressive=True, log_callback=print)
+        # Files were just moved, so the earlier walk is out of date
+        final_tree = walk_mods(Path(mods))
+        moves = diff_manifest(walked, final_tree)
+        with TGIIndex(index_path_for(mods)) as index:
+            # Watch mode reports conflicts from the index, so it must not name files that moved away
+            index.rename(moves.renamed)
+            index.forget(moves.removed)
+        remove_empty_folders(mods, aggressive=True, log_callback=print, tree=final_tree)
+        save_manifest(final_tree, mods_manifest_path(mods))
         # yield "🧩 [DEBUG] remove_empty_folders() finished."
         yield "🧼 Cleanup complete."
 
         yield "✅ ModFix complete!"
     except Exception as e:
         yield f"❌ ModFix encountered an error: {e}"
+
+
+def watch_handle(context):
+    """
+    Watch mode: reports on each mod as it is added to, changed in or removed
+    from the Mods folder, until the client goes away. Yields None as a
+    heartbeat while the folder is idle.
+    """
+    try:
+        from pathlib import Path
+        mods = validate_mod_paths()
+        if isinstance(mods, str) and mods == "manual_required":
+            yield "❌ Mods folder not set. Run ModFix once to choose it."
+            return
+        if Path(mods).name.lower() != "mods":
+            from .mf_utils import find_mods_under
+            possible_mods = find_mods_under(Path(mods))
+            if possible_mods is None:
+                yield f"❌ Mods folder not found under {mods}. Halting."
+                return
+            mods = possible_mods
+
+        from .mf_index_cache import index_path_for
+        from .mf_parallel import default_workers
+        from .mf_watch import format_verdict, watch_mods
+        yield f"👀 Watching {mods} for new mods..."
+        for verdicts in watch_mods(Path(mods), index_path_for(mods), workers=default_workers()):
+            if not verdicts:
+                yield None
+            for verdict in verdicts:
+                yield format_verdict(verdict)
+    except Exception as e:
+        yield f"❌ ModFix watch stopped: {e}"
@@ -720,14 +720,34 @@ def log_tag_action(path, category):
         json.dump(log, f, indent=2)
 
 
-def move_files(root_path, dry_run=False):
-    """Walk through the mod folder and move files into categorized subfolders."""
+def _walk_files(root_path):
+    """(folder, [file names]) pairs under root_path, like os.walk without the subfolder lists."""
+    for dirpath, _, filenames in os.walk(root_path):
+        yield dirpath, filenames
+
+
+def _group_by_folder(files):
+    """(folder, [file names]) pairs for file paths that were already listed (e.g. by mf_walker)."""
+    folders = {}
+    for path in files:
+        dirpath, name = os.path.split(str(path))
+        folders.setdefault(dirpath, []).append(name)
+    return folders.items()
+
+
+def move_files(root_path, dry_run=False, files=None):
+    """
+    Walk through the mod folder and move files into categorized subfolders.
+    `files` is an optional list of file paths under root_path from an earlier
+    walk, so the folder is not listed again.
+    """
     SKIP_FOLDERS = ['Unsorted', 'Clothing', 'Hair', 'Build-Bathroom', 'Build-Kitchen', 'Decor-Plants', 'Themes']
     tags = load_tags()
     moved, skipped, failed = 0, 0, 0
     created_folders = set()
 
-    for dirpath, _, filenames in os.walk(root_path):
+    folders = _walk_files(root_path) if files is None else _group_by_folder(files)
+    for dirpath, filenames in folders:
         if any(skip in dirpath for skip in SKIP_FOLDERS):
             continue
         for file in filenames:
@@ -200,14 +200,14 @@ from flask import Response
 @routes.route("/modfix", methods=["GET"])
 def modfix():
     """Run the ModFix process and stream progress updates to the UI."""
-    from skills.modfix import modfix_controller
+    from simsanity.skills.modfix import modfix_controller
     from flask import Response
 
     def generate():
         unified_log("[ROUTE modfix] Starting ModFix process (streaming mode).")
         yield "data: 🧩 Starting ModFix...\n\n"
         # Detect if ModFix needs manual Mods path from the UI
-        from skills.modfix import mf_utils
+        from simsanity.skills.modfix import mf_utils
         mods_folder = mf_utils.validate_mod_paths()
         if mods_folder == "manual_required":
             unified_log("[ROUTE modfix] Manual Mods folder path required — notifying UI.")
@@ -248,13 +248,14 @@ def manual_mods_path():
         MANUAL_MODS_PATH = manual_path
         # Persist the manual path to the ModFix cache file
         try:
-            from skills.modfix import mf_utils
-            mf_utils.CACHE_FILE.write_text(str(manual_path))
+            from simsanity.skills.modfix import mf_utils
+            # Stored as the Mods folder itself, so later runs only have to stat it
+            mf_utils.remember_mods_path(mf_utils.find_mods_under(manual_path) or manual_path)
             unified_log(f"[ROUTE manual_mods_path] 💾 Saved manual Mods folder path to cache file: {manual_path}")
         except Exception as e:
             unified_log(f"[ROUTE manual_mods_path] ⚠️ Failed to save manual path to cache file: {e}")
         try:
-            from skills.modfix import mf_utils
+            from simsanity.skills.modfix import mf_utils
             if hasattr(mf_utils, "MODFIX_STATE"):
                 mf_utils.MODFIX_STATE["manual_required"] = False
                 unified_log("[ROUTE manual_mods_path] 🔄 Cleared manual_required flag in ModFix state.")
@@ -9,6 +9,7 @@ Safe for PyInstaller builds.
 
 
 import os, sys, subprocess, platform, webbrowser
+import multiprocessing
 
 # --- Ensure Simsanity package is discoverable ---
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -24,39 +25,8 @@ def python_exists():
         return False
 
 
-if not python_exists():
-    print("❌ Python is not installed or not accessible.")
-    system = platform.system().lower()
-    if system.startswith("windows"):
-        print("➡️ Opening official Python download page for Windows...")
-        webbrowser.open("https://www.python.org/downloads/windows/")
-    elif system.startswith("darwin"):
-        print("➡️ Opening official Python download page for macOS...")
-        webbrowser.open("https://www.python.org/downloads/macos/")
-    else:
-        print("Please install Python 3.9+ manually from https://www.python.org/downloads/")
-    sys.exit(1)
-
-# --- Step 0.5: Ensure virtual environment exists ---
 VENV_PATH = os.path.join(os.path.dirname(__file__), "venv")
-
-if not os.path.exists(VENV_PATH):
-    print("🐍 Creating local virtual environment...")
-    subprocess.check_call([sys.executable, "-m", "venv", VENV_PATH])
-    print("✅ Virtual environment created.\n")
-
-# Activate venv automatically
-if platform.system().lower().startswith("windows"):
-    activate_script = os.path.join(VENV_PATH, "Scripts", "activate_this.py")
-else:
-    activate_script = os.path.join(VENV_PATH, "bin", "activate_this.py")
-
-if os.path.exists(activate_script):
-    with open(activate_script) as f:
-        exec(f.read(), {'__file__': activate_script})
-    print("🔹 Virtual environment activated.\n")
-else:
-    print("⚠️ Could not auto-activate venv — continuing anyway.\n")
+BOOTSTRAP_MARKER = os.path.expanduser("~/.simsanity_bootstrap_done")
 
 # --- Step 1: Universal dependency list ---
 REQUIRED_PACKAGES = [
@@ -78,20 +48,63 @@ def ensure_all():
         ensure_package(pkg)
     print("✅ All dependencies are ready.\n")
 
-# --- Step 2: One-time bootstrap marker ---
-BOOTSTRAP_MARKER = os.path.expanduser("~/.simsanity_bootstrap_done")
+def bootstrap():
+    """
+    Check Python, activate the venv and install missing packages.
+    Only run when this file is the launched script: worker processes started
+    with spawn (the default on Windows and macOS) import it again as
+    __mp_main__ and must not repeat any of this.
+    """
+    if not python_exists():
+        print("❌ Python is not installed or not accessible.")
+        system = platform.system().lower()
+        if system.startswith("windows"):
+            print("➡️ Opening official Python download page for Windows...")
+            webbrowser.open("https://www.python.org/downloads/windows/")
+        elif system.startswith("darwin"):
+            print("➡️ Opening official Python download page for macOS...")
+            webbrowser.open("https://www.python.org/downloads/macos/")
+        else:
+            print("Please install Python 3.9+ manually from https://www.python.org/downloads/")
+        sys.exit(1)
+
+    # --- Step 0.5: Ensure virtual environment exists ---
+    if not os.path.exists(VENV_PATH):
+        print("🐍 Creating local virtual environment...")
+        subprocess.check_call([sys.executable, "-m", "venv", VENV_PATH])
+        print("✅ Virtual environment created.\n")
+
+    # Activate venv automatically
+    if platform.system().lower().startswith("windows"):
+        activate_script = os.path.join(VENV_PATH, "Scripts", "activate_this.py")
+    else:
+        activate_script = os.path.join(VENV_PATH, "bin", "activate_this.py")
 
-if not os.path.exists(BOOTSTRAP_MARKER):
-    print("🛠️ First-time setup detected — installing dependencies...")
-    # Make sure pip itself exists and is upgraded
-    subprocess.call([sys.executable, "-m", "ensurepip", "--upgrade"])
-    subprocess.call([sys.executable, "-m", "pip", "install", "--upgrade", "pip", "setuptools", "wheel"])
-    ensure_all()
-    with open(BOOTSTRAP_MARKER, "w") as f:
-        f.write("ok")
-    print("🎉 Setup complete! Future runs will skip installation.\n")
-else:
-    ensure_all()
+    if os.path.exists(activate_script):
+        with open(activate_script) as f:
+            exec(f.read(), {'__file__': activate_script})
+        print("🔹 Virtual environment activated.\n")
+    else:
+        print("⚠️ Could not auto-activate venv — continuing anyway.\n")
+
+    # --- Step 2: One-time bootstrap marker ---
+    if not os.path.exists(BOOTSTRAP_MARKER):
+        print("🛠️ First-time setup detected — installing dependencies...")
+        # Make sure pip itself exists and is upgraded
+        subprocess.call([sys.executable, "-m", "ensurepip", "--upgrade"])
+        subprocess.call([sys.executable, "-m", "pip", "install", "--upgrade", "pip", "setuptools", "wheel"])
+        ensure_all()
+        with open(BOOTSTRAP_MARKER, "w") as f:
+            f.write("ok")
+        print("🎉 Setup complete! Future runs will skip installation.\n")
+    else:
+        ensure_all()
+
+
+# Run from here or imported by core/main.py; spawned pool workers import
+# this module again and must not repeat the setup
+if multiprocessing.parent_process() is None:
+    bootstrap()
 
 # --- Step 3: OS-specific environment adjustments ---
 SYSTEM = platform.system().lower()
@@ -103,7 +116,8 @@ else:
     SEP = ":"
 
 # --- Step 4: Continue with main app startup ---
-print(f"🚀 Launching Simsanity on {SYSTEM.capitalize()}...\n")
+if multiprocessing.parent_process() is None:
+    print(f"🚀 Launching Simsanity on {SYSTEM.capitalize()}...\n")
 
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -167,6 +181,19 @@ def stream_modfix():
 
     return Response(generate(), mimetype="text/event-stream")
 
+@app.route("/modfix/watch", methods=["GET"])
+def watch_modfix():
+    """Stream a verdict for every mod dropped into the Mods folder."""
+    def generate():
+        try:
+            for message in modfix_controller.watch_handle({}):
+                # Idle heartbeats keep the connection open and notice when the client leaves
+                yield ": keep-alive\n\n" if message is None else f"data: {message}\n\n"
+        except Exception as e:
+            yield f"data: ⚠️ Error during ModFix watch: {str(e)}\n\n"
+
+    return Response(generate(), mimetype="text/event-stream")
+
 def run_server(port):
     app.run(host="0.0.0.0", port=port, debug=False, use_reloader=False)
 
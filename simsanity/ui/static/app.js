@@ -60,6 +60,7 @@ async function promptForModsPath() {
       window.modfixStream.onmessage = (event) => {
         chat.innerHTML += `<div class="bot-message">${event.data}</div>`;
         chat.scrollTop = chat.scrollHeight;
+        if (event.data.startsWith("✅ ModFix complete")) startModWatch();
       };
       window.modfixStream.onerror = () => {
         chat.innerHTML += `<div class="bot-message error">⚠️ ModFix stream ended or failed.</div>`;
@@ -75,6 +76,23 @@ async function promptForModsPath() {
   chat.scrollTop = chat.scrollHeight;
 }
 
+// After a ModFix run, keep watching the Mods folder and report each mod as it lands
+function startModWatch() {
+  if (window.modfixWatch) return;
+  const chat = document.getElementById("chat");
+
+  window.modfixWatch = new EventSource("/modfix/watch");
+  window.modfixWatch.onmessage = (event) => {
+    chat.innerHTML += `<div class="bot-message">${event.data}</div>`;
+    chat.scrollTop = chat.scrollHeight;
+  };
+  window.modfixWatch.onerror = () => {
+    chat.innerHTML += `<div class="system-message"><i>👀 Stopped watching the Mods folder.</i></div>`;
+    window.modfixWatch.close();
+    window.modfixWatch = null;
+  };
+}
+
 function highlightActiveButton(mode) {
   document.querySelectorAll(".prompt-buttons button").forEach(btn => {
     btn.classList.remove("active");
@@ -248,6 +266,7 @@ document.getElementById("btn-modfix").addEventListener("click", async () => {
         eventSource.onmessage = (event) => {
           chat.innerHTML += `<div class="bot-message">${event.data}</div>`;
           chat.scrollTop = chat.scrollHeight;
+          if (event.data.startsWith("✅ ModFix complete")) startModWatch();
         };
 
         eventSource.onerror = () => {